@@ -1,9 +1,13 @@
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from backend.app.utils.metricas_pool import MetricasPool, QueuePoolInstrumentado
+from backend.app.utils.roteamento_replicas import SessaoRoteada, roteador_replicas
+
 # Carrega o .env do diretório pai
 project_root = Path(__file__).parent.parent
 dotenv_path = project_root / ".env"
@@ -22,17 +26,53 @@ if not DATABASE_URL:
 
 print(f"Conectando ao banco: {DATABASE_URL.split('@')[1]}")  # Log sem senha
 
+# Pool de conexões por processo (com N workers o banco recebe até N * (size + overflow))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # segundos esperando conexão livre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# Validação no checkout: DB_POOL_PRE_PING=true testa toda conexão (comportamento anterior);
+# false testa só as ociosas há DB_POOL_VALIDACAO segundos ou mais (-1 desliga)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "sim")
+DB_POOL_VALIDACAO = float(os.getenv("DB_POOL_VALIDACAO", "30"))
+
 # Engine com configurações otimizadas para containers
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Mudado para False em produção
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Importante para containers
-    pool_recycle=3600
+    poolclass=QueuePoolInstrumentado,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE
 )
 
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+# Espera no checkout, custo da validação e idade das conexões (GET /api/admin/metricas/pool)
+metricas_pool = MetricasPool()
+metricas_pool.instrumentar(engine, validacao=0 if DB_POOL_PRE_PING else DB_POOL_VALIDACAO)
+
+# Réplicas de leitura (URLs separadas por vírgula); sem elas tudo vai para o primário
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_LAG_MAXIMO = float(os.getenv("REPLICA_LAG_MAXIMO", "5"))             # segundos de atraso tolerados
+REPLICA_VERIFICACAO = float(os.getenv("REPLICA_VERIFICACAO", "2"))           # intervalo da medição do lag
+REPLICA_JANELA_PRIMARIO = int(os.getenv("REPLICA_JANELA_PRIMARIO", "10"))    # leituras no primário após uma escrita
+
+replica_engines = [
+    create_engine(
+        url,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE
+    )
+    for url in DATABASE_REPLICA_URLS
+]
+# Medição sem resposta por 3 ciclos vale como réplica indisponível
+roteador_replicas.configurar(replica_engines, lag_maximo=REPLICA_LAG_MAXIMO, validade=3 * REPLICA_VERIFICACAO)
+
+SessionLocal = sessionmaker(bind=engine, class_=SessaoRoteada, autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def get_db():
@@ -41,4 +81,52 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ================= ENGINE ASSÍNCRONO (opcional) =================
+# DATABASE_ASYNC=true liga as rotas de leitura assíncronas (asyncpg / aiosqlite),
+# que não ocupam threads do threadpool do Starlette
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "sim")
+
+
+def url_assincrona(url: str) -> str:
+    """
+    Troca o driver síncrono da URL pelo equivalente assíncrono
+
+    Examples:
+        >>> url_assincrona("postgresql+psycopg2://u:s@db:5432/biblioteca")
+        'postgresql+asyncpg://u:s@db:5432/biblioteca'
+        >>> url_assincrona("sqlite:///biblioteca.db")
+        'sqlite+aiosqlite:///biblioteca.db'
+    """
+    url = re.sub(r"^postgres(?:ql)?(?:\+psycopg2)?://", "postgresql+asyncpg://", url)
+    return re.sub(r"^sqlite(?:\+pysqlite)?://", "sqlite+aiosqlite://", url)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or url_assincrona(DATABASE_URL)
+
+async_engine = None
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE
+    )
+    # expire_on_commit=False: objetos continuam legíveis sem novo I/O implícito
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """Dependency para rotas assíncronas (requer DATABASE_ASYNC=true)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Engine assíncrono desativado (DATABASE_ASYNC=false)")
+    async with AsyncSessionLocal() as db:
+        yield db
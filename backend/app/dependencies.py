@@ -1,28 +1,24 @@
-from backend.app.database import SessionLocal
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from backend.app.service.auth_service import AuthService
 
+# Mesmo callable de database.get_db: o FastAPI reaproveita a sessão entre
+# dependências da mesma requisição, qualquer que seja o módulo importado
+from backend.app.database import get_db
+from backend.app.utils.principal import principal_da_requisicao
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-async def get_usuario_autenticado(
+# def (e não async def): a consulta do usuário é bloqueante e roda no threadpool
+def get_usuario_autenticado(
         request: Request,
         db: Session = Depends(get_db)
 ):
-    token = request.cookies.get("access_token")
-    if not token:
+    principal = principal_da_requisicao(request)
+    if not principal.token:
         raise HTTPException(status_code=401, detail="Não autenticado")
 
-    auth_service = AuthService(db)
-    usuario = auth_service.get_usuario_from_token(token)
-
-    if not usuario:
+    # Mesmas regras de AuthService.get_usuario_from_token, sobre o usuário já resolvido na requisição
+    usuario = principal.usuario(db)
+    if not usuario or not usuario.ativo or not usuario.email_confirmado:
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
 
-    return usuario
\ No newline at end of file
+    return usuario
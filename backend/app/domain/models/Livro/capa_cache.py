@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from backend.app.database import Base
+
+
+class CapaCache(Base):
+    """Resultado de uma busca de capa (encontrada ou não) por título/autor/ISBN normalizados"""
+    __tablename__ = "capas_cache"
+    __table_args__ = {"schema": "biblioteca"}
+
+    chave = Column(String, primary_key=True)
+    capa_url = Column(String, nullable=True)
+    encontrada = Column(Boolean, nullable=False, default=False)
+    consultado_em = Column(DateTime, nullable=False)
+    expira_em = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CapaCache(chave='{self.chave}', encontrada={self.encontrada})>"
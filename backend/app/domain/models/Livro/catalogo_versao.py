@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime
+from backend.app.database import Base
+
+
+class CatalogoVersao(Base):
+    """Contador global incrementado a cada escrita no catálogo (linha única, id = 1)"""
+    __tablename__ = "catalogo_versao"
+    __table_args__ = {"schema": "biblioteca"}
+
+    id = Column(Integer, primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+    atualizado_em = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<CatalogoVersao(versao={self.versao})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from backend.app.database import Base
+
+
+class EnriquecimentoJob(Base):
+    """Tarefa de enriquecimento de um livro (ex.: busca de capa), processada em segundo plano"""
+    __tablename__ = "enriquecimento_jobs"
+    __table_args__ = (
+        Index("ix_enriquecimento_jobs_fila", "status", "proxima_tentativa"),
+        {"schema": "biblioteca"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    livro_id = Column(Integer, ForeignKey("biblioteca.livros.id", ondelete="CASCADE"), nullable=False, index=True)
+    tipo = Column(String(20), nullable=False, default="capa")
+    status = Column(String(20), nullable=False, default="pendente")  # pendente, processando, falhou
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa = Column(DateTime, nullable=False)
+    erro = Column(String, nullable=True)
+    criado_em = Column(DateTime, nullable=False)
+    atualizado_em = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<EnriquecimentoJob(livro_id={self.livro_id}, tipo='{self.tipo}', status='{self.status}')>"
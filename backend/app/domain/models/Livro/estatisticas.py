@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, DateTime
+from backend.app.database import Base
+
+
+class EstatisticasCatalogo(Base):
+    """Totais do catálogo mantidos a cada escrita em livros (linha única, id = 1)"""
+    __tablename__ = "estatisticas_catalogo"
+    __table_args__ = {"schema": "biblioteca"}
+
+    id = Column(Integer, primary_key=True)
+    total_livros = Column(BigInteger, nullable=False, default=0)
+    livros_sem_estoque = Column(BigInteger, nullable=False, default=0)
+    estoque_total = Column(BigInteger, nullable=False, default=0)
+    valor_inventario = Column(Numeric(16, 2), nullable=False, default=0)
+    atualizado_em = Column(DateTime, nullable=True)
+    reconciliado_em = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<EstatisticasCatalogo(total_livros={self.total_livros})>"
+
+
+class EstatisticasAutor(Base):
+    """Quantidade de livros por autor (mesma manutenção de EstatisticasCatalogo)"""
+    __tablename__ = "estatisticas_autores"
+    __table_args__ = {"schema": "biblioteca"}
+
+    autor = Column(String, primary_key=True)
+    quantidade = Column(BigInteger, nullable=False, default=0, index=True)
+
+    def __repr__(self):
+        return f"<EstatisticasAutor(autor='{self.autor}', quantidade={self.quantidade})>"
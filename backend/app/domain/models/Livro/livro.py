@@ -1,11 +1,18 @@
 from pydantic.v1 import BaseModel
-from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from backend.app.database import Base
 
 class Livro(Base):
     __tablename__ = "livros"
-    __table_args__ = {"schema": "biblioteca"}
+    __table_args__ = (
+        # ISBN canônico (ISBN-13, ver utils/isbn.py) único entre os livros que têm ISBN
+        Index("ux_livros_isbn", "isbn", unique=True,
+              postgresql_where=text("isbn IS NOT NULL"), sqlite_where=text("isbn IS NOT NULL")),
+        # Sincronização incremental do catálogo em memória (livros alterados desde a última leitura)
+        Index("ix_livros_data_atualizacao", "data_atualizacao"),
+        {"schema": "biblioteca"},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String, nullable=False)
@@ -17,7 +24,7 @@ class Livro(Base):
     data_criacao = Column(DateTime, nullable=True)
     data_atualizacao = Column(DateTime, nullable=True)
     isbn = Column(String, nullable=True)
-    slug = Column(String, nullable=True)
+    slug = Column(String, nullable=True, unique=True)
 
     # Relacionamentos corrigidos
     itens_carrinho = relationship("ItemCarrinho", back_populates="livro")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+from backend.app.database import Base
+
+
+class ReplicacaoHeartbeat(Base):
+    """Marca de tempo gravada no primário e lida nas réplicas para medir o lag (linha única, id = 1)"""
+    __tablename__ = "replicacao_heartbeat"
+    __table_args__ = {"schema": "biblioteca"}
+
+    id = Column(Integer, primary_key=True)
+    gravado_em = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ReplicacaoHeartbeat(gravado_em={self.gravado_em})>"
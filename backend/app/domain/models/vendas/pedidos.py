@@ -1,30 +1,28 @@
 # app/domain/models/vendas/pedidos.py
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from backend.app.database import Base
 from backend.app.domain.models.enums import StatusPedido
 
 class Pedido(Base):
     __tablename__ = "pedidos"
-    __table_args__ = {"schema": "biblioteca"}
+    __table_args__ = (
+        # Histórico do usuário: filtro, ORDER BY created_at DESC, id DESC e cursor pelo índice
+        Index("ix_pedidos_usuario_criacao", "usuario_id", "created_at", "id"),
+        {"schema": "biblioteca"},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("biblioteca.usuarios.id"), nullable=False)
     status = Column(Enum(StatusPedido), default=StatusPedido.PENDENTE)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Gravados no checkout (itens não mudam depois); PedidoRepository.verificar_totais confere com os itens
+    total = Column(Numeric(10, 2), nullable=False, default=0)
+    total_itens = Column(Integer, nullable=False, default=0)
+    # NOT NULL: chave do cursor do histórico (migrations/pedidos_criacao_obrigatoria.sql)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relacionamentos
     usuario = relationship("Usuario", back_populates="pedidos")
     itens = relationship("ItemPedido", back_populates="pedido", cascade="all, delete-orphan")
-
-    @property
-    def total(self):
-        """Calcula o total do pedido baseado nos itens"""
-        return sum(item.subtotal for item in self.itens)
-
-    @property
-    def total_itens(self):
-        """Retorna o número total de itens no pedido"""
-        return sum(item.quantidade for item in self.itens)
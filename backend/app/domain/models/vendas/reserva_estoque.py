@@ -0,0 +1,24 @@
+# app/domain/models/vendas/reserva_estoque.py
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from backend.app.database import Base
+
+class ReservaEstoque(Base):
+    """Unidades de um livro retiradas do estoque por um pedido até o pagamento (ou devolvidas)"""
+    __tablename__ = "reservas_estoque"
+    __table_args__ = (
+        Index("ix_reservas_estoque_expiracao", "status", "expira_em"),
+        {"schema": "biblioteca"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    pedido_id = Column(Integer, ForeignKey("biblioteca.pedidos.id", ondelete="CASCADE"), nullable=False, index=True)
+    livro_id = Column(Integer, ForeignKey("biblioteca.livros.id"), nullable=False)
+    quantidade = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="ativa")  # ativa, confirmada, liberada
+    expira_em = Column(DateTime, nullable=False)
+    criado_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+    atualizado_em = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ReservaEstoque(pedido_id={self.pedido_id}, livro_id={self.livro_id}, status='{self.status}')>"
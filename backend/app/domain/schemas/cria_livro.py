@@ -2,6 +2,8 @@ from typing import Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
+from backend.app.utils.isbn import canonizar_isbn
+
 
 class LivroCreate(BaseModel):
     titulo: str = Field(..., min_length=1, max_length=500, description="Título do livro")
@@ -10,7 +12,7 @@ class LivroCreate(BaseModel):
     preco: float = Field(..., gt=0, description="Preço do livro")
     estoque: int = Field(..., ge=0, description="Quantidade em estoque")
     capa_url: Optional[str] = Field(None, description="URL da imagem da capa")
-    isbn: Optional[str] = Field(None, min_length=10, max_length=13, description="ISBN do livro")
+    isbn: Optional[str] = Field(None, min_length=10, max_length=17, description="ISBN-10 ou ISBN-13 (gravado como ISBN-13)")
 
     @validator('titulo', 'autor')
     def validate_not_empty(cls, v):
@@ -20,15 +22,8 @@ class LivroCreate(BaseModel):
 
     @validator('isbn')
     def validate_isbn(cls, v):
-        if v:
-            # Remove hífens e espaços do ISBN
-            isbn_clean = v.replace('-', '').replace(' ', '')
-            if len(isbn_clean) not in [10, 13]:
-                raise ValueError('ISBN deve ter 10 ou 13 dígitos')
-            if not isbn_clean.isdigit():
-                raise ValueError('ISBN deve conter apenas números')
-            return isbn_clean
-        return v
+        # Hífens/espaços removidos e ISBN-10 convertido para ISBN-13
+        return canonizar_isbn(v) if v else v
 
     class Config:
         json_schema_extra = {
@@ -83,7 +78,7 @@ class LivroUpdate(BaseModel):
     preco: Optional[float] = Field(None, gt=0)
     estoque: Optional[int] = Field(None, ge=0)
     capa_url: Optional[str] = Field(None)
-    isbn: Optional[str] = Field(None, min_length=10, max_length=13)
+    isbn: Optional[str] = Field(None, min_length=10, max_length=17)
     slug: Optional[str] = None  # Gerado automaticamente
 
     @validator('titulo', 'autor')
@@ -94,14 +89,8 @@ class LivroUpdate(BaseModel):
 
     @validator('isbn')
     def validate_isbn(cls, v):
-        if v:
-            isbn_clean = v.replace('-', '').replace(' ', '')
-            if len(isbn_clean) not in [10, 13]:
-                raise ValueError('ISBN deve ter 10 ou 13 dígitos')
-            if not isbn_clean.isdigit():
-                raise ValueError('ISBN deve conter apenas números')
-            return isbn_clean
-        return v
+        # Hífens/espaços removidos e ISBN-10 convertido para ISBN-13
+        return canonizar_isbn(v) if v else v
 
     class Config:
         json_schema_extra = {
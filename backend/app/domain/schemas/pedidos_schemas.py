@@ -17,6 +17,7 @@ class ItemPedidoOut(BaseModel):
 class PedidoOut(BaseModel):
     id: int
     total: float
+    total_itens: int = 0
     status: str
     itens: List[ItemPedidoOut] = []
 
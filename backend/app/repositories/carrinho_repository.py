@@ -5,8 +5,11 @@ class CarrinhoRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    def buscar_item(self, usuario_id: int, livro_id: int):
+        return self.db.query(ItemCarrinho).filter_by(usuario_id=usuario_id, livro_id=livro_id).first()
+
     def adicionar_item(self, usuario_id: int, livro_id: int, quantidade: int):
-        item = self.db.query(ItemCarrinho).filter_by(usuario_id=usuario_id, livro_id=livro_id).first()
+        item = self.buscar_item(usuario_id, livro_id)
         if item:
             item.quantidade += quantidade
         else:
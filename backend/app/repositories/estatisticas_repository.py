@@ -0,0 +1,218 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as insert_pg
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.Livro.estatisticas import EstatisticasAutor, EstatisticasCatalogo
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.utils.roteamento_replicas import ler_da_replica
+
+logger = logging.getLogger("EstatisticasRepository")
+
+# (autor, estoque, preco) de um livro: o que as estatísticas enxergam
+Situacao = Tuple[str, Optional[int], Optional[Decimal]]
+
+CENTAVOS = Decimal("0.01")
+
+# Autores por comando na reconciliação (abaixo do limite de parâmetros do SQLite)
+LOTE_AUTORES = 500
+
+
+def situacao(livro) -> Situacao:
+    """Campos de um livro (ORM, schema ou dict) que entram nas estatísticas"""
+    if isinstance(livro, dict):
+        return livro.get("autor"), livro.get("estoque"), livro.get("preco")
+    return livro.autor, livro.estoque, livro.preco
+
+
+class EstatisticasRepository:
+    """
+    Estatísticas do catálogo pré-agregadas (biblioteca.estatisticas_*)
+
+    Cada escrita em livros aplica sua variação na mesma transação, com
+    incrementos atômicos (UPDATE ... SET x = x + delta), então a leitura é
+    uma linha; o estoque das vendas chega em lote pelo AcumuladorEstatisticas.
+    reconciliar() recalcula tudo e corrige eventuais desvios; reconciliado_em
+    marca o início da recontagem, e lotes registrados antes dela são descartados.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---------------------- ESCRITA INCREMENTAL ----------------------
+    def registrar(self, antes: Optional[Situacao] = None, depois: Optional[Situacao] = None) -> None:
+        """Variação de um livro: criado (só depois), removido (só antes) ou alterado"""
+        self.registrar_lote([(antes, depois)])
+
+    def registrar_lote(self, mudancas: Iterable[Tuple[Optional[Situacao], Optional[Situacao]]]) -> None:
+        """Aplica a variação de várias escritas com um UPDATE e um upsert; não faz commit"""
+        total = sem_estoque = estoque = 0
+        valor = Decimal(0)
+        autores = Counter()
+        for antes, depois in mudancas:
+            for estado, sinal in ((antes, -1), (depois, 1)):
+                if estado is None:
+                    continue
+                autor, quantidade, preco = estado
+                total += sinal
+                sem_estoque += sinal * (quantidade == 0)
+                estoque += sinal * (quantidade or 0)
+                valor += sinal * Decimal(str(preco or 0)) * (quantidade or 0)
+                autores[autor] += sinal
+
+        autores = {autor: delta for autor, delta in autores.items() if delta}
+        if not (total or sem_estoque or estoque or valor or autores):
+            return
+
+        # A linha do catálogo vem sempre primeiro: o lock dela serializa com reconciliar()
+        self.db.execute(
+            update(EstatisticasCatalogo)
+            .where(EstatisticasCatalogo.id == 1)
+            .values(
+                total_livros=EstatisticasCatalogo.total_livros + total,
+                livros_sem_estoque=EstatisticasCatalogo.livros_sem_estoque + sem_estoque,
+                estoque_total=EstatisticasCatalogo.estoque_total + estoque,
+                valor_inventario=EstatisticasCatalogo.valor_inventario + valor.quantize(CENTAVOS),
+                atualizado_em=datetime.utcnow()
+            )
+        )
+        if autores:
+            comando = self._insert(EstatisticasAutor).values(
+                [{"autor": autor, "quantidade": delta} for autor, delta in sorted(autores.items())]
+            )
+            self.db.execute(comando.on_conflict_do_update(
+                index_elements=[EstatisticasAutor.autor],
+                set_={"quantidade": EstatisticasAutor.quantidade + comando.excluded.quantidade}
+            ))
+            removidos = [autor for autor, delta in autores.items() if delta < 0]
+            if removidos:
+                # Autor sem livros sai da tabela
+                self.db.execute(delete(EstatisticasAutor).where(
+                    EstatisticasAutor.autor.in_(removidos), EstatisticasAutor.quantidade <= 0
+                ))
+
+    def travar_resumo(self) -> Optional[datetime]:
+        """
+        Trava a linha do catálogo (mesma ordem de reconciliar()) até o fim da transação
+
+        Returns:
+            Início da última recontagem: variações registradas antes dela já
+            estão nos totais recalculados
+        """
+        return self.db.execute(
+            select(EstatisticasCatalogo.reconciliado_em)
+            .where(EstatisticasCatalogo.id == 1)
+            .with_for_update()
+        ).scalar()
+
+    def _insert(self, modelo):
+        insert = insert_pg if self.db.get_bind().dialect.name == "postgresql" else insert_sqlite
+        return insert(modelo)
+
+    # ---------------------- LEITURA ----------------------
+    @ler_da_replica
+    def obter_resumo(self) -> EstatisticasCatalogo:
+        """Linha de totais (reconstruída na primeira leitura se ainda não existir)"""
+        resumo = self.db.get(EstatisticasCatalogo, 1)
+        if resumo is None:
+            self.reconciliar()
+            resumo = self.db.get(EstatisticasCatalogo, 1)
+        return resumo
+
+    @ler_da_replica
+    def marca(self) -> str:
+        """Validador das estatísticas: muda a cada lote gravado e a cada reconciliação"""
+        datas = self.db.execute(
+            select(EstatisticasCatalogo.atualizado_em, EstatisticasCatalogo.reconciliado_em)
+            .where(EstatisticasCatalogo.id == 1)
+        ).first()
+        return "-".join(data.isoformat() if data else "0" for data in (datas or (None, None)))
+
+    @ler_da_replica
+    def listar_autores(self, limite: int = 10) -> List[Tuple[str, int]]:
+        """Autores com mais livros: [(autor, quantidade)]"""
+        return self.db.execute(
+            select(EstatisticasAutor.autor, EstatisticasAutor.quantidade)
+            .where(EstatisticasAutor.quantidade > 0)
+            .order_by(EstatisticasAutor.quantidade.desc(), EstatisticasAutor.autor)
+            .limit(limite)
+        ).all()
+
+    # ---------------------- RECONCILIAÇÃO ----------------------
+    def reconciliar(self, reconciliado_antes_de: Optional[datetime] = None) -> dict:
+        """
+        Recalcula as estatísticas a partir de livros e corrige as tabelas
+
+        Trava a linha do catálogo antes de contar: escritas concorrentes
+        esperam e aplicam sua variação sobre os valores recalculados. Com
+        vários processos, só um reconta: com reconciliado_antes_de, a
+        recontagem é ignorada se outro processo a fez depois desse momento
+        (verificado com a linha já travada).
+
+        Returns:
+            Quantidade de valores corrigidos (0 quando nada divergiu) e se a recontagem foi ignorada
+        """
+        self.db.execute(
+            self._insert(EstatisticasCatalogo).values(id=1).on_conflict_do_nothing(index_elements=["id"])
+        )
+        resumo = self.db.execute(
+            select(EstatisticasCatalogo).where(EstatisticasCatalogo.id == 1).with_for_update()
+        ).scalar_one()
+        if reconciliado_antes_de and resumo.reconciliado_em and resumo.reconciliado_em > reconciliado_antes_de:
+            self.db.rollback()
+            return {"corrigidos": 0, "ignorada": True}
+        # Marca d'água: as contagens abaixo já enxergam o que foi confirmado até aqui
+        iniciado_em = datetime.utcnow()
+
+        total, sem_estoque, estoque, valor = self.db.execute(
+            select(
+                func.count(Livro.id),
+                func.count(case((Livro.estoque == 0, 1))),
+                func.coalesce(func.sum(Livro.estoque), 0),
+                func.coalesce(func.sum(Livro.preco * Livro.estoque), 0),
+            )
+        ).one()
+        calculado = {
+            "total_livros": total,
+            "livros_sem_estoque": sem_estoque,
+            "estoque_total": estoque,
+            "valor_inventario": Decimal(str(valor)).quantize(CENTAVOS),
+        }
+
+        corrigidos = 0
+        for campo, valor_correto in calculado.items():
+            atual = getattr(resumo, campo)
+            if atual is None or Decimal(str(atual)) != Decimal(str(valor_correto)):
+                corrigidos += 1
+                setattr(resumo, campo, valor_correto)
+        resumo.reconciliado_em = iniciado_em
+
+        por_autor = dict(self.db.execute(select(Livro.autor, func.count(Livro.id)).group_by(Livro.autor)).all())
+        gravados = dict(self.db.execute(select(EstatisticasAutor.autor, EstatisticasAutor.quantidade)).all())
+        sobrando = [autor for autor in gravados if autor not in por_autor]
+        divergentes = [
+            {"autor": autor, "quantidade": quantidade}
+            for autor, quantidade in por_autor.items() if gravados.get(autor) != quantidade
+        ]
+        for inicio in range(0, len(sobrando), LOTE_AUTORES):
+            self.db.execute(
+                delete(EstatisticasAutor).where(EstatisticasAutor.autor.in_(sobrando[inicio:inicio + LOTE_AUTORES]))
+            )
+        for inicio in range(0, len(divergentes), LOTE_AUTORES):
+            comando = self._insert(EstatisticasAutor).values(divergentes[inicio:inicio + LOTE_AUTORES])
+            self.db.execute(comando.on_conflict_do_update(
+                index_elements=[EstatisticasAutor.autor],
+                set_={"quantidade": comando.excluded.quantidade}
+            ))
+        corrigidos += len(sobrando) + len(divergentes)
+
+        self.db.commit()
+        if corrigidos:
+            logger.info(f"Estatísticas do catálogo reconciliadas: {corrigidos} valores corrigidos")
+        return {"corrigidos": corrigidos, "ignorada": False}
@@ -0,0 +1,185 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.models.enums import StatusPedido
+from backend.app.domain.models.vendas.pedidos import Pedido
+from backend.app.domain.models.vendas.reserva_estoque import ReservaEstoque
+from backend.app.utils.indice_catalogo import CAMPOS_LIVRO, LivroCompacto
+
+# Situações de uma reserva
+ATIVA = "ativa"              # estoque baixado, pedido aguardando pagamento (expira)
+CONFIRMADA = "confirmada"    # pedido pago: não expira, volta ao estoque só no cancelamento
+LIBERADA = "liberada"        # unidades devolvidas ao estoque
+
+# Pedidos que ainda podem ser cancelados pelo cliente
+CANCELAVEIS = (StatusPedido.PENDENTE, StatusPedido.CONFIRMADO, StatusPedido.ENVIADO)
+
+_COLUNAS_LIVRO = [getattr(Livro, campo) for campo in CAMPOS_LIVRO]
+
+# Livro já com o estoque novo e a variação aplicada (negativa na baixa)
+AlteracaoEstoque = Tuple[LivroCompacto, int]
+
+
+class EstoqueInsuficiente(Exception):
+    """Um livro do pedido não tem unidades suficientes; a transação deve ser desfeita"""
+
+    def __init__(self, livro_id: int, solicitado: int):
+        self.livro_id = livro_id
+        self.solicitado = solicitado
+        super().__init__(f"Estoque insuficiente para o livro {livro_id} ({solicitado} unidade(s) solicitada(s))")
+
+
+class EstoqueRepository:
+    """
+    Baixa e devolução de estoque por reserva (biblioteca.reservas_estoque)
+
+    A baixa é um UPDATE condicional por livro (estoque >= n), então dois
+    checkouts nunca vendem a mesma unidade. Os livros de um pedido são
+    travados em ordem crescente de id (sem deadlock entre pedidos com livros
+    em comum) e nenhuma linha global entra na transação: checkouts de livros
+    diferentes não se esperam. Nenhum método faz commit; as alterações
+    retornadas vão para estoque_service.notificar_estoque depois dele
+    (índice por livro e estatísticas fora da transação).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---------------------- BAIXA ----------------------
+    def reservar(self, pedido_id: int, itens: Iterable[Tuple[int, int]], expira_em: datetime) -> List[AlteracaoEstoque]:
+        """
+        Baixa o estoque dos itens (livro_id, quantidade) e registra as reservas
+
+        Raises:
+            EstoqueInsuficiente: algum livro não tem unidades suficientes
+        """
+        quantidades = Counter()
+        for livro_id, quantidade in itens:
+            quantidades[livro_id] += quantidade
+
+        alterados = []
+        for livro_id in sorted(quantidades):
+            livro = self._ajustar_estoque(livro_id, -quantidades[livro_id])
+            if livro is None:
+                raise EstoqueInsuficiente(livro_id, quantidades[livro_id])
+            alterados.append((livro, -quantidades[livro_id]))
+
+        agora = datetime.utcnow()
+        self.db.execute(insert(ReservaEstoque), [
+            {
+                "pedido_id": pedido_id,
+                "livro_id": livro_id,
+                "quantidade": quantidade,
+                "status": ATIVA,
+                "expira_em": expira_em,
+                "criado_em": agora,
+                "atualizado_em": agora,
+            }
+            for livro_id, quantidade in sorted(quantidades.items())
+        ])
+        return alterados
+
+    # ---------------------- DEVOLUÇÃO ----------------------
+    def liberar(self, pedido_id: int) -> List[AlteracaoEstoque]:
+        """Devolve ao estoque as reservas ainda não liberadas do pedido (idempotente)"""
+        linhas = self.db.execute(
+            update(ReservaEstoque)
+            .where(ReservaEstoque.pedido_id == pedido_id, ReservaEstoque.status.in_((ATIVA, CONFIRMADA)))
+            .values(status=LIBERADA, atualizado_em=datetime.utcnow())
+            .returning(ReservaEstoque.livro_id, ReservaEstoque.quantidade)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        quantidades = Counter()
+        for livro_id, quantidade in linhas:
+            quantidades[livro_id] += quantidade
+
+        alterados = []
+        for livro_id in sorted(quantidades):
+            livro = self._ajustar_estoque(livro_id, quantidades[livro_id])
+            if livro is not None:
+                alterados.append((livro, quantidades[livro_id]))
+        return alterados
+
+    def cancelar_pedido(self, pedido_id: int, somente_pendente: bool = False) -> Optional[List[AlteracaoEstoque]]:
+        """
+        Cancela o pedido e devolve o estoque reservado
+
+        A troca de status é condicional, então cancelamentos simultâneos (ou
+        cancelamento e expiração) devolvem o estoque uma única vez.
+
+        Args:
+            somente_pendente: Só cancela pedido ainda não pago (expiração)
+
+        Returns:
+            Alterações do estoque devolvido, ou None se o pedido não estava em um
+            status cancelável
+        """
+        permitidos = (StatusPedido.PENDENTE,) if somente_pendente else CANCELAVEIS
+        cancelado = self.db.execute(
+            update(Pedido)
+            .where(Pedido.id == pedido_id, Pedido.status.in_(permitidos))
+            .values(status=StatusPedido.CANCELADO, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not cancelado:
+            return None
+        return self.liberar(pedido_id)
+
+    # ---------------------- PAGAMENTO ----------------------
+    def confirmar_pedido(self, pedido_id: int) -> bool:
+        """
+        Pedido pendente passa a confirmado e suas reservas deixam de expirar
+
+        Returns:
+            False se o pedido não estava pendente (ex.: a reserva expirou e ele
+            foi cancelado enquanto o pagamento era processado)
+        """
+        confirmado = self.db.execute(
+            update(Pedido)
+            .where(Pedido.id == pedido_id, Pedido.status == StatusPedido.PENDENTE)
+            .values(status=StatusPedido.CONFIRMADO, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if confirmado:
+            self.confirmar_reservas(pedido_id)
+        return bool(confirmado)
+
+    def confirmar_reservas(self, pedido_id: int) -> None:
+        self.db.execute(
+            update(ReservaEstoque)
+            .where(ReservaEstoque.pedido_id == pedido_id, ReservaEstoque.status == ATIVA)
+            .values(status=CONFIRMADA, atualizado_em=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    # ---------------------- EXPIRAÇÃO ----------------------
+    def pedidos_com_reserva_expirada(self, agora: datetime, limite: int = 100) -> List[int]:
+        """Pedidos com reservas ativas vencidas (checkouts abandonados)"""
+        return list(self.db.scalars(
+            select(ReservaEstoque.pedido_id)
+            .where(ReservaEstoque.status == ATIVA, ReservaEstoque.expira_em <= agora)
+            .group_by(ReservaEstoque.pedido_id)
+            .order_by(ReservaEstoque.pedido_id)
+            .limit(limite)
+        ))
+
+    # ---------------------- AUXILIARES ----------------------
+    def _ajustar_estoque(self, livro_id: int, delta: int) -> Optional[LivroCompacto]:
+        """Soma delta ao estoque (baixa só se houver unidades) e retorna o livro já alterado"""
+        comando = (
+            update(Livro)
+            .where(Livro.id == livro_id)
+            .values(estoque=Livro.estoque + delta, data_atualizacao=datetime.utcnow())
+            .returning(*_COLUNAS_LIVRO)
+            .execution_options(synchronize_session=False)
+        )
+        if delta < 0:
+            comando = comando.where(Livro.estoque >= -delta)
+        linha = self.db.execute(comando).first()
+        return LivroCompacto(*linha) if linha is not None else None
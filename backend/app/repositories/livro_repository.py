@@ -1,7 +1,60 @@
+from sqlalchemy import case, func, literal, literal_column, select, table, column, or_, tuple_, union_all
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
+import re
 from backend.app.domain.models.Livro.livro import Livro
 from backend.app.domain.schemas.cria_livro import LivroCreate, LivroUpdate
-from backend.app.utils.atualizar_capas_pg import buscar_url_capa
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository, situacao
+from backend.app.service import enriquecimento_service
+from backend.app.utils import busca_textual, eventos_catalogo
+from backend.app.utils.indice_trigramas import indice_fuzzy
+from backend.app.utils.indice_catalogo import incrementar_versao_catalogo, indice_catalogo
+from backend.app.utils.isbn import isbn13_para_10
+from backend.app.utils.paginacao import filtrar_apos_cursor
+from backend.app.utils.roteamento_replicas import leitura_replica, ler_da_replica
+
+# Tabela virtual FTS5 usada como fallback da busca textual no SQLite
+livros_fts = table("livros_fts", column("rowid"), column("livros_fts"), schema="biblioteca")
+
+# Máximo de candidatos avaliados pelo índice de n-gramas em memória
+LIMITE_CANDIDATOS_FUZZY = 5000
+
+# Bases de slug por consulta em alocar_slugs; "base-N" separa base e sufixo
+LOTE_BASES_SLUG = 200
+SUFIXO_SLUG = re.compile(r"^(.+)-(\d+)$")
+
+# Restrições únicas de livros no PostgreSQL (migrações e create_all) -> coluna
+RESTRICOES_UNICAS = {
+    "ux_livros_isbn": "isbn",
+    "idx_livros_slug_unico": "slug",
+    "livros_slug_key": "slug",
+}
+
+# Faixas de preço das facetas: (rótulo, limite superior exclusivo)
+FAIXAS_PRECO = (("0-20", 20), ("20-50", 50), ("50-100", 100))
+
+
+def restricao_violada(erro) -> Optional[str]:
+    """
+    Coluna única de livros violada por um IntegrityError ("isbn", "slug" ou None)
+
+    No PostgreSQL decide pelo nome da restrição (psycopg2 expõe em diag);
+    no SQLite, que não informa o nome, pela coluna citada na mensagem
+    ("UNIQUE constraint failed: livros.isbn").
+    """
+    diag = getattr(erro.orig, "diag", None)
+    nome = getattr(diag, "constraint_name", None)
+    if nome:
+        return RESTRICOES_UNICAS.get(nome)
+    mensagem = str(erro.orig)
+    if not mensagem.startswith("UNIQUE constraint failed:"):
+        return None
+    colunas = {parte.strip() for parte in mensagem.split(":", 1)[1].split(",")}
+    for coluna in ("isbn", "slug"):
+        if f"livros.{coluna}" in colunas:
+            return coluna
+    return None
 
 
 class LivroRepository:
@@ -23,16 +76,21 @@ class LivroRepository:
         if slug:
             livro_dict['slug'] = slug
 
-
-        if not livro_dict.get('capa_url'):
-            url_capa = buscar_url_capa(livro_dict['titulo'], livro_dict['autor'])
-            if url_capa:
-                livro_dict['capa_url'] = url_capa
+        agora = datetime.utcnow()
+        livro_dict.setdefault('data_criacao', agora)
+        livro_dict['data_atualizacao'] = agora
 
         livro = Livro(**livro_dict)
         self.db.add(livro)
+        if not livro.capa_url:
+            # Capa buscada em segundo plano; a tarefa é gravada com o livro
+            self.db.flush()
+            enriquecimento_service.enfileirar(self.db, livro.id)
+        EstatisticasRepository(self.db).registrar(depois=situacao(livro))
+        incrementar_versao_catalogo(self.db)
         self.db.commit()
         self.db.refresh(livro)
+        eventos_catalogo.notificar_alteracao(livro)
         return livro
 
     def atualizar(self, livro_id: int, dados: LivroUpdate):
@@ -44,13 +102,18 @@ class LivroRepository:
             except AttributeError:
                 dados_dict = dados.dict(exclude_unset=True)
 
+            antes = situacao(livro)
             # Só atualiza campos que não são None/vazios
             for key, value in dados_dict.items():
                 if value is not None:
                     setattr(livro, key, value)
+            livro.data_atualizacao = datetime.utcnow()
 
+            EstatisticasRepository(self.db).registrar(antes, situacao(livro))
+            incrementar_versao_catalogo(self.db)
             self.db.commit()
             self.db.refresh(livro)
+            eventos_catalogo.notificar_alteracao(livro)
 
         return livro
 
@@ -59,13 +122,87 @@ class LivroRepository:
         livro = self.buscar_por_id(livro_id)
         if livro:
             self.db.delete(livro)
+            EstatisticasRepository(self.db).registrar(antes=situacao(livro))
+            incrementar_versao_catalogo(self.db)
             self.db.commit()
+            eventos_catalogo.notificar_remocao(livro_id)
             return livro
         return None
 
     def buscar_por_slug(self, slug: str):
         return self.db.query(Livro).filter(Livro.slug == slug).first()
 
+    def buscar_por_isbn(self, isbn: str):
+        """Busca pelo ISBN-13 canônico (e pelo ISBN-10 de cadastros anteriores à migração)"""
+        formas = [isbn] + [forma for forma in (isbn13_para_10(isbn),) if forma]
+        return self.db.query(Livro).filter(Livro.isbn.in_(formas)).order_by(Livro.id).first()
+
+    def isbns_cadastrados(self, isbns: List[str]) -> set:
+        """ISBNs canônicos da lista que já pertencem a algum livro (uma consulta, inclui ISBN-10 antigos)"""
+        formas = {}
+        for isbn in isbns:
+            formas[isbn] = isbn
+            isbn10 = isbn13_para_10(isbn)
+            if isbn10:
+                formas[isbn10] = isbn
+        if not formas:
+            return set()
+        return {formas[isbn] for isbn in self.db.scalars(select(Livro.isbn).where(Livro.isbn.in_(list(formas))))}
+
+    def alocar_slugs(self, bases: List[str], excluir_id: int = None) -> List[str]:
+        """
+        Aloca slugs livres para uma lista de bases
+
+        Lê os slugs existentes de cada família ("base" e "base-N") pelo índice
+        único (LIKE com prefixo), em uma consulta a cada LOTE_BASES_SLUG bases,
+        e continua a partir do maior sufixo. Bases repetidas na lista recebem
+        sufixos consecutivos.
+
+        Args:
+            bases: Slugs gerados por LivroService.gerar_slug
+            excluir_id: Livro sendo atualizado (o próprio slug não conta como colisão)
+        """
+        distintas = sorted(set(bases))
+        ocupada = {base: False for base in distintas}
+        maior_sufixo = {base: 0 for base in distintas}
+
+        if self.db.get_bind().dialect.name == "sqlite":
+            # LIKE no SQLite não usa índice; a faixa [base-, base.) equivale ao prefixo
+            familia = lambda base: Livro.slug.between(f"{base}-", f"{base}.")
+        else:
+            familia = lambda base: Livro.slug.like(f"{base}-%")
+
+        for inicio in range(0, len(distintas), LOTE_BASES_SLUG):
+            lote = distintas[inicio:inicio + LOTE_BASES_SLUG]
+            query = self.db.query(Livro.slug).filter(
+                or_(Livro.slug.in_(lote), *[familia(base) for base in lote])
+            )
+            if excluir_id is not None:
+                query = query.filter(Livro.id != excluir_id)
+
+            for (slug,) in query:
+                if slug in ocupada:
+                    ocupada[slug] = True
+                sufixo = SUFIXO_SLUG.match(slug)
+                if sufixo and sufixo.group(1) in maior_sufixo:
+                    base = sufixo.group(1)
+                    maior_sufixo[base] = max(maior_sufixo[base], int(sufixo.group(2)))
+
+        alocados = []
+        for base in bases:
+            if not ocupada[base]:
+                ocupada[base] = True
+                alocados.append(base)
+            else:
+                maior_sufixo[base] += 1
+                alocados.append(f"{base}-{maior_sufixo[base]}")
+        return alocados
+
+    def proximo_slug_livre(self, base: str, excluir_id: int = None) -> str:
+        """Slug livre para uma base ("dom-casmurro", "dom-casmurro-2", ...)"""
+        return self.alocar_slugs([base], excluir_id=excluir_id)[0]
+
+    @ler_da_replica
     def buscar_com_filtros(self,
                            autor: str = None,
                            titulo: str = None,
@@ -75,10 +212,40 @@ class LivroRepository:
                            estoque_min: int = None,
                            estoque_max: int = None,
                            skip: int = 0,
-                           limite: int = 100):
-        """Método específico para buscas com filtros"""
-        query = self.db.query(Livro)
+                           limite: int = 100,
+                           fuzzy: bool = False,
+                           apos_id: int = None):
+        """Método específico para buscas com filtros (apos_id = paginação por cursor)"""
+        query = self._aplicar_filtros(
+            self.db.query(Livro),
+            autor=None if fuzzy else autor,
+            titulo=None if fuzzy else titulo,
+            ano=ano,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            estoque_max=estoque_max
+        )
+
+        if fuzzy and (autor or titulo):
+            criterios = [(c, v) for c, v in (("autor", autor), ("titulo", titulo)) if v]
+            return self._buscar_fuzzy(query, criterios, todos=True, skip=skip, limite=limite)
+
+        query = filtrar_apos_cursor(query, {"id": apos_id} if apos_id else None, Livro.id)
+        if apos_id:
+            return query.limit(limite).all()
+        return query.offset(skip).limit(limite).all()
 
+    @staticmethod
+    def _aplicar_filtros(query,
+                         autor: str = None,
+                         titulo: str = None,
+                         ano: int = None,
+                         preco_min: float = None,
+                         preco_max: float = None,
+                         estoque_min: int = None,
+                         estoque_max: int = None):
+        """Aplica os filtros simples (ILIKE e faixas) a uma query sobre Livro"""
         if autor:
             query = query.filter(Livro.autor.ilike(f"%{autor}%"))
         if titulo:
@@ -93,8 +260,224 @@ class LivroRepository:
             query = query.filter(Livro.estoque >= estoque_min)
         if estoque_max is not None:
             query = query.filter(Livro.estoque <= estoque_max)
+        return query
 
-        return query.offset(skip).limit(limite).all()
+    @ler_da_replica
+    def buscar_por_similaridade(self, termo: str, skip: int = 0, limite: int = 100):
+        """Busca tolerante a erros de digitação no título ou no autor"""
+        criterios = [("titulo", termo), ("autor", termo)]
+        return self._buscar_fuzzy(self.db.query(Livro), criterios, todos=False, skip=skip, limite=limite)
+
+    def _buscar_fuzzy(self, query, criterios, todos: bool, skip: int, limite: int):
+        """
+        Filtra e ordena por similaridade de trigramas
+
+        Args:
+            query: Query de Livro já com os demais filtros aplicados
+            criterios: Lista de (campo, texto digitado)
+            todos: True exige todos os critérios (AND); False, qualquer um (OR)
+        """
+        if busca_textual.trigramas_disponivel(self.db.get_bind()):
+            # pg_trgm: operador <% usa os índices GIN de migrations/busca_fuzzy_livros.sql
+            condicoes = []
+            pontuacao = None
+            for campo, valor in criterios:
+                alvo = func.biblioteca.f_unaccent(func.lower(getattr(Livro, campo)))
+                consulta = func.biblioteca.f_unaccent(func.lower(valor))
+                condicoes.append(consulta.op("<%")(alvo))
+                similaridade = func.word_similarity(consulta, alvo)
+                pontuacao = similaridade if pontuacao is None else func.greatest(pontuacao, similaridade)
+
+            query = query.filter(*condicoes) if todos else query.filter(or_(*condicoes))
+            return query.order_by(pontuacao.desc(), Livro.id).offset(skip).limit(limite).all()
+
+        # Fallback: índice de n-gramas em memória
+        self._garantir_indice_fuzzy()
+        pontuacoes = None
+        for campo, valor in criterios:
+            resultado = dict(indice_fuzzy.buscar(valor, campo=campo))
+            if pontuacoes is None:
+                pontuacoes = resultado
+            elif todos:
+                pontuacoes = {i: max(p, resultado[i]) for i, p in pontuacoes.items() if i in resultado}
+            else:
+                for i, p in resultado.items():
+                    pontuacoes[i] = max(p, pontuacoes.get(i, 0.0))
+
+        if not pontuacoes:
+            return []
+
+        candidatos = sorted(pontuacoes, key=lambda i: (-pontuacoes[i], i))[:LIMITE_CANDIDATOS_FUZZY]
+        livros = query.filter(Livro.id.in_(candidatos)).all()
+        livros.sort(key=lambda l: (-pontuacoes[l.id], l.id))
+        return livros[skip:skip + limite]
+
+    def _garantir_indice_fuzzy(self):
+        # Índice de longa duração: carregado do primário, nunca de uma réplica atrasada
+        with leitura_replica(self.db, ativa=False):
+            if indice_catalogo.pronto(self.db):
+                # Reconstrói quando o catálogo em memória mudou títulos/autores (escrita de outro worker)
+                if not indice_fuzzy.carregado or indice_fuzzy.geracao != indice_catalogo.geracao:
+                    indice_fuzzy.carregar(
+                        ((l.id, l.titulo, l.autor) for l in indice_catalogo.todos()),
+                        indice_catalogo.geracao
+                    )
+            elif not indice_fuzzy.carregado:
+                indice_fuzzy.carregar(
+                    self.db.query(Livro.id, Livro.titulo, Livro.autor).yield_per(1000)
+                )
+
+    @ler_da_replica
+    def buscar_por_texto(self, termo: str, skip: int = 0, limite: int = 100):
+        """Busca textual ranqueada por título/autor (tsvector no PostgreSQL, FTS5 no SQLite)"""
+        if not busca_textual.extrair_termos(termo):
+            return []
+
+        query, ordem = self._filtrar_por_texto(self.db.query(Livro), termo)
+        return query.order_by(*ordem).offset(skip).limit(limite).all()
+
+    def _filtrar_por_texto(self, query, termo: str):
+        """
+        Aplica o filtro de busca textual a uma query sobre Livro
+
+        Returns:
+            (query filtrada, expressões de ORDER BY por relevância)
+        """
+        termos = busca_textual.extrair_termos(termo)
+
+        if not busca_textual.busca_textual_disponivel(self.db.get_bind()):
+            # Estrutura de busca ausente: mantém o comportamento antigo
+            query = query.filter(
+                (Livro.titulo.ilike(f"%{termo}%")) |
+                (Livro.autor.ilike(f"%{termo}%"))
+            )
+            return query, [Livro.id]
+
+        if self.db.get_bind().dialect.name == "sqlite":
+            query = (
+                query.join(livros_fts, livros_fts.c.rowid == Livro.id)
+                .filter(livros_fts.c.livros_fts.match(busca_textual.montar_consulta_sqlite(termos)))
+            )
+            return query, [func.bm25(literal_column("livros_fts"), 10.0, 5.0), Livro.id]
+
+        vetor = literal_column("biblioteca.livros.busca_vetor")
+        consulta = func.to_tsquery(
+            literal_column("'portuguese'"),
+            func.biblioteca.f_unaccent(busca_textual.montar_consulta_postgres(termos))
+        )
+        query = query.filter(vetor.op("@@")(consulta))
+        return query, [func.ts_rank_cd(vetor, consulta).desc(), Livro.id]
+
+    @ler_da_replica
+    def contar_facetas(self,
+                       termo: str = None,
+                       autor: str = None,
+                       titulo: str = None,
+                       ano: int = None,
+                       preco_min: float = None,
+                       preco_max: float = None,
+                       estoque_min: int = None,
+                       estoque_max: int = None,
+                       limite_autores: int = 20):
+        """
+        Total e contagens por autor, década, faixa de preço e estoque
+
+        Tudo em uma única consulta agrupada: GROUPING SETS no PostgreSQL e
+        UNION ALL de agrupamentos sobre uma CTE nos demais bancos.
+        """
+        faixa_preco = case(
+            (Livro.preco.is_(None), "sem_preco"),
+            *[(Livro.preco < limite, rotulo) for rotulo, limite in FAIXAS_PRECO],
+            else_="100+"
+        )
+        query = self.db.query(
+            Livro.autor.label("autor"),
+            ((Livro.ano // 10) * 10).label("decada"),
+            faixa_preco.label("faixa_preco"),
+            case((Livro.estoque > 0, "em_estoque"), else_="sem_estoque").label("estoque")
+        ).select_from(Livro)
+        query = self._aplicar_filtros(
+            query,
+            autor=autor,
+            titulo=titulo,
+            ano=ano,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            estoque_max=estoque_max
+        )
+        if termo:
+            query, _ = self._filtrar_por_texto(query, termo)
+
+        dimensoes = ("autor", "decada", "faixa_preco", "estoque")
+        facetas = {dimensao: {} for dimensao in dimensoes}
+        total = 0
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            base = query.subquery("base")
+            colunas = [base.c[d] for d in dimensoes]
+            stmt = (
+                select(*[func.grouping(c) for c in colunas], *colunas, func.count())
+                .group_by(func.grouping_sets(*[tuple_(c) for c in colunas], tuple_()))
+            )
+            for linha in self.db.execute(stmt):
+                agrupados, valores, quantidade = linha[:4], linha[4:8], linha[8]
+                if all(agrupados):
+                    total = quantidade
+                    continue
+                posicao = agrupados.index(0)
+                facetas[dimensoes[posicao]][valores[posicao]] = quantidade
+        else:
+            cte = query.cte("base")
+            partes = [
+                select(literal(d).label("dimensao"), cte.c[d].label("valor"), func.count())
+                .group_by(cte.c[d])
+                for d in dimensoes
+            ]
+            partes.append(select(literal("total"), literal(None), func.count()).select_from(cte))
+            for dimensao, valor, quantidade in self.db.execute(union_all(*partes)):
+                if dimensao == "total":
+                    total = quantidade
+                else:
+                    facetas[dimensao][valor] = quantidade
+
+        def ordenar(contagens, por_quantidade=False):
+            itens = [{"valor": v, "quantidade": q} for v, q in contagens.items() if v is not None]
+            if por_quantidade:
+                itens.sort(key=lambda i: (-i["quantidade"], i["valor"]))
+            else:
+                itens.sort(key=lambda i: i["valor"])
+            return itens
+
+        return {
+            "total": total,
+            "autores": ordenar(facetas["autor"], por_quantidade=True)[:limite_autores],
+            "decadas": ordenar(facetas["decada"]),
+            "faixas_preco": [
+                {"valor": rotulo, "quantidade": facetas["faixa_preco"].get(rotulo, 0)}
+                for rotulo in [r for r, _ in FAIXAS_PRECO] + ["100+", "sem_preco"]
+            ],
+            "estoque": {
+                "em_estoque": facetas["estoque"].get("em_estoque", 0),
+                "sem_estoque": facetas["estoque"].get("sem_estoque", 0),
+            },
+        }
+
+    def iterar_tuplas(self, campos, tamanho_lote: int = 1000):
+        """
+        Percorre o catálogo inteiro como tuplas, em ordem de id
+
+        Usa cursor no servidor (stream_results), então a memória não cresce
+        com o tamanho do catálogo.
+        """
+        colunas = [getattr(Livro, campo) for campo in campos]
+        stmt = (
+            select(*colunas)
+            .order_by(Livro.id)
+            .execution_options(stream_results=True, yield_per=tamanho_lote)
+        )
+        for linha in self.db.execute(stmt):
+            yield tuple(linha)
 
     def contar_total(self):
         """Conta o total de livros"""
@@ -0,0 +1,71 @@
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.domain.models.Livro.catalogo_versao import CatalogoVersao
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.repositories.livro_repository import LivroRepository
+from backend.app.utils.isbn import isbn13_para_10
+from backend.app.utils.paginacao import filtrar_apos_cursor
+
+
+class LivroRepositoryAsync:
+    """
+    Leituras de LivroRepository sobre AsyncSession (DATABASE_ASYNC=true)
+
+    As consultas são as mesmas da versão síncrona; escritas continuam em
+    LivroRepository, que mantém estatísticas, fila de enriquecimento e
+    versão do catálogo na mesma transação.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def buscar_por_id(self, livro_id: int):
+        return await self.db.get(Livro, livro_id)
+
+    async def buscar_por_slug(self, slug: str):
+        return await self.db.scalar(select(Livro).where(Livro.slug == slug))
+
+    async def buscar_por_isbn(self, isbn: str):
+        """Busca pelo ISBN-13 canônico (e pelo ISBN-10 de cadastros anteriores à migração)"""
+        formas = [isbn] + [forma for forma in (isbn13_para_10(isbn),) if forma]
+        return await self.db.scalar(select(Livro).where(Livro.isbn.in_(formas)).order_by(Livro.id).limit(1))
+
+    async def listar_com_filtros(self,
+                                 autor: str = None,
+                                 titulo: str = None,
+                                 ano: int = None,
+                                 preco_min: float = None,
+                                 preco_max: float = None,
+                                 estoque_min: int = None,
+                                 estoque_max: int = None,
+                                 skip: int = 0,
+                                 limite: int = 100,
+                                 apos_id: int = None) -> List[Livro]:
+        """Filtros simples ordenados por id (apos_id = paginação por cursor)"""
+        query = LivroRepository._aplicar_filtros(
+            select(Livro),
+            autor=autor,
+            titulo=titulo,
+            ano=ano,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            estoque_max=estoque_max
+        )
+        query = filtrar_apos_cursor(query, {"id": apos_id} if apos_id else None, Livro.id)
+        if not apos_id:
+            query = query.offset(skip)
+        return list(await self.db.scalars(query.limit(limite)))
+
+    async def versao_catalogo(self) -> int:
+        """Versão global do catálogo (0 enquanto a linha única não existir)"""
+        versao = await self.db.scalar(select(CatalogoVersao.versao).where(CatalogoVersao.id == 1))
+        return versao or 0
+
+    async def marca_catalogo(self) -> str:
+        """Versão global e última data_atualizacao, como obter_marca_catalogo (validadores HTTP)"""
+        atualizado = await self.db.scalar(select(func.max(Livro.data_atualizacao)))
+        return f"{await self.versao_catalogo()}-{atualizado.isoformat() if atualizado else 0}"
@@ -1,7 +1,22 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from backend.app.domain.models.vendas.pedidos import Pedido
 from backend.app.domain.models.vendas.item_carrinho import ItemCarrinho
 from backend.app.domain.models.vendas.item_pedido import ItemPedido
+from backend.app.domain.models.enums import StatusPedido
+from backend.app.utils.paginacao import filtrar_apos_cursor
+from backend.app.utils.roteamento_replicas import ler_da_replica
+
+CENTAVOS = Decimal("0.01")
+
+# Itens e o livro de cada item em duas consultas (IN) para todos os pedidos do resultado:
+# PedidoOut serializa os itens e os templates mostram item.livro.titulo
+CARREGAR_ITENS = selectinload(Pedido.itens).selectinload(ItemPedido.livro)
+
 
 class PedidoRepository:
     def __init__(self, db: Session):
@@ -38,30 +53,95 @@ class PedidoRepository:
         return item
 
     # Pedidos
-    def criar_pedido(self, usuario_id: int, total: float):
-        pedido = Pedido(usuario_id=usuario_id, status="PENDENTE")
+    def listar_carrinho_com_livros(self, usuario_id: int) -> List[ItemCarrinho]:
+        """Itens do carrinho com o livro de cada um, em uma consulta (JOIN), ordenados por livro"""
+        return (
+            self.db.query(ItemCarrinho)
+            .options(joinedload(ItemCarrinho.livro))
+            .filter(ItemCarrinho.usuario_id == usuario_id)
+            .order_by(ItemCarrinho.livro_id)
+            .all()
+        )
+
+    def criar_pedido_do_carrinho(self, usuario_id: int, itens_carrinho: List[ItemCarrinho]) -> Pedido:
+        """
+        Grava o pedido com todos os itens e esvazia o carrinho, sem commit
+
+        Um INSERT do pedido (com total e total_itens), um INSERT em lote dos
+        itens (preço atual de cada livro) e um DELETE das linhas do carrinho
+        que foram lidas: itens adicionados durante o checkout continuam no
+        carrinho.
+        """
+        pedido = Pedido(
+            usuario_id=usuario_id,
+            status="PENDENTE",
+            total=sum(
+                (Decimal(str(item.livro.preco)) * item.quantidade for item in itens_carrinho), Decimal(0)
+            ).quantize(CENTAVOS),
+            total_itens=sum(item.quantidade for item in itens_carrinho),
+        )
         self.db.add(pedido)
-        self.db.commit()
-        self.db.refresh(pedido)
-        return pedido
+        self.db.flush()
 
-    def adicionar_item_pedido(self, pedido_id: int, livro_id: int, quantidade: int, preco_unitario: float):
-        item = ItemPedido(
-            pedido_id=pedido_id,
-            livro_id=livro_id,
-            quantidade=quantidade,
-            preco_unitario=preco_unitario
+        self.db.execute(insert(ItemPedido), [
+            {
+                "pedido_id": pedido.id,
+                "livro_id": item.livro_id,
+                "quantidade": item.quantidade,
+                "preco_unitario": item.livro.preco,
+            }
+            for item in itens_carrinho
+        ])
+        self.db.execute(
+            delete(ItemCarrinho)
+            .where(ItemCarrinho.id.in_([item.id for item in itens_carrinho]))
+            .execution_options(synchronize_session=False)
         )
-        self.db.add(item)
-        self.db.commit()
-        self.db.refresh(item)
-        return item
+        return pedido
+
+    @ler_da_replica
+    def listar_pedidos_usuario(self, usuario_id: int, status: str = None, limite: int = None, cursor: dict = None,
+                               desde: Optional[datetime] = None, ate: Optional[datetime] = None):
+        """
+        Pedidos do usuário, do mais recente para o mais antigo
+
+        Filtro, ordenação (created_at, id) e limite vão para o SQL e usam o
+        índice (usuario_id, created_at, id): o custo depende do tamanho da
+        página, não de quantos pedidos o usuário tem.
 
-    def listar_pedidos_usuario(self, usuario_id: int):
-        return self.db.query(Pedido).filter(Pedido.usuario_id == usuario_id).all()
+        Args:
+            status: Filtra pelo status (sem diferenciar maiúsculas)
+            limite: Máximo de pedidos retornados
+            cursor: Dados do cursor (created_at + id do último pedido da página anterior)
+            desde: Só pedidos criados a partir deste momento (inclusive)
+            ate: Só pedidos criados antes deste momento (exclusive)
+        """
+        query = self.db.query(Pedido).options(CARREGAR_ITENS).filter(Pedido.usuario_id == usuario_id)
+        if status:
+            try:
+                query = query.filter(Pedido.status == StatusPedido(status.upper()))
+            except ValueError:
+                return []
+        if desde is not None:
+            query = query.filter(Pedido.created_at >= desde)
+        if ate is not None:
+            query = query.filter(Pedido.created_at < ate)
+        query = filtrar_apos_cursor(query, cursor, Pedido.id, coluna_ordem=Pedido.created_at, descendente=True)
+        if limite:
+            query = query.limit(limite)
+        return query.all()
+
+    @ler_da_replica
+    def resumo_por_status(self, usuario_id: int):
+        """(status, quantidade, valor) dos pedidos do usuário, agregados no banco"""
+        return self.db.execute(
+            select(Pedido.status, func.count(Pedido.id), func.coalesce(func.sum(Pedido.total), 0))
+            .where(Pedido.usuario_id == usuario_id)
+            .group_by(Pedido.status)
+        ).all()
 
     def obter_pedido(self, pedido_id: int, usuario_id: int):
-        return self.db.query(Pedido).filter(
+        return self.db.query(Pedido).options(CARREGAR_ITENS).filter(
             Pedido.id == pedido_id,
             Pedido.usuario_id == usuario_id
         ).first()
@@ -72,4 +152,48 @@ class PedidoRepository:
             pedido.status = novo_status
             self.db.commit()
             self.db.refresh(pedido)
-        return pedido
\ No newline at end of file
+        return pedido
+
+    # Consistência dos totais gravados
+    def verificar_totais(self, corrigir: bool = False, limite: int = 1000) -> dict:
+        """
+        Compara total/total_itens gravados com a soma dos itens de cada pedido
+
+        Args:
+            corrigir: Regrava os valores divergentes (com commit)
+            limite: Máximo de pedidos divergentes tratados por chamada
+
+        Returns:
+            Quantidade de divergentes encontrados e corrigidos, com os ids
+        """
+        itens = (
+            select(
+                ItemPedido.pedido_id,
+                func.round(func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario), 2).label("total"),
+                func.sum(ItemPedido.quantidade).label("total_itens"),
+            )
+            .group_by(ItemPedido.pedido_id)
+            .subquery()
+        )
+        total = func.coalesce(itens.c.total, 0)
+        total_itens = func.coalesce(itens.c.total_itens, 0)
+        divergentes = self.db.execute(
+            select(Pedido.id, total, total_itens)
+            .outerjoin(itens, itens.c.pedido_id == Pedido.id)
+            .where(or_(Pedido.total != total, Pedido.total_itens != total_itens))
+            .order_by(Pedido.id)
+            .limit(limite)
+        ).all()
+
+        if corrigir and divergentes:
+            self.db.execute(update(Pedido), [
+                {"id": pedido_id, "total": Decimal(str(valor)).quantize(CENTAVOS), "total_itens": quantidade}
+                for pedido_id, valor, quantidade in divergentes
+            ])
+            self.db.commit()
+
+        return {
+            "divergentes": len(divergentes),
+            "corrigidos": len(divergentes) if corrigir else 0,
+            "pedidos": [pedido_id for pedido_id, _, _ in divergentes],
+        }
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
+from backend.app.database import SessionLocal, metricas_pool
 from backend.app.dependencies import get_db
 from backend.app.domain.schemas.cria_livro import LivroCreate, LivroOut
+from backend.app.repositories.pedido_repository import PedidoRepository
+from backend.app.service.importacao_service import (
+    FORMATOS, TAMANHO_LOTE_PADRAO, ImportacaoLivrosService, detectar_formato
+)
 from backend.app.service.livro_service import LivroService
 from backend.app.utils.auth import require_admin_user
+from backend.app.utils.roteamento_replicas import roteador_replicas
 
 router = APIRouter()
 
@@ -34,3 +42,99 @@ def criar_livro_admin(
     """
     srv = LivroService(db)
     return srv.adicionar_livro(livro)
+
+
+def _buscar_capas_em_segundo_plano():
+    """Etapa posterior à importação: capas dos livros ainda sem capa"""
+    with SessionLocal() as db:
+        LivroService(db).atualizar_capas_existentes()
+
+
+def _enriquecer_por_isbn_em_segundo_plano():
+    with SessionLocal() as db:
+        LivroService(db).enriquecer_por_isbn()
+
+
+# Enriquecimento em lote por ISBN (capa e ano) - somente admin
+@router.post("/livros/enriquecer-isbn", status_code=status.HTTP_202_ACCEPTED, summary="Enriquecer livros por ISBN")
+def enriquecer_livros_por_isbn(
+    background_tasks: BackgroundTasks,
+    usuario = Depends(require_admin_user)
+):
+    """
+    Completa capa e ano dos livros com ISBN, consultando vários ISBNs por requisição.
+    """
+    background_tasks.add_task(_enriquecer_por_isbn_em_segundo_plano)
+    return {"detail": "Enriquecimento por ISBN iniciado"}
+
+
+# Importação em massa (CSV/JSONL) - somente admin
+@router.post("/livros/importar", summary="Importar livros em massa")
+def importar_livros_admin(
+    background_tasks: BackgroundTasks,
+    arquivo: UploadFile = File(..., description="Arquivo .csv ou .jsonl"),
+    formato: Optional[str] = Query(None, description="csv ou jsonl (padrão: pela extensão)"),
+    lote: int = Query(TAMANHO_LOTE_PADRAO, ge=1, le=10000, description="Livros por INSERT/commit"),
+    buscar_capas: bool = Query(True, description="Buscar capas em segundo plano após a importação"),
+    usuario = Depends(require_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa livros de um arquivo enviado, em lotes. Apenas administradores podem acessar.
+    """
+    try:
+        formato = formato or detectar_formato(arquivo.filename)
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    resumo = ImportacaoLivrosService(db).importar(arquivo.file, formato, tamanho_lote=lote)
+
+    if buscar_capas and resumo["inseridos"]:
+        background_tasks.add_task(_buscar_capas_em_segundo_plano)
+    return resumo
+
+
+# Métricas do pool de conexões deste processo - somente admin
+@router.get("/metricas/pool", summary="Métricas do pool de conexões")
+def metricas_pool_conexoes(usuario = Depends(require_admin_user)):
+    """
+    Espera no checkout (histograma), conexões em uso/overflow, custo da validação,
+    idade das conexões e uma recomendação de pool_size/max_overflow para a carga observada.
+    """
+    return metricas_pool.relatorio()
+
+
+# Réplicas de leitura e lag medido - somente admin
+@router.get("/metricas/replicas", summary="Situação das réplicas de leitura")
+def metricas_replicas(usuario = Depends(require_admin_user)):
+    """
+    Lag de cada réplica; réplicas acima de REPLICA_LAG_MAXIMO (ou sem resposta) não recebem leituras.
+    """
+    return {"lag_maximo_s": roteador_replicas.lag_maximo, "replicas": roteador_replicas.situacao()}
+
+
+# Totais gravados dos pedidos x soma dos itens - somente admin
+@router.get("/pedidos/totais", summary="Verificar totais dos pedidos")
+def verificar_totais_pedidos(
+        db: Session = Depends(get_db),
+        usuario = Depends(require_admin_user),
+        limite: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Pedidos cujo total/total_itens gravado diverge da soma dos itens (nada é alterado).
+    """
+    return PedidoRepository(db).verificar_totais(limite=limite)
+
+
+@router.post("/pedidos/totais/corrigir", summary="Corrigir totais dos pedidos")
+def corrigir_totais_pedidos(
+        db: Session = Depends(get_db),
+        usuario = Depends(require_admin_user),
+        limite: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Regrava total/total_itens dos pedidos divergentes a partir dos itens.
+    """
+    return PedidoRepository(db).verificar_totais(corrigir=True, limite=limite)
@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Depends, Request, Form, Query, status, HTTPException, Path
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 import logging
 
+from backend.app.database import SessionLocal
 from backend.app.dependencies import get_db
 from backend.app.domain.schemas.cria_livro import LivroCreate, LivroOut, LivroUpdate
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository
 from backend.app.service.livro_service import LivroService
 from backend.app.utils.template_utils import render_template_with_user, get_current_user_dependency
+from backend.app.utils.paginacao import codificar_cursor, decodificar_cursor, HEADER_PROXIMO_CURSOR
+from backend.app.utils.exportacao import TIPOS_CONTEUDO
+from backend.app.utils.cache_http import assinatura_url, gerar_etag, nao_modificado, responder_com_cache
+from backend.app.utils.capas_locais import ORIGINAL, TAMANHOS, obter_capa_local, url_capa, versao_capa
+from backend.app.utils.indice_catalogo import marca_catalogo_atual
 
 logger = logging.getLogger("LivroRouter")
 router = APIRouter(tags=["Livros"])
@@ -17,6 +24,7 @@ router = APIRouter(tags=["Livros"])
 from fastapi.templating import Jinja2Templates
 
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["url_capa"] = url_capa
 
 
 # ---------------------- PÁGINA HTML ----------------------
@@ -35,6 +43,7 @@ def pagina_livros(request: Request, db: Session = Depends(get_db)):
 # ---------------------- CRUD ----------------------
 @router.get("/listar", response_model=List[LivroOut])
 def listar_livros(
+        request: Request,
         db: Session = Depends(get_db),
         autor: Optional[str] = Query(None, description="Filtrar por autor"),
         titulo: Optional[str] = Query(None, description="Filtrar por título"),
@@ -44,30 +53,86 @@ def listar_livros(
         estoque_min: Optional[int] = Query(None, description="Estoque mínimo"),
         estoque_max: Optional[int] = Query(None, description="Estoque máximo"),
         skip: int = Query(0, ge=0, description="Quantidade de registros para pular"),
-        limite: int = Query(100, ge=1, le=1000, description="Limite de registros")
+        limite: int = Query(100, ge=1, le=1000, description="Limite de registros"),
+        cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Proximo-Cursor)")
 ):
     """Lista livros com filtros opcionais"""
+    apos_id = decodificar_cursor(cursor)["id"] if cursor else None
     try:
         service = LivroService(db)
-        livros = service.listar_livros(
-            autor=autor,
-            titulo=titulo,
-            ano=ano,
-            preco_min=preco_min,
-            preco_max=preco_max,
-            estoque_min=estoque_min,
-            estoque_max=estoque_max,
-            skip=skip,
-            limite=limite
+
+        def proximo_cursor(livros):
+            if len(livros) == limite:
+                return {HEADER_PROXIMO_CURSOR: codificar_cursor(livros[-1].id)}
+            return {}
+
+        return responder_com_cache(
+            request,
+            gerar_etag(marca_catalogo_atual(db), assinatura_url(request)),
+            lambda: service.listar_livros(
+                autor=autor,
+                titulo=titulo,
+                ano=ano,
+                preco_min=preco_min,
+                preco_max=preco_max,
+                estoque_min=estoque_min,
+                estoque_max=estoque_max,
+                skip=skip,
+                limite=limite,
+                apos_id=apos_id
+            ),
+            modelo=List[LivroOut],
+            cabecalhos_extras=proximo_cursor,
+            compartilhado=True
         )
-        return livros
     except Exception as e:
         logger.error(f"Erro ao listar livros: {e}")
         raise HTTPException(status_code=500, detail="Erro interno ao listar livros")
 
 
+@router.get("/autocompletar")
+def autocompletar_livros(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=100, description="Início do título ou autor"),
+        limite: int = Query(10, ge=1, le=50, description="Máximo de sugestões"),
+        tipo: Optional[str] = Query(None, pattern="^(titulo|autor)$", description="Restringir a títulos ou autores"),
+        db: Session = Depends(get_db)
+):
+    """Sugestões de títulos e autores enquanto o usuário digita"""
+    try:
+        service = LivroService(db)
+        return responder_com_cache(
+            request,
+            gerar_etag(marca_catalogo_atual(db), assinatura_url(request)),
+            lambda: {"q": q, "sugestoes": service.autocompletar(q, limite=limite, tipo=tipo)}
+        )
+    except Exception as e:
+        logger.error(f"Erro no autocompletar '{q}': {e}")
+        raise HTTPException(status_code=500, detail="Erro interno no autocompletar")
+
+
+@router.get("/exportar")
+def exportar_catalogo(
+        formato: str = Query("csv", pattern="^(csv|ndjson)$", description="csv ou ndjson")
+):
+    """Exporta o catálogo completo em streaming (memória constante)"""
+
+    def gerar():
+        # Sessão própria: a do get_db é fechada antes do fim do streaming
+        with SessionLocal() as db:
+            yield from LivroService(db).exportar_catalogo(formato)
+
+    nome_arquivo = f"catalogo-{datetime.now():%Y%m%d-%H%M%S}.{formato}"
+    return StreamingResponse(
+        gerar(),
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
+
+
 @router.get("/{livro_id}", response_model=LivroOut)
 def obter_livro(
+        request: Request,
         livro_id: int = Path(..., description="ID do livro", gt=0),
         db: Session = Depends(get_db)
 ):
@@ -75,7 +140,7 @@ def obter_livro(
     try:
         service = LivroService(db)
         livro = service.obter_livro(livro_id)
-        return livro
+        return _responder_livro(request, db, livro)
     except HTTPException:
         # Re-raise HTTPExceptions do service
         raise
@@ -84,8 +149,64 @@ def obter_livro(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+def _responder_livro(request: Request, db: Session, livro):
+    """Resposta de um livro com validadores por data de atualização"""
+    modificado = livro.data_atualizacao or livro.data_criacao
+    if modificado:
+        etag = gerar_etag(livro.id, modificado.isoformat())
+    else:
+        etag = gerar_etag(marca_catalogo_atual(db), request.url.path)
+    return responder_com_cache(request, etag, lambda: livro, modelo=LivroOut, ultima_modificacao=modificado)
+
+
+@router.get("/isbn/{isbn}", response_model=LivroOut)
+def obter_livro_por_isbn(
+        request: Request,
+        isbn: str = Path(..., description="ISBN-10 ou ISBN-13, com ou sem hífens"),
+        db: Session = Depends(get_db)
+):
+    """Obtém um livro pelo ISBN (ex.: leitor de código de barras)"""
+    try:
+        livro = LivroService(db).obter_livro_por_isbn(isbn)
+        return _responder_livro(request, db, livro)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter livro por ISBN {isbn}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/{livro_id}/capa", response_class=FileResponse, response_model=None)
+def obter_capa_livro(
+        request: Request,
+        livro_id: int = Path(..., description="ID do livro", gt=0),
+        tamanho: str = Query("p", pattern=f"^({'|'.join([*TAMANHOS, ORIGINAL])})$",
+                             description="p (128x192), m (256x384) ou original"),
+        v: Optional[str] = Query(None, description="Versão da capa (ver url_capa)"),
+        db: Session = Depends(get_db)
+):
+    """Capa do livro servida localmente (baixada uma vez, com miniaturas)"""
+    livro = LivroService(db).obter_livro(livro_id)
+    arquivo = obter_capa_local(livro.capa_url, tamanho) if livro.capa_url else None
+    if arquivo is None:
+        raise HTTPException(status_code=404, detail="Capa não disponível")
+
+    caminho, tipo = arquivo
+    # Com ?v= da capa atual o endereço muda junto com a capa: resposta imutável
+    if v and v == versao_capa(livro.capa_url):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, max-age=86400"
+    # Arquivos são nomeados pelo hash do conteúdo, então o nome serve de ETag
+    cabecalhos = {"Cache-Control": cache_control, "ETag": gerar_etag(caminho.name)}
+    if nao_modificado(request, cabecalhos["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    return FileResponse(caminho, media_type=tipo, headers=cabecalhos)
+
+
 @router.get("/slug/{slug}", response_model=LivroOut)
 def obter_livro_por_slug(
+        request: Request,
         slug: str = Path(..., description="Slug do livro"),
         db: Session = Depends(get_db)
 ):
@@ -93,7 +214,7 @@ def obter_livro_por_slug(
     try:
         service = LivroService(db)
         livro = service.obter_livro_por_slug(slug)
-        return livro
+        return _responder_livro(request, db, livro)
     except HTTPException:
         raise
     except Exception as e:
@@ -179,6 +300,7 @@ def deletar_livro(
 # ---------------------- BUSCAS ----------------------
 @router.get("/buscar/filtros")
 def buscar_livros_com_filtros(
+        request: Request,
         titulo: Optional[str] = Query(None, min_length=2, description="Buscar por título"),
         autor: Optional[str] = Query(None, min_length=2, description="Buscar por autor"),
         termo: Optional[str] = Query(None, min_length=2, description="Buscar por título ou autor"),
@@ -189,54 +311,105 @@ def buscar_livros_com_filtros(
         estoque_max: Optional[int] = Query(None, ge=0, description="Estoque máximo"),
         skip: int = Query(0, ge=0, description="Registros para pular"),
         limite: int = Query(100, ge=1, le=1000, description="Limite de registros"),
+        fuzzy: bool = Query(False, description="Tolerar erros de digitação em termo, título e autor"),
+        cursor: Optional[str] = Query(None, description="Cursor da próxima página (campo proximo_cursor)"),
+        facetas: bool = Query(False, description="Incluir total real e contagens por autor, década, preço e estoque"),
         db: Session = Depends(get_db)
 ):
     """Busca livros com múltiplos filtros - MELHORADO"""
+    if cursor and (termo or fuzzy):
+        raise HTTPException(
+            status_code=400,
+            detail="Paginação por cursor não disponível para buscas ordenadas por relevância; use skip"
+        )
+    if facetas and fuzzy:
+        raise HTTPException(
+            status_code=400,
+            detail="Facetas não disponíveis para buscas fuzzy"
+        )
+    apos_id = decodificar_cursor(cursor)["id"] if cursor else None
+
     try:
         service = LivroService(db)
-
-        if termo:
-            # Busca geral
-            livros = service.buscar_livros(
-                termo=termo,
-                skip=skip,
-                limite=limite
-            )
-        else:
-            # Busca com filtros específicos
-            livros = service.listar_livros(
-                autor=autor,
-                titulo=titulo,
-                ano=ano,
-                preco_min=preco_min,
-                preco_max=preco_max,
-                estoque_min=estoque_min,
-                estoque_max=estoque_max,
-                skip=skip,
-                limite=limite
-            )
-
-        return {
-            "livros": livros,
-            "total_encontrados": len(livros),
-            "filtros_aplicados": {
-                "termo": termo,
-                "titulo": titulo,
-                "autor": autor,
-                "ano": ano,
-                "preco_min": preco_min,
-                "preco_max": preco_max,
-                "estoque_min": estoque_min,
-                "estoque_max": estoque_max
-            }
-        }
+        return responder_com_cache(
+            request,
+            gerar_etag(marca_catalogo_atual(db), assinatura_url(request)),
+            lambda: _buscar_com_filtros(
+                service, termo, titulo, autor, ano, preco_min, preco_max,
+                estoque_min, estoque_max, skip, limite, fuzzy, apos_id, facetas
+            ),
+            compartilhado=True
+        )
     except Exception as e:
         logger.error(f"Erro na busca: {e}")
         raise HTTPException(status_code=500, detail="Erro interno na busca")
 
 
+def _buscar_com_filtros(service: LivroService, termo, titulo, autor, ano, preco_min, preco_max,
+                        estoque_min, estoque_max, skip, limite, fuzzy, apos_id, facetas) -> dict:
+    """Monta a resposta de /buscar/filtros (chamada apenas quando não há 304/cache)"""
+    if termo:
+        # Busca geral
+        livros = service.buscar_livros(
+            termo=termo,
+            skip=skip,
+            limite=limite,
+            fuzzy=fuzzy
+        )
+    else:
+        # Busca com filtros específicos
+        livros = service.listar_livros(
+            autor=autor,
+            titulo=titulo,
+            ano=ano,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            estoque_max=estoque_max,
+            skip=skip,
+            limite=limite,
+            fuzzy=fuzzy,
+            apos_id=apos_id
+        )
+
+    proximo_cursor = None
+    if not termo and not fuzzy and len(livros) == limite:
+        proximo_cursor = codificar_cursor(livros[-1].id)
+
+    resposta = {
+        "livros": [LivroOut.model_validate(livro) for livro in livros],
+        "total_encontrados": len(livros),
+        "proximo_cursor": proximo_cursor,
+        "filtros_aplicados": {
+            "termo": termo,
+            "titulo": titulo,
+            "autor": autor,
+            "ano": ano,
+            "preco_min": preco_min,
+            "preco_max": preco_max,
+            "estoque_min": estoque_min,
+            "estoque_max": estoque_max,
+            "fuzzy": fuzzy
+        }
+    }
+
+    if facetas:
+        # Com termo, a listagem ignora os demais filtros; as facetas também
+        filtros = {} if termo else dict(
+            autor=autor, titulo=titulo, ano=ano,
+            preco_min=preco_min, preco_max=preco_max,
+            estoque_min=estoque_min, estoque_max=estoque_max
+        )
+        contagens = service.contar_facetas(termo=termo, **filtros)
+        resposta["total"] = contagens["total"]
+        resposta["facetas"] = {k: v for k, v in contagens.items() if k != "total"}
+
+    return resposta
+
+
 @router.get("/buscar/termo")
 def buscar_livros_por_termo(
+        request: Request,
         q: str = Query(..., min_length=2, description="Termo de busca"),
         skip: int = Query(0, ge=0),
         limite: int = Query(50, ge=1, le=1000),
@@ -245,13 +418,20 @@ def buscar_livros_por_termo(
     """Busca simplificada por termo geral"""
     try:
         service = LivroService(db)
-        livros = service.buscar_livros(termo=q, skip=skip, limite=limite)
 
-        return {
-            "termo_buscado": q,
-            "livros_encontrados": len(livros),
-            "livros": livros
-        }
+        def buscar():
+            livros = service.buscar_livros(termo=q, skip=skip, limite=limite)
+            return {
+                "termo_buscado": q,
+                "livros_encontrados": len(livros),
+                "livros": [LivroOut.model_validate(livro) for livro in livros]
+            }
+
+        return responder_com_cache(
+            request,
+            gerar_etag(marca_catalogo_atual(db), assinatura_url(request)),
+            buscar
+        )
     except Exception as e:
         logger.error(f"Erro na busca por termo '{q}': {e}")
         raise HTTPException(status_code=500, detail="Erro interno na busca")
@@ -259,17 +439,41 @@ def buscar_livros_por_termo(
 
 # ---------------------- ESTATÍSTICAS ----------------------
 @router.get("/estatisticas/resumo")
-def obter_estatisticas(db: Session = Depends(get_db)):
+def obter_estatisticas(request: Request, db: Session = Depends(get_db)):
     """Obtém estatísticas dos livros"""
     try:
         service = LivroService(db)
-        stats = service.obter_estatisticas()
-        return stats
+        return responder_com_cache(
+            request,
+            gerar_etag(EstatisticasRepository(db).marca(), request.url.path),
+            service.obter_estatisticas,
+            compartilhado=True
+        )
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas: {e}")
         raise HTTPException(status_code=500, detail="Erro interno ao obter estatísticas")
 
 
+@router.get("/estatisticas/autores")
+def obter_estatisticas_autores(
+        request: Request,
+        limite: int = Query(50, ge=1, le=1000, description="Máximo de autores"),
+        db: Session = Depends(get_db)
+):
+    """Quantidade de livros por autor (maiores primeiro)"""
+    try:
+        service = LivroService(db)
+        return responder_com_cache(
+            request,
+            gerar_etag(EstatisticasRepository(db).marca(), assinatura_url(request)),
+            lambda: service.contar_por_autor(limite),
+            compartilhado=True
+        )
+    except Exception as e:
+        logger.error(f"Erro ao obter estatísticas por autor: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao obter estatísticas")
+
+
 # ---------------------- STATUS ----------------------
 @router.get("/status")
 def status_livros():
@@ -289,7 +493,10 @@ def status_livros():
             "DELETE /livros/{livro_id} - Deletar livro",
             "GET /livros/buscar/filtros - Busca avançada",
             "GET /livros/buscar/termo - Busca por termo",
+            "GET /livros/autocompletar - Sugestões por prefixo",
+            "GET /livros/exportar - Exportar catálogo (CSV/NDJSON)",
             "GET /livros/estatisticas/resumo - Estatísticas",
+            "GET /livros/estatisticas/autores - Livros por autor",
             "GET /livros/status - Status do serviço"
         ]
     }
@@ -299,9 +506,8 @@ def status_livros():
 def status_completo_livros(db: Session = Depends(get_db)):
     """Status completo com informações do banco de dados"""
     try:
-        # Testa a conexão com o banco fazendo uma consulta simples
-        service = LivroService(db)
-        total_livros = service.repo.contar_total()
+        # Testa a conexão com o banco lendo a linha de totais (sem COUNT)
+        total_livros = EstatisticasRepository(db).obter_resumo().total_livros
 
         return {
             "status": "online",
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, Request, Query, HTTPException, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import logging
+
+from backend.app.database import get_async_db
+from backend.app.domain.schemas.cria_livro import LivroOut
+from backend.app.repositories.livro_repository_async import LivroRepositoryAsync
+from backend.app.service.livro_service_async import LivroServiceAsync
+from backend.app.utils.paginacao import codificar_cursor, decodificar_cursor, HEADER_PROXIMO_CURSOR
+from backend.app.utils.cache_http import assinatura_url, gerar_etag, responder_com_cache_async
+
+logger = logging.getLogger("LivroRouterAsync")
+
+# Incluído antes de livro_router quando DATABASE_ASYNC=true: as rotas daqui
+# atendem as leituras da API; o restante continua no router síncrono
+router = APIRouter(tags=["Livros"])
+
+
+@router.get("/listar", response_model=List[LivroOut])
+async def listar_livros(
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        autor: Optional[str] = Query(None, description="Filtrar por autor"),
+        titulo: Optional[str] = Query(None, description="Filtrar por título"),
+        ano: Optional[int] = Query(None, description="Filtrar por ano"),
+        preco_min: Optional[float] = Query(None, description="Preço mínimo"),
+        preco_max: Optional[float] = Query(None, description="Preço máximo"),
+        estoque_min: Optional[int] = Query(None, description="Estoque mínimo"),
+        estoque_max: Optional[int] = Query(None, description="Estoque máximo"),
+        skip: int = Query(0, ge=0, description="Quantidade de registros para pular"),
+        limite: int = Query(100, ge=1, le=1000, description="Limite de registros"),
+        cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Proximo-Cursor)")
+):
+    """Lista livros com filtros opcionais"""
+    apos_id = decodificar_cursor(cursor)["id"] if cursor else None
+    try:
+        service = LivroServiceAsync(db)
+
+        def proximo_cursor(livros):
+            if len(livros) == limite:
+                return {HEADER_PROXIMO_CURSOR: codificar_cursor(livros[-1].id)}
+            return {}
+
+        return await responder_com_cache_async(
+            request,
+            gerar_etag(await LivroRepositoryAsync(db).marca_catalogo(), assinatura_url(request)),
+            lambda: service.listar_livros(
+                autor=autor,
+                titulo=titulo,
+                ano=ano,
+                preco_min=preco_min,
+                preco_max=preco_max,
+                estoque_min=estoque_min,
+                estoque_max=estoque_max,
+                skip=skip,
+                limite=limite,
+                apos_id=apos_id
+            ),
+            modelo=List[LivroOut],
+            cabecalhos_extras=proximo_cursor,
+            compartilhado=True
+        )
+    except Exception as e:
+        logger.error(f"Erro ao listar livros: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao listar livros")
+
+
+# {livro_id:int}: só casa com números, então /autocompletar, /exportar etc. seguem para o router síncrono
+@router.get("/{livro_id:int}", response_model=LivroOut)
+async def obter_livro(
+        request: Request,
+        livro_id: int = Path(..., description="ID do livro", gt=0),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Obtém um livro específico por ID"""
+    try:
+        livro = await LivroServiceAsync(db).obter_livro(livro_id)
+        return await _responder_livro(request, db, livro)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter livro {livro_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/isbn/{isbn}", response_model=LivroOut)
+async def obter_livro_por_isbn(
+        request: Request,
+        isbn: str = Path(..., description="ISBN-10 ou ISBN-13, com ou sem hífens"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Obtém um livro pelo ISBN (ex.: leitor de código de barras)"""
+    try:
+        livro = await LivroServiceAsync(db).obter_livro_por_isbn(isbn)
+        return await _responder_livro(request, db, livro)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter livro por ISBN {isbn}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/slug/{slug}", response_model=LivroOut)
+async def obter_livro_por_slug(
+        request: Request,
+        slug: str = Path(..., description="Slug do livro"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Obtém um livro específico por slug"""
+    try:
+        livro = await LivroServiceAsync(db).obter_livro_por_slug(slug)
+        return await _responder_livro(request, db, livro)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter livro por slug {slug}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+async def _responder_livro(request: Request, db: AsyncSession, livro):
+    """Resposta de um livro com validadores por data de atualização"""
+    modificado = livro.data_atualizacao or livro.data_criacao
+    if modificado:
+        etag = gerar_etag(livro.id, modificado.isoformat())
+    else:
+        etag = gerar_etag(await LivroRepositoryAsync(db).marca_catalogo(), request.url.path)
+
+    async def gerar():
+        return livro
+
+    return await responder_com_cache_async(request, etag, gerar, modelo=LivroOut, ultima_modificacao=modificado)
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import List, Optional
 import logging
 
 from backend.app.dependencies import get_db
 from backend.app.utils.template_utils import get_current_user_dependency, render_template_with_user
 from backend.app.service.pedido_service import PedidoService
+from backend.app.repositories.estoque_repository import EstoqueInsuficiente
 from backend.app.domain.schemas.pedidos_schemas import ItemCarrinhoInput, PedidoOut
+from backend.app.utils.paginacao import codificar_cursor, decodificar_cursor, HEADER_PROXIMO_CURSOR
 
 logger = logging.getLogger("PedidoRouter")
 router = APIRouter(tags=["Pedidos"])
@@ -26,7 +29,7 @@ def pagina_pedidos(
             return RedirectResponse(url="/auth/login", status_code=302)
 
         # Obter db manualmente para este endpoint
-        from app.dependencies import get_db
+        from backend.app.dependencies import get_db
         db = next(get_db())
         try:
             service = PedidoService(db)
@@ -53,10 +56,14 @@ def pagina_pedidos(
 
 @router.get("/listar", response_model=List[PedidoOut])
 def listar_pedidos_usuario(
+        response: Response,
         db: Session = Depends(get_db),
         user_data: Optional[dict] = Depends(get_current_user_dependency),  # ✅ CORREÇÃO
         status_pedido: Optional[str] = Query(None, description="Filtrar por status"),
-        limite: int = Query(50, ge=1, le=200, description="Limite de resultados")
+        limite: int = Query(50, ge=1, le=200, description="Limite de resultados"),
+        cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Proximo-Cursor)"),
+        data_inicio: Optional[datetime] = Query(None, description="Pedidos criados a partir desta data"),
+        data_fim: Optional[datetime] = Query(None, description="Pedidos criados antes desta data")
 ):
     """Listar histórico de pedidos do usuário"""
     try:
@@ -66,13 +73,22 @@ def listar_pedidos_usuario(
                 detail="Usuário não autenticado"
             )
 
+        dados_cursor = decodificar_cursor(cursor, com_chave=True) if cursor else None
+
         service = PedidoService(db)
-        pedidos = service.listar_pedidos_usuario(user_data["id"])  # ✅ CORREÇÃO
+        pedidos = service.listar_pedidos_usuario(
+            user_data["id"],
+            status=status_pedido,
+            limite=limite,
+            cursor=dados_cursor,
+            desde=data_inicio,
+            ate=data_fim
+        )
 
-        if status_pedido:
-            pedidos = [p for p in pedidos if p.status.lower() == status_pedido.lower()]
+        if len(pedidos) == limite:
+            ultimo = pedidos[-1]
+            response.headers[HEADER_PROXIMO_CURSOR] = codificar_cursor(ultimo.id, ultimo.created_at)
 
-        pedidos = pedidos[:limite]
         logger.info(f"Listados {len(pedidos)} pedidos para usuário {user_data['id']}")
 
         return pedidos
@@ -122,7 +138,7 @@ def obter_pedido(
 
 
 @router.post("/finalizar", response_model=None)
-async def finalizar_pedido(
+def finalizar_pedido(
         request: Request,
         db: Session = Depends(get_db),
         user_data: Optional[dict] = Depends(get_current_user_dependency)  # ✅ CORREÇÃO
@@ -156,6 +172,8 @@ async def finalizar_pedido(
 
     except HTTPException:
         raise
+    except EstoqueInsuficiente as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao finalizar pedido: {e}", exc_info=True)
         raise HTTPException(
@@ -203,6 +221,11 @@ def atualizar_status_pedido(
             )
 
         pedido_atualizado = service.atualizar_status_pedido(pedido_id, novo_status)
+        if not pedido_atualizado:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pedido não pode ser cancelado neste status"
+            )
 
         logger.info(f"Status do pedido {pedido_id} atualizado para '{novo_status}' por usuário {user_data['id']}")
 
@@ -234,29 +257,7 @@ def estatisticas_pedidos_usuario(
                 detail="Usuário não autenticado"
             )
 
-        service = PedidoService(db)
-        pedidos = service.listar_pedidos_usuario(user_data["id"])  # ✅ CORREÇÃO
-
-        if not pedidos:
-            return {
-                "total_pedidos": 0,
-                "valor_total_gasto": 0,
-                "pedidos_por_status": {},
-                "ticket_medio": 0
-            }
-
-        valores = [float(p.total) for p in pedidos]
-        status_count = {}
-
-        for pedido in pedidos:
-            status_count[pedido.status] = status_count.get(pedido.status, 0) + 1
-
-        stats = {
-            "total_pedidos": len(pedidos),
-            "valor_total_gasto": sum(valores),
-            "pedidos_por_status": status_count,
-            "ticket_medio": round(sum(valores) / len(valores), 2) if valores else 0
-        }
+        stats = PedidoService(db).estatisticas_usuario(user_data["id"])
 
         logger.info(f"Estatísticas calculadas para usuário {user_data['id']}: {stats}")
         return stats
@@ -290,14 +291,7 @@ def pedidos_recentes(
                 detail="Quantidade deve ser entre 1 e 50"
             )
 
-        service = PedidoService(db)
-        pedidos = service.listar_pedidos_usuario(user_data["id"])  # ✅ CORREÇÃO
-
-        pedidos_recentes = sorted(
-            pedidos,
-            key=lambda x: x.id,
-            reverse=True
-        )[:quantidade]
+        pedidos_recentes = PedidoService(db).pedidos_recentes(user_data["id"], quantidade)
 
         logger.info(f"Retornados {len(pedidos_recentes)} pedidos recentes para usuário {user_data['id']}")
 
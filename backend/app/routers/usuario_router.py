@@ -1,14 +1,16 @@
 from typing import List, Optional
-from fastapi import APIRouter, Request, Form, Depends, status, HTTPException
+from fastapi import APIRouter, Request, Form, Depends, status, HTTPException, Response
 from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
 import logging
 
 from backend.app.dependencies import get_db
 from backend.app.service.usuario_service import UsuarioService
+from backend.app.service.pedido_service import PedidoService
 from backend.app.domain.schemas.cria_usuario import UsuarioCreate, UsuarioOut
 from backend.app.utils.template_utils import render_template_with_user, get_current_user_dependency
 from backend.app.utils.auth import require_authenticated_user
+from backend.app.utils.paginacao import codificar_cursor, decodificar_cursor, HEADER_PROXIMO_CURSOR
 from fastapi.templating import Jinja2Templates
 
 # Configurar templates
@@ -33,19 +35,25 @@ def cadastrar_usuario_json(usuario_data: UsuarioCreate, db: Session = Depends(ge
 # --------- Listar usuários (API) ---------
 @router.get("/listar", response_model=List[UsuarioOut])
 def listar_usuarios(
+        response: Response,
         db: Session = Depends(get_db),
         email: Optional[str] = None,
         nome: Optional[str] = None,
         limite: int = 50,
+        cursor: Optional[str] = None,
         user_data: Optional[dict] = Depends(get_current_user_dependency)
 ):
-    """Lista usuários - requer autenticação"""
+    """Lista usuários - requer autenticação (próxima página no header X-Proximo-Cursor)"""
     if not user_data:
         raise HTTPException(status_code=401, detail="Não autenticado")
 
+    apos_id = decodificar_cursor(cursor)["id"] if cursor else None
     try:
         service = UsuarioService(db)
-        return service.listar_usuarios(email=email, nome=nome, limite=limite)
+        usuarios = service.listar_usuarios(email=email, nome=nome, limite=limite, apos_id=apos_id)
+        if len(usuarios) == limite:
+            response.headers[HEADER_PROXIMO_CURSOR] = codificar_cursor(usuarios[-1].id)
+        return usuarios
     except Exception as e:
         logger.error(f"Erro ao listar usuários: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -57,18 +65,15 @@ def perfil_usuario(request: Request, db: Session = Depends(get_db)):
     """Página de perfil do usuário - CORRIGIDO"""
     try:
         # Usar função auxiliar para obter contexto
-        from app.utils.auth import get_usuario_context_corrigido
+        from backend.app.utils.auth import get_usuario_context_corrigido
         context = get_usuario_context_corrigido(request, db)
 
         if not context.get("usuario_logado"):
             return RedirectResponse(url="/auth/login", status_code=302)
 
-        # Buscar dados adicionais se necessário (pedidos, etc.)
+        # Pedidos com itens e livros já carregados (o template percorre pedido.itens)
         usuario = context.get("usuario")
-        if usuario and hasattr(usuario, "pedidos"):
-            context["pedidos"] = usuario.pedidos
-        else:
-            context["pedidos"] = []
+        context["pedidos"] = PedidoService(db).listar_pedidos_por_usuario(usuario.id) if usuario else []
 
         return templates.TemplateResponse("perfil.html", context)
 
@@ -82,7 +87,7 @@ def perfil_usuario(request: Request, db: Session = Depends(get_db)):
 def editar_perfil_html(request: Request, db: Session = Depends(get_db)):
     """Página HTML para editar perfil - CORRIGIDO"""
     try:
-        from app.utils.auth import get_usuario_context_corrigido
+        from backend.app.utils.auth import get_usuario_context_corrigido
         context = get_usuario_context_corrigido(request, db)
 
         if not context.get("usuario_logado"):
@@ -108,7 +113,7 @@ def atualizar_perfil_html(
     """Processa o formulário de edição de perfil - CORRIGIDO"""
     try:
         # Verificar autenticação
-        from app.utils.auth import get_current_user_from_request
+        from backend.app.utils.auth import get_current_user_from_request
         usuario_logado = get_current_user_from_request(request, db)
 
         if not usuario_logado:
@@ -1,17 +1,28 @@
 from sqlalchemy.orm import Session
 from backend.app.repositories.carrinho_repository import CarrinhoRepository
 from backend.app.domain.models.vendas.item_carrinho import ItemCarrinho
+from backend.app.domain.models.Livro.livro import Livro
 
 class CarrinhoService:
     def __init__(self, db: Session):
+        self.db = db
         self.repo = CarrinhoRepository(db)
 
+    def _verificar_disponivel(self, livro_id: int, quantidade: int):
+        """Aviso antecipado ao cliente; a garantia contra venda sem estoque é a reserva no checkout"""
+        livro = self.db.get(Livro, livro_id)
+        if not livro:
+            raise ValueError("Livro não encontrado")
+        if (livro.estoque or 0) < quantidade:
+            raise ValueError(f"Estoque insuficiente: {livro.estoque or 0} unidade(s) disponível(is)")
+
     def adicionar(self, usuario_id: int, livro_id: int, quantidade: int):
         # Regras de negócio
         if quantidade <= 0:
             raise ValueError("A quantidade deve ser maior que zero")
 
-        # Aqui você pode adicionar validação de livro existente, estoque, etc.
+        no_carrinho = self.repo.buscar_item(usuario_id, livro_id)
+        self._verificar_disponivel(livro_id, quantidade + (no_carrinho.quantidade if no_carrinho else 0))
         item = self.repo.adicionar_item(usuario_id, livro_id, quantidade)
         return item
 
@@ -31,6 +42,7 @@ class CarrinhoService:
     def atualizar_quantidade(self, usuario_id: int, livro_id: int, nova_quantidade: int):
         if nova_quantidade <= 0:
             raise ValueError("A quantidade deve ser maior que zero")
+        self._verificar_disponivel(livro_id, nova_quantidade)
         item = self.repo.atualizar_quantidade(usuario_id, livro_id, nova_quantidade)
         if not item:
             raise ValueError("Item não encontrado no carrinho")
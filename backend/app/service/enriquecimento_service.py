@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.database import SessionLocal
+from backend.app.domain.models.Livro.enriquecimento_job import EnriquecimentoJob
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.utils import cache_capas, eventos_catalogo
+from backend.app.utils.atualizar_capas_pg import FalhaBuscaCapa, chave_capa
+from backend.app.utils.metadados_isbn import buscar_metadados_isbns
+
+logger = logging.getLogger("EnriquecimentoService")
+
+# Trabalhador em segundo plano (iniciado no lifespan da aplicação)
+ENRIQUECIMENTO_ATIVO = os.getenv("ENRIQUECIMENTO_ATIVO", "true").lower() in ("1", "true", "sim")
+ENRIQUECIMENTO_INTERVALO = float(os.getenv("ENRIQUECIMENTO_INTERVALO", "30"))    # segundos entre varreduras
+ENRIQUECIMENTO_LOTE = int(os.getenv("ENRIQUECIMENTO_LOTE", "10"))                # tarefas retiradas por vez
+ENRIQUECIMENTO_TENTATIVAS = int(os.getenv("ENRIQUECIMENTO_TENTATIVAS", "5"))     # antes de marcar "falhou"
+ENRIQUECIMENTO_BACKOFF = float(os.getenv("ENRIQUECIMENTO_BACKOFF", "60"))        # espera base, dobra a cada falha
+ENRIQUECIMENTO_TRAVA = float(os.getenv("ENRIQUECIMENTO_TRAVA", "600"))           # "processando" órfã volta à fila
+
+# Tipos de tarefa e situações
+TIPO_CAPA = "capa"
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+FALHOU = "falhou"
+
+
+def enfileirar(db: Session, livro_id: int, tipo: str = TIPO_CAPA) -> EnriquecimentoJob:
+    """Cria a tarefa na transação corrente (sem commit), junto com a escrita do livro"""
+    agora = datetime.utcnow()
+    job = EnriquecimentoJob(
+        livro_id=livro_id, tipo=tipo, status=PENDENTE, tentativas=0,
+        proxima_tentativa=agora, criado_em=agora, atualizado_em=agora
+    )
+    db.add(job)
+    return job
+
+
+def retirar_tarefas(db: Session, limite: int = ENRIQUECIMENTO_LOTE) -> List[int]:
+    """
+    Reserva as próximas tarefas vencidas e retorna seus ids
+
+    No PostgreSQL usa FOR UPDATE SKIP LOCKED, então vários processos podem
+    consumir a mesma fila. Tarefas "processando" há mais de
+    ENRIQUECIMENTO_TRAVA segundos (processo reiniciado no meio) voltam à fila.
+    """
+    agora = datetime.utcnow()
+    jobs = db.scalars(
+        select(EnriquecimentoJob)
+        .where(or_(
+            and_(EnriquecimentoJob.status == PENDENTE, EnriquecimentoJob.proxima_tentativa <= agora),
+            and_(EnriquecimentoJob.status == PROCESSANDO,
+                 EnriquecimentoJob.atualizado_em < agora - timedelta(seconds=ENRIQUECIMENTO_TRAVA))
+        ))
+        .order_by(EnriquecimentoJob.proxima_tentativa)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    for job in jobs:
+        job.status = PROCESSANDO
+        job.atualizado_em = agora
+    db.commit()
+    return [job.id for job in jobs]
+
+
+def _enriquecer_capa(db: Session, livro: Livro) -> Optional[Livro]:
+    """Grava a capa se o livro ainda não tiver uma; retorna o livro alterado"""
+    if livro.capa_url:
+        return None
+
+    capa_url = cache_capas.resolver_capa(db, livro.titulo, livro.autor, livro.isbn)
+    if not capa_url:
+        return None
+
+    # Condicional: não sobrescreve uma capa cadastrada enquanto a busca rodava
+    resultado = db.execute(
+        update(Livro)
+        .where(Livro.id == livro.id, or_(Livro.capa_url == None, Livro.capa_url == ''))
+        .values(capa_url=capa_url, data_atualizacao=datetime.utcnow())
+    )
+    # Sem incremento da versão global: notificado por livro (CAPA_ALTERADA); a capa
+    # muda a assinatura do índice, e com ela os ETags (marca_catalogo_atual)
+    return livro if resultado.rowcount else None
+
+
+def pre_resolver_capas_por_isbn(db: Session, job_ids: List[int]) -> int:
+    """
+    Resolve em uma requisição (Open Library) as capas dos livros com ISBN
+
+    As capas vão para o cache persistente, então as tarefas do lote não
+    precisam da busca individual por título/autor. Falhas são ignoradas.
+
+    Returns:
+        Quantidade de capas encontradas
+    """
+    linhas = db.execute(
+        select(Livro.titulo, Livro.autor, Livro.isbn)
+        .join(EnriquecimentoJob, EnriquecimentoJob.livro_id == Livro.id)
+        .where(EnriquecimentoJob.id.in_(job_ids), EnriquecimentoJob.tipo == TIPO_CAPA, Livro.isbn != None)
+    ).all()
+    chaves = {chave_capa(titulo, autor, isbn): isbn for titulo, autor, isbn in linhas}
+    em_cache = cache_capas.consultar(db, chaves)
+    pendentes = {chave: isbn for chave, isbn in chaves.items() if chave not in em_cache}
+    if not pendentes:
+        return 0
+
+    try:
+        metadados = buscar_metadados_isbns(list(pendentes.values()))
+    except FalhaBuscaCapa as e:
+        logger.warning(str(e))
+        return 0
+
+    capas = [
+        (chave, metadados[isbn]["capa_url"])
+        for chave, isbn in pendentes.items()
+        if isbn in metadados and metadados[isbn]["capa_url"]
+    ]
+    cache_capas.guardar(db, capas)
+    db.commit()
+    return len(capas)
+
+
+PROCESSADORES: Dict[str, Callable[[Session, Livro], Optional[Livro]]] = {
+    TIPO_CAPA: _enriquecer_capa,
+}
+
+
+def processar_tarefa(db: Session, job_id: int) -> bool:
+    """
+    Executa uma tarefa reservada; concluída, ela é removida da fila
+
+    Falhas da API reagendam a tarefa com backoff exponencial até
+    ENRIQUECIMENTO_TENTATIVAS, depois ela fica como "falhou".
+
+    Returns:
+        True se a tarefa foi concluída
+    """
+    job = db.get(EnriquecimentoJob, job_id)
+    if job is None:
+        return False
+    livro = db.get(Livro, job.livro_id)
+    processador = PROCESSADORES.get(job.tipo)
+
+    try:
+        alterado = processador(db, livro) if livro and processador else None
+    except FalhaBuscaCapa as e:
+        db.rollback()
+        job = db.get(EnriquecimentoJob, job_id)
+        agora = datetime.utcnow()
+        job.tentativas += 1
+        job.erro = str(e)[:500]
+        job.atualizado_em = agora
+        if job.tentativas >= ENRIQUECIMENTO_TENTATIVAS:
+            job.status = FALHOU
+            logger.warning(f"Enriquecimento do livro {job.livro_id} desistiu após {job.tentativas} tentativas: {e}")
+        else:
+            job.status = PENDENTE
+            job.proxima_tentativa = agora + timedelta(
+                seconds=ENRIQUECIMENTO_BACKOFF * 2 ** (job.tentativas - 1)
+            )
+        db.commit()
+        return False
+
+    db.delete(job)
+    db.commit()
+    if alterado is not None:
+        db.refresh(alterado)
+        eventos_catalogo.notificar_capa(alterado)
+    return True
+
+
+class TrabalhadorEnriquecimento:
+    """
+    Consome a fila de enriquecimento em uma thread do próprio processo
+
+    A fila fica no banco, então tarefas sobrevivem a reinícios; avisar()
+    acorda a thread logo após um cadastro, e a varredura periódica pega
+    tarefas reagendadas ou criadas por outros processos.
+    """
+
+    def __init__(self, fabrica_sessao: Callable[[], Session] = SessionLocal,
+                 intervalo: float = ENRIQUECIMENTO_INTERVALO):
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo = intervalo
+        self._aviso = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> None:
+        if self.ativo:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="enriquecimento", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        self._aviso.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def avisar(self) -> None:
+        """Há tarefa nova na fila"""
+        self._aviso.set()
+
+    def processar_pendentes(self) -> int:
+        """Processa as tarefas vencidas até a fila esvaziar; retorna quantas concluíram"""
+        concluidas = 0
+        with self.fabrica_sessao() as db:
+            while not self._parar.is_set():
+                ids = retirar_tarefas(db)
+                if not ids:
+                    break
+                pre_resolver_capas_por_isbn(db, ids)
+                for job_id in ids:
+                    try:
+                        concluidas += processar_tarefa(db, job_id)
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"Erro na tarefa de enriquecimento {job_id}: {e}")
+        return concluidas
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            self._aviso.clear()
+            try:
+                concluidas = self.processar_pendentes()
+                if concluidas:
+                    logger.info(f"{concluidas} livros enriquecidos")
+            except Exception as e:
+                logger.error(f"Erro no trabalhador de enriquecimento: {e}")
+            self._aviso.wait(self.intervalo)
+
+
+trabalhador_enriquecimento = TrabalhadorEnriquecimento()
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.app.database import SessionLocal
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository, Situacao
+
+logger = logging.getLogger("EstatisticasService")
+
+# Intervalo (segundos) da reconciliação das estatísticas pré-agregadas; 0 desativa
+ESTATISTICAS_RECONCILIACAO = float(os.getenv("ESTATISTICAS_RECONCILIACAO", "3600"))
+
+# Intervalo (segundos) em que as variações de estoque acumuladas são gravadas; 0 grava a cada registro
+ESTATISTICAS_INTERVALO_LOTE = float(os.getenv("ESTATISTICAS_INTERVALO_LOTE", "5"))
+
+
+class AcumuladorEstatisticas:
+    """
+    Variações das estatísticas acumuladas em memória e gravadas em lote
+
+    Usado pelas vendas: o checkout não trava a linha única de
+    estatisticas_catalogo. A cada ESTATISTICAS_INTERVALO_LOTE segundos as
+    variações pendentes viram um único registrar_lote, em transação própria;
+    se a gravação falhar elas voltam para a fila. O que se perder com o
+    processo (queda antes da gravação) é corrigido pela reconciliação.
+
+    Cada variação guarda o momento do registro (feito depois do commit da
+    venda). Variações anteriores à última recontagem, de qualquer processo,
+    já estão nos totais e são descartadas na gravação, em vez de somadas de
+    novo; a comparação usa os relógios dos processos (sincronizados por NTP).
+    """
+
+    def __init__(self, fabrica_sessao: Callable[[], Session] = SessionLocal,
+                 intervalo: float = ESTATISTICAS_INTERVALO_LOTE):
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo = intervalo
+        self._pendentes: List[Tuple[datetime, Tuple[Optional[Situacao], Optional[Situacao]]]] = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def registrar(self, mudancas: Iterable[Tuple[Optional[Situacao], Optional[Situacao]]]) -> None:
+        """Enfileira variações (antes, depois), como em EstatisticasRepository.registrar_lote"""
+        registrado_em = datetime.utcnow()
+        mudancas = [(registrado_em, mudanca) for mudanca in mudancas]
+        with self._lock:
+            self._pendentes.extend(mudancas)
+        if self.intervalo <= 0:
+            try:
+                self.aplicar()
+            except Exception as e:
+                logger.error(f"Erro ao gravar estatísticas: {e}")
+
+    def aplicar(self) -> int:
+        """Grava as variações pendentes; retorna quantas foram aplicadas (sem as já recontadas)"""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, []
+        if not pendentes:
+            return 0
+        try:
+            with self.fabrica_sessao() as db:
+                repositorio = EstatisticasRepository(db)
+                # O lock da linha exclui uma recontagem concorrente até o commit
+                recontado_em = repositorio.travar_resumo()
+                validas = [
+                    mudanca for registrado_em, mudanca in pendentes
+                    if recontado_em is None or registrado_em >= recontado_em
+                ]
+                repositorio.registrar_lote(validas)
+                db.commit()
+        except Exception:
+            with self._lock:
+                self._pendentes[:0] = pendentes
+            raise
+        if len(validas) < len(pendentes):
+            logger.info(f"{len(pendentes) - len(validas)} variações de estatísticas descartadas (já recontadas)")
+        return len(validas)
+
+    def iniciar(self) -> None:
+        if self.intervalo <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="estatisticas-lote", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.aplicar()
+        except Exception as e:
+            logger.error(f"Erro ao gravar estatísticas pendentes no encerramento: {e}")
+
+    def _executar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.aplicar()
+            except Exception as e:
+                logger.error(f"Erro ao gravar estatísticas acumuladas: {e}")
+
+
+acumulador_estatisticas = AcumuladorEstatisticas()
+
+
+class ReconciliadorEstatisticas:
+    """
+    Recalcula periodicamente as estatísticas do catálogo em uma thread
+
+    As escritas mantêm as tabelas por incremento; a reconciliação corrige o
+    que escapou delas (SQL manual, scripts externos, migrações). As variações
+    acumuladas deste processo são gravadas antes; as de outros processos são
+    descartadas por elas mesmas se forem anteriores à recontagem.
+
+    Todos os workers rodam a thread, mas só um reconta por período: quem
+    trava a linha de totais e vê uma recontagem de menos de meio intervalo
+    atrás não conta de novo.
+    """
+
+    def __init__(self, fabrica_sessao: Callable[[], Session] = SessionLocal,
+                 intervalo: float = ESTATISTICAS_RECONCILIACAO):
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self.intervalo <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="estatisticas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def reconciliar(self) -> dict:
+        acumulador_estatisticas.aplicar()
+        recente = None if self.intervalo <= 0 else datetime.utcnow() - timedelta(seconds=self.intervalo / 2)
+        with self.fabrica_sessao() as db:
+            return EstatisticasRepository(db).reconciliar(reconciliado_antes_de=recente)
+
+    def _executar(self) -> None:
+        # Primeira execução logo na subida: cria a linha de totais se faltar
+        while not self._parar.is_set():
+            try:
+                self.reconciliar()
+            except Exception as e:
+                logger.error(f"Erro ao reconciliar estatísticas: {e}")
+            self._parar.wait(self.intervalo)
+
+
+reconciliador_estatisticas = ReconciliadorEstatisticas()
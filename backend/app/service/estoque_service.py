@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.app.database import SessionLocal
+from backend.app.repositories.estatisticas_repository import situacao
+from backend.app.repositories.estoque_repository import AlteracaoEstoque, EstoqueRepository
+from backend.app.service.estatisticas_service import acumulador_estatisticas
+from backend.app.utils import eventos_catalogo
+
+logger = logging.getLogger("EstoqueService")
+
+# Reserva de estoque de pedidos não pagos (expirador iniciado no lifespan da aplicação)
+RESERVA_ESTOQUE_MINUTOS = float(os.getenv("RESERVA_ESTOQUE_MINUTOS", "30"))        # validade da reserva
+RESERVA_ESTOQUE_VERIFICACAO = float(os.getenv("RESERVA_ESTOQUE_VERIFICACAO", "60"))  # segundos entre varreduras
+
+
+def expiracao_reserva(agora: Optional[datetime] = None) -> datetime:
+    """Momento em que uma reserva feita agora expira"""
+    return (agora or datetime.utcnow()) + timedelta(minutes=RESERVA_ESTOQUE_MINUTOS)
+
+
+def notificar_estoque(alteracoes: Iterable[AlteracaoEstoque]) -> None:
+    """
+    Propaga o estoque alterado depois do commit
+
+    O índice em memória é atualizado por livro (sem mudar a versão global
+    do catálogo) e as estatísticas vão para o acumulador, gravado em lote.
+    """
+    alteracoes = list(alteracoes)
+    for livro, _ in alteracoes:
+        eventos_catalogo.notificar_estoque(livro)
+    acumulador_estatisticas.registrar(
+        ((livro.autor, livro.estoque - delta, livro.preco), situacao(livro))
+        for livro, delta in alteracoes
+    )
+
+
+def cancelar_pedido(db: Session, pedido_id: int, somente_pendente: bool = False) -> bool:
+    """
+    Cancela o pedido devolvendo o estoque reservado, em uma transação
+
+    Returns:
+        False se o pedido já não estava em um status cancelável
+    """
+    try:
+        liberados = EstoqueRepository(db).cancelar_pedido(pedido_id, somente_pendente=somente_pendente)
+        if liberados is None:
+            db.rollback()
+            return False
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    notificar_estoque(liberados)
+    return True
+
+
+class ExpiradorReservas:
+    """
+    Cancela em uma thread os pedidos não pagos com reserva vencida
+
+    Checkout abandonado não prende estoque além de RESERVA_ESTOQUE_MINUTOS.
+    Cada pedido é cancelado na sua própria transação, então a varredura não
+    segura locks de livros de vários pedidos ao mesmo tempo; o cancelamento
+    condicional permite vários processos varrendo juntos.
+    """
+
+    def __init__(self, fabrica_sessao: Callable[[], Session] = SessionLocal,
+                 intervalo: float = RESERVA_ESTOQUE_VERIFICACAO):
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self.intervalo <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="reservas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def expirar(self, agora: Optional[datetime] = None) -> int:
+        """Uma varredura; retorna quantos pedidos foram cancelados"""
+        cancelados = 0
+        with self.fabrica_sessao() as db:
+            repo = EstoqueRepository(db)
+            pedidos = repo.pedidos_com_reserva_expirada(agora or datetime.utcnow())
+            db.rollback()
+            for pedido_id in pedidos:
+                try:
+                    if cancelar_pedido(db, pedido_id, somente_pendente=True):
+                        cancelados += 1
+                    else:
+                        # Pedido já seguiu adiante sem passar pelo pagamento: a reserva fica com ele
+                        repo.confirmar_reservas(pedido_id)
+                        db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Erro ao expirar reserva do pedido {pedido_id}: {e}")
+        return cancelados
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                cancelados = self.expirar()
+                if cancelados:
+                    logger.info(f"{cancelados} pedido(s) cancelado(s) por reserva de estoque expirada")
+            except Exception as e:
+                logger.error(f"Erro ao expirar reservas de estoque: {e}")
+            self._parar.wait(self.intervalo)
+
+
+expirador_reservas = ExpiradorReservas()
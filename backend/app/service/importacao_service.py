@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import IO, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.schemas.cria_livro import LivroCreate
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository, situacao
+from backend.app.repositories.livro_repository import LivroRepository, restricao_violada
+from backend.app.service.livro_service import LivroService, TENTATIVAS_SLUG
+from backend.app.utils import eventos_catalogo
+from backend.app.utils.indice_catalogo import incrementar_versao_catalogo
+
+logger = logging.getLogger("ImportacaoService")
+
+FORMATOS = ("csv", "jsonl")
+TAMANHO_LOTE_PADRAO = 1000
+
+# Erros de validação detalhados no relatório (os demais são apenas contados)
+MAXIMO_ERROS_RELATORIO = 100
+
+
+def detectar_formato(nome_arquivo: str) -> str:
+    """Formato pela extensão do arquivo (.csv, .jsonl ou .ndjson)"""
+    nome = (nome_arquivo or "").lower()
+    if nome.endswith(".csv"):
+        return "csv"
+    if nome.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError("Formato não reconhecido; use .csv ou .jsonl")
+
+
+def ler_registros(fluxo: IO[str], formato: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Lê o arquivo linha a linha, sem carregá-lo inteiro na memória
+
+    Yields:
+        (número da linha, registro); registros inválidos vêm como ValueError
+    """
+    if formato == "csv":
+        leitor = csv.DictReader(fluxo)
+        for registro in leitor:
+            # Colunas vazias no CSV equivalem a campos ausentes
+            yield leitor.line_num, {k: v for k, v in registro.items() if k and v not in ("", None)}
+    elif formato == "jsonl":
+        for numero, linha in enumerate(fluxo, start=1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+                if not isinstance(registro, dict):
+                    raise ValueError("linha não é um objeto JSON")
+            except ValueError as e:
+                yield numero, ValueError(f"JSON inválido: {e}")
+                continue
+            yield numero, registro
+    else:
+        raise ValueError(f"Formato inválido: {formato}")
+
+
+class ImportacaoLivrosService:
+    """
+    Importação em massa do catálogo (CSV/JSONL)
+
+    Processa o arquivo em lotes: valida com LivroCreate, aloca os slugs do
+    lote em uma consulta e grava com um INSERT de várias linhas por lote.
+    ISBN repetido no arquivo ou já cadastrado rejeita só a linha (relatório).
+    A busca de capas fica para depois (LivroService.atualizar_capas_existentes).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = LivroRepository(db)
+
+    def importar(self, fluxo: IO, formato: str, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> Dict:
+        """
+        Importa os livros de um arquivo aberto (texto ou binário)
+
+        Returns:
+            Resumo com inseridos, rejeitados, lotes e os primeiros erros
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato}")
+        if isinstance(fluxo, (io.BufferedIOBase, io.RawIOBase)) or "b" in getattr(fluxo, "mode", ""):
+            fluxo = io.TextIOWrapper(fluxo, encoding="utf-8-sig", newline="")
+
+        resumo = {"inseridos": 0, "rejeitados": 0, "lotes": 0, "erros": []}
+        registros = ler_registros(fluxo, formato)
+
+        try:
+            while True:
+                bloco = list(islice(registros, tamanho_lote))
+                if not bloco:
+                    break
+
+                validos = []
+                for numero, registro in bloco:
+                    try:
+                        if isinstance(registro, Exception):
+                            raise registro
+                        validos.append((numero, LivroCreate(**registro)))
+                    except (ValidationError, ValueError, TypeError) as e:
+                        self._registrar_erro(resumo, numero, e)
+
+                inseridos = self._inserir_lote(validos, resumo) if validos else 0
+                if inseridos:
+                    resumo["inseridos"] += inseridos
+                    resumo["lotes"] += 1
+                    logger.info(f"Lote {resumo['lotes']} importado ({resumo['inseridos']} livros)")
+        finally:
+            if resumo["inseridos"]:
+                # Índices em memória são reconstruídos uma vez, no fim
+                eventos_catalogo.notificar_recarga()
+
+        return resumo
+
+    def _inserir_lote(self, validos: List[Tuple[int, LivroCreate]], resumo: Dict) -> int:
+        """
+        Grava um lote em uma transação e retorna quantos livros entraram
+
+        ISBNs repetidos são rejeitados antes do INSERT; se outra escrita
+        ocupar um slug ou ISBN até o commit, o lote é refeito.
+        """
+        agora = datetime.utcnow()
+
+        for tentativa in range(1, TENTATIVAS_SLUG + 1):
+            livros = self._descartar_isbns_repetidos(validos, resumo)
+            if not livros:
+                return 0
+            bases = [LivroService.gerar_slug(livro.titulo) for livro in livros]
+            linhas = []
+            for livro, slug in zip(livros, self.repo.alocar_slugs(bases)):
+                linha = livro.model_dump()
+                linha.update(slug=slug, data_criacao=agora, data_atualizacao=agora)
+                linhas.append(linha)
+
+            try:
+                self.db.execute(insert(Livro), linhas)
+                EstatisticasRepository(self.db).registrar_lote((None, situacao(linha)) for linha in linhas)
+                incrementar_versao_catalogo(self.db)
+                self.db.commit()
+                return len(linhas)
+            except IntegrityError as e:
+                self.db.rollback()
+                coluna = restricao_violada(e)
+                if coluna not in ("slug", "isbn") or tentativa == TENTATIVAS_SLUG:
+                    raise
+                logger.warning(f"Conflito de {coluna} no lote (tentativa {tentativa}), refazendo")
+        return 0
+
+    def _descartar_isbns_repetidos(self, validos: List[Tuple[int, LivroCreate]], resumo: Dict) -> List[LivroCreate]:
+        """
+        Livros do lote que podem ser gravados; os de ISBN repetido vão para o relatório
+
+        Uma consulta IN por lote para os ISBNs já cadastrados (inclusive por
+        lotes anteriores do mesmo arquivo). Linhas descartadas saem de validos,
+        então uma nova tentativa não as reporta de novo.
+        """
+        cadastrados = self.repo.isbns_cadastrados(list({livro.isbn for _, livro in validos if livro.isbn}))
+        vistos = {}
+        aceitos = []
+        for numero, livro in list(validos):
+            if livro.isbn in cadastrados:
+                erro = ValueError(f"isbn: já existe um livro com o ISBN {livro.isbn}")
+            elif livro.isbn and livro.isbn in vistos:
+                erro = ValueError(f"isbn: ISBN {livro.isbn} repetido no arquivo (linha {vistos[livro.isbn]})")
+            else:
+                if livro.isbn:
+                    vistos[livro.isbn] = numero
+                aceitos.append((numero, livro))
+                continue
+            self._registrar_erro(resumo, numero, erro)
+        validos[:] = aceitos
+        return [livro for _, livro in aceitos]
+
+    @staticmethod
+    def _registrar_erro(resumo: Dict, numero: int, erro: Exception) -> None:
+        resumo["rejeitados"] += 1
+        if len(resumo["erros"]) < MAXIMO_ERROS_RELATORIO:
+            if isinstance(erro, ValidationError):
+                mensagem = "; ".join(
+                    f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in erro.errors()
+                )
+            else:
+                mensagem = str(erro)
+            resumo["erros"].append({"linha": numero, "erro": mensagem})
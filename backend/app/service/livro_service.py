@@ -1,14 +1,47 @@
 
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+import asyncio
+import logging
 import re
 
 from backend.app.domain.models.Livro.livro import Livro
-from backend.app.repositories.livro_repository import LivroRepository
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository
+from backend.app.repositories.livro_repository import LivroRepository, restricao_violada
 from backend.app.domain.schemas.cria_livro import LivroCreate, LivroUpdate
 from fastapi import HTTPException, status
 
-from backend.app.utils.atualizar_capas_pg import buscar_url_capa
+from backend.app.service.enriquecimento_service import trabalhador_enriquecimento
+from backend.app.utils.atualizar_capas_pg import FalhaBuscaCapa, buscar_capas_concorrente, chave_capa
+from backend.app.utils import cache_capas, eventos_catalogo
+from backend.app.utils.busca_textual import normalizar_texto
+from backend.app.utils.cache_memoria import CacheMemoria
+from backend.app.utils.exportacao import SERIALIZADORES
+from backend.app.utils.indice_catalogo import (
+    CAMPOS_LIVRO, indice_catalogo, incrementar_versao_catalogo, marca_catalogo_atual
+)
+from backend.app.utils.indice_prefixos import indice_autocompletar
+from backend.app.utils.isbn import canonizar_isbn
+from backend.app.utils.metadados_isbn import ano_valido, buscar_metadados_isbns, ISBNS_POR_CONSULTA
+from backend.app.utils.paginacao import filtrar_apos_cursor
+
+logger = logging.getLogger("LivroService")
+
+# Tentativas de gravação quando o slug alocado é tomado por outro worker
+TENTATIVAS_SLUG = 5
+
+# Facetas por assinatura de filtros; a versão do catálogo faz parte da chave
+cache_facetas = CacheMemoria(maximo=512, ttl=300)
+
+
+@eventos_catalogo.registrar_ouvinte
+def _limpar_cache_facetas(evento: str, dado) -> None:
+    # Capa não entra em nenhuma faceta; o estoque das vendas muda a marca da chave
+    if evento not in (eventos_catalogo.CAPA_ALTERADA, eventos_catalogo.ESTOQUE_ALTERADO):
+        cache_facetas.limpar()
 
 
 class LivroService:
@@ -27,9 +60,29 @@ class LivroService:
             estoque_min: Optional[int] = None,
             estoque_max: Optional[int] = None,
             skip: int = 0,
-            limite: int = 100
+            limite: int = 100,
+            fuzzy: bool = False,
+            apos_id: Optional[int] = None
     ) -> List[Livro]:
-        """Lista livros com filtros opcionais"""
+        """
+        Lista livros com filtros opcionais, ordenados por id
+
+        fuzzy=True tolera erros em autor/título; apos_id (cursor) retorna os
+        livros seguintes ao id informado, ignorando skip.
+        """
+        if not autor and not titulo and indice_catalogo.pronto(self.db):
+            # Filtros por faixa são atendidos pelo catálogo em memória
+            return indice_catalogo.listar(
+                ano=ano,
+                preco_min=preco_min,
+                preco_max=preco_max,
+                estoque_min=estoque_min,
+                estoque_max=estoque_max,
+                skip=skip,
+                limite=limite,
+                apos_id=apos_id
+            )
+
         if any([autor, titulo, ano, preco_min, preco_max, estoque_min, estoque_max]):
             return self.repo.buscar_com_filtros(
                 autor=autor,
@@ -40,11 +93,15 @@ class LivroService:
                 estoque_min=estoque_min,
                 estoque_max=estoque_max,
                 skip=skip,
-                limite=limite
+                limite=limite,
+                fuzzy=fuzzy,
+                apos_id=apos_id
             )
         else:
-            # Lista todos com paginação
-            query = self.db.query(Livro)
+            # Lista todos com paginação (keyset por id quando houver cursor)
+            query = filtrar_apos_cursor(self.db.query(Livro), {"id": apos_id} if apos_id else None, Livro.id)
+            if apos_id:
+                return query.limit(limite).all()
             return query.offset(skip).limit(limite).all()
 
     # ---------------------- OBTER ----------------------
@@ -56,7 +113,9 @@ class LivroService:
                 detail="ID do livro deve ser um número inteiro positivo"
             )
 
-        livro = self.repo.buscar_por_id(livro_id)
+        livro = indice_catalogo.obter(livro_id) if indice_catalogo.pronto(self.db) else None
+        if not livro:
+            livro = self.repo.buscar_por_id(livro_id)
         if not livro:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -72,7 +131,10 @@ class LivroService:
                 detail="Slug não pode estar vazio"
             )
 
-        livro = self.repo.buscar_por_slug(slug.strip())
+        slug = slug.strip()
+        livro = indice_catalogo.obter_por_slug(slug) if indice_catalogo.pronto(self.db) else None
+        if not livro:
+            livro = self.repo.buscar_por_slug(slug)
         if not livro:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -80,26 +142,44 @@ class LivroService:
             )
         return livro
 
+    def obter_livro_por_isbn(self, isbn: str) -> Livro:
+        """Busca livro por ISBN-10 ou ISBN-13 (com ou sem hífens)"""
+        try:
+            isbn = canonizar_isbn(isbn)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if not isbn:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ISBN não pode estar vazio"
+            )
+
+        livro = indice_catalogo.obter_por_isbn(isbn) if indice_catalogo.pronto(self.db) else None
+        if not livro:
+            livro = self.repo.buscar_por_isbn(isbn)
+        if not livro:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Livro com ISBN '{isbn}' não encontrado"
+            )
+        return livro
+
     # ---------------------- ADICIONAR ----------------------
     def adicionar_livro(self, livro: LivroCreate) -> Livro:
         """Adiciona um novo livro"""
         self.validar_livro(livro)
+        self._verificar_isbn_livre(livro.isbn)
 
-        # Gera slug único
-        slug = self.gerar_slug(livro.titulo)
-        contador = 1
-        slug_original = slug
+        # Slug único alocado em uma consulta (nova tentativa em caso de corrida)
+        novo = self._salvar_com_slug_unico(
+            self.gerar_slug(livro.titulo),
+            lambda slug: self.repo.adicionar(livro, slug)
+        )
 
-        while self.repo.buscar_por_slug(slug):
-            slug = f"{slug_original}-{contador}"
-            contador += 1
-
-        # Buscar capa automaticamente se não tiver
-        capa_url = buscar_url_capa(livro.titulo, livro.autor)
-        if capa_url:
-            livro.capa_url = capa_url
-
-        return self.repo.adicionar(livro, slug)
+        # Sem capa: o repositório enfileirou a busca, feita fora da requisição
+        if not novo.capa_url:
+            trabalhador_enriquecimento.avisar()
+        return novo
 
     # ---------------------- ATUALIZAR ----------------------
     def atualizar_livro(self, livro_id: int, dados_atualizacao: LivroUpdate) -> Livro:
@@ -159,24 +239,21 @@ class LivroService:
                 detail="Ano deve estar entre 1000 e 2030"
             )
 
-        # Se o título foi alterado, gerar novo slug
-        if 'titulo' in update_data:
-            novo_slug = self.gerar_slug(update_data['titulo'])
-            contador = 1
-            slug_original = novo_slug
-
-            # Garantir que o slug é único (exceto para o próprio livro)
-            while True:
-                livro_com_slug = self.repo.buscar_por_slug(novo_slug)
-                if not livro_com_slug or livro_com_slug.id == livro_id:
-                    break
-                novo_slug = f"{slug_original}-{contador}"
-                contador += 1
+        if update_data.get('isbn'):
+            self._verificar_isbn_livre(update_data['isbn'], excluir_id=livro_id)
 
-            dados_atualizacao.slug = novo_slug
+        # Se o título foi alterado, gerar novo slug (único, exceto o do próprio livro)
+        if 'titulo' in update_data:
+            def salvar(slug: str):
+                dados_atualizacao.slug = slug
+                return self.repo.atualizar(livro_id, dados_atualizacao)
 
-        # Atualizar usando o repositório
-        livro_atualizado = self.repo.atualizar(livro_id, dados_atualizacao)
+            livro_atualizado = self._salvar_com_slug_unico(
+                self.gerar_slug(update_data['titulo']), salvar, excluir_id=livro_id
+            )
+        else:
+            # Atualizar usando o repositório
+            livro_atualizado = self.repo.atualizar(livro_id, dados_atualizacao)
 
         if not livro_atualizado:
             raise HTTPException(
@@ -213,26 +290,77 @@ class LivroService:
             titulo: str = None,
             ano: int = None,
             skip: int = 0,
-            limite: int = 100
+            limite: int = 100,
+            fuzzy: bool = False
     ) -> List[Livro]:
         """Busca livros por termo geral ou filtros específicos"""
         if termo:
-            # Busca geral por título ou autor
-            query = self.db.query(Livro)
-            query = query.filter(
-                (Livro.titulo.ilike(f"%{termo}%")) |
-                (Livro.autor.ilike(f"%{termo}%"))
-            )
-            return query.offset(skip).limit(limite).all()
+            if fuzzy:
+                # Tolerante a erros de digitação, ordenado por similaridade
+                return self.repo.buscar_por_similaridade(termo, skip=skip, limite=limite)
+            # Busca textual ranqueada por título ou autor (índice GIN / FTS5)
+            return self.repo.buscar_por_texto(termo, skip=skip, limite=limite)
         else:
             return self.listar_livros(
                 autor=autor,
                 titulo=titulo,
                 ano=ano,
                 skip=skip,
-                limite=limite
+                limite=limite,
+                fuzzy=fuzzy
+            )
+
+    # ---------------------- AUTOCOMPLETAR ----------------------
+    def autocompletar(self, prefixo: str, limite: int = 10, tipo: Optional[str] = None) -> List[dict]:
+        """Sugestões de títulos/autores pelo prefixo, servidas da memória"""
+        if indice_catalogo.pronto(self.db):
+            # Reconstrói quando o catálogo em memória foi recarregado (escrita de outro worker)
+            if not indice_autocompletar.carregado or indice_autocompletar.geracao != indice_catalogo.geracao:
+                indice_autocompletar.carregar(
+                    ((l.id, l.titulo, l.autor, l.slug) for l in indice_catalogo.todos()),
+                    indice_catalogo.geracao
+                )
+        elif not indice_autocompletar.carregado:
+            indice_autocompletar.carregar(
+                self.db.query(Livro.id, Livro.titulo, Livro.autor, Livro.slug).yield_per(1000)
             )
 
+        return indice_autocompletar.sugerir(prefixo, limite=limite, tipo=tipo)
+
+    # ---------------------- EXPORTAR ----------------------
+    def exportar_catalogo(self, formato: str = "csv") -> Iterator[str]:
+        """Catálogo completo em CSV ou NDJSON, gerado em pedaços (sem objetos ORM)"""
+        serializar = SERIALIZADORES.get(formato)
+        if serializar is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato de exportação inválido: {formato}"
+            )
+        return serializar(CAMPOS_LIVRO, self.repo.iterar_tuplas(CAMPOS_LIVRO))
+
+    # ---------------------- FACETAS ----------------------
+    def contar_facetas(
+            self,
+            termo: Optional[str] = None,
+            autor: Optional[str] = None,
+            titulo: Optional[str] = None,
+            ano: Optional[int] = None,
+            preco_min: Optional[float] = None,
+            preco_max: Optional[float] = None,
+            estoque_min: Optional[int] = None,
+            estoque_max: Optional[int] = None
+    ) -> dict:
+        """Total real e contagens por faceta para os filtros informados (com cache)"""
+        filtros = (termo, autor, titulo, ano, preco_min, preco_max, estoque_min, estoque_max)
+        # Escritas de outros workers (inclusive vendas, sem versão) mudam a marca e, portanto, a chave
+        chave = (marca_catalogo_atual(self.db),) + filtros
+
+        facetas = cache_facetas.obter(chave)
+        if facetas is None:
+            facetas = self.repo.contar_facetas(*filtros)
+            cache_facetas.guardar(chave, facetas)
+        return facetas
+
     # ---------------------- AUXILIARES ----------------------
     def validar_livro(self, livro: LivroCreate):
         """Validações para criação de livro"""
@@ -266,23 +394,54 @@ class LivroService:
                 detail="Ano deve estar entre 1000 e 2030"
             )
 
+    def _salvar_com_slug_unico(self, base: str, salvar: Callable[[str], Livro],
+                               excluir_id: Optional[int] = None) -> Livro:
+        """
+        Aloca o próximo slug livre e executa salvar(slug)
+
+        Se outro worker gravar o mesmo slug entre a alocação e o commit, o
+        índice único rejeita a escrita e um novo slug é alocado.
+        """
+        for tentativa in range(1, TENTATIVAS_SLUG + 1):
+            slug = self.repo.proximo_slug_livre(base, excluir_id=excluir_id)
+            try:
+                return salvar(slug)
+            except IntegrityError as e:
+                self.db.rollback()
+                coluna = restricao_violada(e)
+                if coluna == "isbn":
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Já existe um livro com este ISBN"
+                    )
+                if coluna != "slug":
+                    raise
+                logger.warning(f"Slug '{slug}' ocupado por escrita concorrente (tentativa {tentativa})")
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Não foi possível gerar um slug único para '{base}'"
+        )
+
+    def _verificar_isbn_livre(self, isbn: Optional[str], excluir_id: Optional[int] = None) -> None:
+        """409 se outro livro já usa o ISBN (o índice único cobre as corridas)"""
+        if not isbn:
+            return
+        existente = self.repo.buscar_por_isbn(isbn)
+        if existente and existente.id != excluir_id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Já existe um livro com este ISBN (ID {existente.id})"
+            )
+
     @staticmethod
     def gerar_slug(titulo: str) -> str:
         """Gera slug a partir do título - MELHORADO"""
         if not titulo:
             return ""
 
-        # Converter para minúsculas
-        slug = titulo.lower()
-
-        # Remover acentos e caracteres especiais
-        slug = re.sub(r'[àáâãäå]', 'a', slug)
-        slug = re.sub(r'[èéêë]', 'e', slug)
-        slug = re.sub(r'[ìíîï]', 'i', slug)
-        slug = re.sub(r'[òóôõö]', 'o', slug)
-        slug = re.sub(r'[ùúûü]', 'u', slug)
-        slug = re.sub(r'[ç]', 'c', slug)
-        slug = re.sub(r'[ñ]', 'n', slug)
+        # Minúsculas e sem acentos (mesma normalização da busca e do autocompletar)
+        slug = normalizar_texto(titulo)
 
         # Manter apenas letras, números e espaços
         slug = re.sub(r'[^a-z0-9\s]', '', slug)
@@ -298,37 +457,118 @@ class LivroService:
 
         return slug or "livro-sem-titulo"
 
-    def obter_estatisticas(self) -> dict:
-        """Retorna estatísticas dos livros"""
-        total_livros = self.repo.contar_total()
-        livros_sem_estoque = self.db.query(Livro).filter(Livro.estoque == 0).count()
+    def obter_estatisticas(self, limite_autores: int = 10) -> dict:
+        """Retorna estatísticas dos livros (tabelas pré-agregadas, sem COUNT no catálogo)"""
+        estatisticas = EstatisticasRepository(self.db)
+        resumo = estatisticas.obter_resumo()
 
         return {
-            "total_livros": total_livros,
-            "livros_sem_estoque": livros_sem_estoque,
-            "livros_com_estoque": total_livros - livros_sem_estoque
+            "total_livros": resumo.total_livros,
+            "livros_sem_estoque": resumo.livros_sem_estoque,
+            "livros_com_estoque": resumo.total_livros - resumo.livros_sem_estoque,
+            "estoque_total": resumo.estoque_total,
+            "valor_inventario": float(resumo.valor_inventario),
+            "autores": [
+                {"autor": autor, "quantidade": quantidade}
+                for autor, quantidade in estatisticas.listar_autores(limite_autores)
+            ]
         }
 
-    def atualizar_capas_existentes(self):
-        """Atualiza as capas de todos os livros que ainda não têm capa"""
-        livros_sem_capa = self.db.query(Livro).filter(
+    def contar_por_autor(self, limite: int = 50) -> List[dict]:
+        """Autores com mais livros"""
+        return [
+            {"autor": autor, "quantidade": quantidade}
+            for autor, quantidade in EstatisticasRepository(self.db).listar_autores(limite)
+        ]
+
+    def atualizar_capas_existentes(self) -> dict:
+        """
+        Atualiza as capas de todos os livros que ainda não têm capa (busca concorrente)
+
+        Livros já consultados antes (com ou sem capa, ver cache_capas) são
+        resolvidos pelo cache, sem nova requisição à API.
+        """
+        livros_sem_capa = self.db.query(Livro.id, Livro.titulo, Livro.autor, Livro.isbn).filter(
             (Livro.capa_url == None) | (Livro.capa_url == '')
         ).all()
 
         if not livros_sem_capa:
             print("Todos os livros já possuem capa.")
-            return
-
-        print(f"Atualizando capas de {len(livros_sem_capa)} livros...")
-
-        for livro in livros_sem_capa:
-            capa_url = buscar_url_capa(livro.titulo, livro.autor)
-            if capa_url:
-                livro.capa_url = capa_url
-                self.db.add(livro)
-                print(f"Capa atualizada para: {livro.titulo} - {livro.autor}")
-            else:
-                print(f"Não foi possível encontrar capa para: {livro.titulo} - {livro.autor}")
-
-        self.db.commit()
-        print("Atualização de capas concluída!")
+            return {"processados": 0, "encontradas": 0, "falhas": 0, "lotes": 0, "cache": 0}
+
+        livros = [(l.id, l.titulo, l.autor, chave_capa(l.titulo, l.autor, l.isbn)) for l in livros_sem_capa]
+        em_cache = cache_capas.consultar(self.db, [l[3] for l in livros])
+
+        def gravar_capas(capas, resultados=()):
+            agora = datetime.utcnow()
+            capas = [{"id": livro_id, "capa_url": url, "data_atualizacao": agora} for livro_id, url in capas if url]
+            if capas:
+                self.db.execute(update(Livro), capas)
+                incrementar_versao_catalogo(self.db)
+            cache_capas.guardar(self.db, resultados)
+            self.db.commit()
+            print(f"{len(capas)} capas atualizadas")
+
+        gravar_capas([(l[0], em_cache[l[3]]) for l in livros if em_cache.get(l[3])])
+        livros = [l for l in livros if l[3] not in em_cache]
+        print(f"Atualizando capas de {len(livros_sem_capa)} livros "
+              f"({len(livros_sem_capa) - len(livros)} resolvidos pelo cache)...")
+
+        resumo = asyncio.run(buscar_capas_concorrente(
+            livros,
+            lambda lote: gravar_capas([(l[0], url) for l, url in lote], [(l[3], url) for l, url in lote])
+        ))
+        resumo["cache"] = len(livros_sem_capa) - len(livros)
+        if resumo["lotes"] or resumo["cache"]:
+            eventos_catalogo.notificar_recarga()
+        print(f"Atualização de capas concluída! {resumo}")
+        return resumo
+
+    def enriquecer_por_isbn(self) -> dict:
+        """
+        Completa capa e ano dos livros com ISBN usando consultas em lote
+
+        Cada requisição ao Open Library resolve até ISBNS_POR_CONSULTA livros
+        (em vez de uma busca por título/autor por livro). As capas encontradas
+        também entram no cache persistente de capas.
+        """
+        livros = self.db.query(Livro.id, Livro.titulo, Livro.autor, Livro.isbn, Livro.ano, Livro.capa_url).filter(
+            Livro.isbn != None,
+            (Livro.capa_url == None) | (Livro.capa_url == '') | (Livro.ano == None)
+        ).order_by(Livro.id).all()
+
+        resumo = {"livros": len(livros), "consultas": 0, "atualizados": 0, "falhas": 0}
+        for inicio in range(0, len(livros), ISBNS_POR_CONSULTA):
+            lote = livros[inicio:inicio + ISBNS_POR_CONSULTA]
+            try:
+                metadados = buscar_metadados_isbns([livro.isbn for livro in lote])
+            except FalhaBuscaCapa as e:
+                logger.warning(str(e))
+                resumo["falhas"] += len(lote)
+                continue
+            resumo["consultas"] += 1
+
+            agora = datetime.utcnow()
+            alteracoes, capas = [], []
+            for livro in lote:
+                dados = metadados.get(livro.isbn)
+                if not dados:
+                    continue
+                capa_url = livro.capa_url or dados["capa_url"]
+                ano = livro.ano if livro.ano is not None or not ano_valido(dados["ano"]) else dados["ano"]
+                if capa_url != livro.capa_url or ano != livro.ano:
+                    alteracoes.append({"id": livro.id, "capa_url": capa_url, "ano": ano, "data_atualizacao": agora})
+                if dados["capa_url"]:
+                    capas.append((chave_capa(livro.titulo, livro.autor, livro.isbn), dados["capa_url"]))
+
+            if alteracoes:
+                self.db.execute(update(Livro), alteracoes)
+                incrementar_versao_catalogo(self.db)
+            cache_capas.guardar(self.db, capas)
+            self.db.commit()
+            resumo["atualizados"] += len(alteracoes)
+
+        if resumo["atualizados"]:
+            eventos_catalogo.notificar_recarga()
+        logger.info(f"Enriquecimento por ISBN concluído: {resumo}")
+        return resumo
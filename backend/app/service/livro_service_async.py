@@ -0,0 +1,89 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.repositories.livro_repository_async import LivroRepositoryAsync
+from backend.app.utils.isbn import canonizar_isbn
+
+
+class LivroServiceAsync:
+    """Consultas de LivroService para as rotas assíncronas (mesmas validações e erros)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = LivroRepositoryAsync(db)
+
+    async def listar_livros(
+            self,
+            autor: Optional[str] = None,
+            titulo: Optional[str] = None,
+            ano: Optional[int] = None,
+            preco_min: Optional[float] = None,
+            preco_max: Optional[float] = None,
+            estoque_min: Optional[int] = None,
+            estoque_max: Optional[int] = None,
+            skip: int = 0,
+            limite: int = 100,
+            apos_id: Optional[int] = None
+    ) -> List[Livro]:
+        """Lista livros com filtros opcionais, ordenados por id"""
+        return await self.repo.listar_com_filtros(
+            autor=autor,
+            titulo=titulo,
+            ano=ano,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            estoque_max=estoque_max,
+            skip=skip,
+            limite=limite,
+            apos_id=apos_id
+        )
+
+    async def obter_livro(self, livro_id: int) -> Livro:
+        if livro_id <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ID do livro deve ser um número inteiro positivo"
+            )
+        livro = await self.repo.buscar_por_id(livro_id)
+        if not livro:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Livro com ID {livro_id} não encontrado"
+            )
+        return livro
+
+    async def obter_livro_por_slug(self, slug: str) -> Livro:
+        if not slug or not slug.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Slug não pode estar vazio"
+            )
+        livro = await self.repo.buscar_por_slug(slug.strip())
+        if not livro:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Livro com slug '{slug.strip()}' não encontrado"
+            )
+        return livro
+
+    async def obter_livro_por_isbn(self, isbn: str) -> Livro:
+        try:
+            isbn = canonizar_isbn(isbn)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if not isbn:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ISBN não pode estar vazio"
+            )
+        livro = await self.repo.buscar_por_isbn(isbn)
+        if not livro:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Livro com ISBN '{isbn}' não encontrado"
+            )
+        return livro
@@ -1,8 +1,10 @@
 
 from sqlalchemy.orm import Session
 from decimal import Decimal
+from backend.app.domain.models.enums import StatusPedido
 from backend.app.domain.models.vendas.pedidos import Pedido
 from backend.app.domain.models.vendas.pagamento import StatusPagamento
+from backend.app.repositories.estoque_repository import EstoqueRepository
 from backend.app.repositories.pagamento_repository import PagamentoRepository
 from backend.app.utils.credit_card import luhn_check, mask_card, sanitize_card, validate_expiry, validate_cvv
 
@@ -15,6 +17,9 @@ class PagamentoService:
         pedido = self.db.query(Pedido).filter(Pedido.id == pedido_id).first()
         if not pedido:
             raise ValueError("Pedido não encontrado.")
+        if pedido.status == StatusPedido.CANCELADO:
+            raise ValueError("Pedido cancelado.")
+        pendente = pedido.status == StatusPedido.PENDENTE
         if pedido.total <= 0:
             raise ValueError("Pedido sem itens ou valor inválido.")
         # Validações locais
@@ -34,14 +39,13 @@ class PagamentoService:
         # MOCK do gateway: aprova se último dígito é par; recusa se ímpar (apenas para testes)
         aprovado = int(numero_s[-1]) % 2 == 0
         if aprovado:
+            # Pedido confirmado (reserva de estoque mantida) no mesmo commit do pagamento aprovado.
+            # Se a reserva expirou durante o processamento, o pedido já foi cancelado e o estoque devolvido
+            if pendente and not EstoqueRepository(self.db).confirmar_pedido(pedido_id):
+                self.db.rollback()
+                self.repo.atualizar_status(pagamento.id, StatusPagamento.RECUSADO, mensagem="Pedido cancelado: reserva de estoque expirada.", gateway_id="MOCK-OK")
+                raise ValueError("Pedido cancelado: a reserva de estoque expirou.")
             self.repo.atualizar_status(pagamento.id, StatusPagamento.APROVADO, mensagem="Pagamento aprovado (mock).", gateway_id="MOCK-OK")
-            # atualizar status do pedido, se o modelo aceitar string/Enum
-            try:
-                from app.domain.models.enums import StatusPedido
-                pedido.status = StatusPedido.CONFIRMADO if hasattr(StatusPedido, "CONFIRMADO") else StatusPedido.PENDENTE
-            except Exception:
-                pass
-            self.db.commit()
         else:
             self.repo.atualizar_status(pagamento.id, StatusPagamento.RECUSADO, mensagem="Cartão recusado (mock).", gateway_id="MOCK-FAIL")
 
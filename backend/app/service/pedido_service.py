@@ -1,9 +1,17 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from sqlalchemy.orm import Session, selectinload
+
+from backend.app.domain.models.enums import StatusPedido
+from backend.app.domain.models.vendas.pedidos import Pedido
+from backend.app.repositories.estoque_repository import EstoqueRepository
 from backend.app.repositories.pedido_repository import PedidoRepository
+from backend.app.service.estoque_service import cancelar_pedido, expiracao_reserva, notificar_estoque
 from backend.app.domain.schemas.pedidos_schemas import ItemCarrinhoInput, PedidoOut
 
 class PedidoService:
     def __init__(self, db: Session):
+        self.db = db
         self.repo = PedidoRepository(db)
 
     # -------------------- Carrinho --------------------
@@ -18,45 +26,75 @@ class PedidoService:
 
     # -------------------- Pedido --------------------
     def finalizar_pedido(self, usuario_id: int) -> PedidoOut:
-        itens_carrinho = self.repo.listar_itens_carrinho(usuario_id)
+        """
+        Transforma o carrinho em pedido em uma única transação
+
+        Falhou qualquer etapa, nada é gravado: nem pedido pela metade, nem
+        carrinho esvaziado sem pedido, nem estoque baixado. O estoque fica
+        reservado até o pagamento ou até a reserva expirar.
+
+        Raises:
+            EstoqueInsuficiente: algum livro do carrinho não tem unidades suficientes
+        """
+        itens_carrinho = self.repo.listar_carrinho_com_livros(usuario_id)
         if not itens_carrinho:
             raise Exception("Carrinho vazio")
 
-        total = sum(item.quantidade * float(item.livro.preco) for item in itens_carrinho)
-        pedido = self.repo.criar_pedido(usuario_id, total)
-
-        for item in itens_carrinho:
-            self.repo.adicionar_item_pedido(
-                pedido.id,
-                item.livro_id,
-                item.quantidade,
-                float(item.livro.preco)
+        try:
+            pedido_id = self.repo.criar_pedido_do_carrinho(usuario_id, itens_carrinho).id
+            reservados = EstoqueRepository(self.db).reservar(
+                pedido_id,
+                ((item.livro_id, item.quantidade) for item in itens_carrinho),
+                expiracao_reserva()
             )
-            self.repo.remover_item_carrinho(usuario_id, item.livro_id)
-
-        return pedido
-
-    def listar_pedidos_usuario(self, usuario_id: int, status: str = None, limite: int = 50):
-        pedidos = self.repo.listar_pedidos_usuario(usuario_id)
-        if status:
-            pedidos = [p for p in pedidos if p.status.lower() == status.lower()]
-        return pedidos[:limite]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        notificar_estoque(reservados)
+
+        # Pedido com os itens para a resposta (commit expira os atributos)
+        return (
+            self.db.query(Pedido)
+            .options(selectinload(Pedido.itens))
+            .filter(Pedido.id == pedido_id)
+            .one()
+        )
+
+    def listar_pedidos_usuario(self, usuario_id: int, status: str = None, limite: int = 50, cursor: dict = None,
+                               desde: datetime = None, ate: datetime = None):
+        return self.repo.listar_pedidos_usuario(
+            usuario_id, status=status, limite=limite, cursor=cursor, desde=desde, ate=ate
+        )
 
     def listar_pedidos_por_usuario(self, usuario_id: int):
-        """Alias compatível com router HTML"""
-        return self.listar_pedidos_usuario(usuario_id)
+        """Alias compatível com router HTML: páginas /pedidos e perfil mostram o histórico completo"""
+        return self.listar_pedidos_usuario(usuario_id, limite=None)
 
     def obter_pedido(self, pedido_id: int, usuario_id: int):
         return self.repo.obter_pedido(pedido_id, usuario_id)
 
-    def atualizar_status_pedido(self, pedido_id: int, usuario_id: int, novo_status: str):
-        # Aqui você pode adicionar regras de validação de status
-        return self.repo.atualizar_status_pedido(pedido_id, novo_status)
+    def atualizar_status_pedido(self, pedido_id: int, novo_status: str):
+        """
+        Muda o status do pedido; cancelamento devolve o estoque reservado
+
+        Returns:
+            O pedido atualizado, ou None se ele não pôde ser cancelado (já
+            cancelado ou entregue, inclusive por outra requisição simultânea)
+        """
+        novo_status = StatusPedido(novo_status.upper())
+        if novo_status != StatusPedido.CANCELADO:
+            return self.repo.atualizar_status_pedido(pedido_id, novo_status)
+        if not cancelar_pedido(self.db, pedido_id):
+            return None
+        return self.db.query(Pedido).filter(Pedido.id == pedido_id).first()
 
     # -------------------- Estatísticas --------------------
     def estatisticas_usuario(self, usuario_id: int):
-        pedidos = self.repo.listar_pedidos_usuario(usuario_id)
-        if not pedidos:
+        """Totais dos pedidos do usuário a partir de uma agregação por status (sem carregar pedidos)"""
+        resumo = self.repo.resumo_por_status(usuario_id)
+        total_pedidos = sum(quantidade for _, quantidade, _ in resumo)
+        if not total_pedidos:
             return {
                 "total_pedidos": 0,
                 "valor_total_gasto": 0,
@@ -64,19 +102,13 @@ class PedidoService:
                 "ticket_medio": 0
             }
 
-        valores = [float(p.total) for p in pedidos]
-        status_count = {}
-        for p in pedidos:
-            status_count[p.status] = status_count.get(p.status, 0) + 1
-
+        valor_total = sum(float(valor) for _, _, valor in resumo)
         return {
-            "total_pedidos": len(pedidos),
-            "valor_total_gasto": sum(valores),
-            "pedidos_por_status": status_count,
-            "ticket_medio": round(sum(valores) / len(valores), 2)
+            "total_pedidos": total_pedidos,
+            "valor_total_gasto": valor_total,
+            "pedidos_por_status": {getattr(status, "value", status): quantidade for status, quantidade, _ in resumo},
+            "ticket_medio": round(valor_total / total_pedidos, 2)
         }
 
     def pedidos_recentes(self, usuario_id: int, quantidade: int = 5):
-        pedidos = self.repo.listar_pedidos_usuario(usuario_id)
-        pedidos_ordenados = sorted(pedidos, key=lambda x: x.id, reverse=True)
-        return pedidos_ordenados[:quantidade]
+        return self.repo.listar_pedidos_usuario(usuario_id, limite=quantidade)
@@ -0,0 +1,101 @@
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as insert_pg
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+from backend.app.database import REPLICA_VERIFICACAO, engine
+from backend.app.domain.models.replicacao import ReplicacaoHeartbeat
+from backend.app.utils.roteamento_replicas import RoteadorReplicas, roteador_replicas
+
+logger = logging.getLogger("ReplicacaoService")
+
+
+class MonitorReplicas:
+    """
+    Mede o lag das réplicas de leitura em uma thread
+
+    A cada ciclo lê o heartbeat em cada réplica, compara com o último valor
+    gravado no primário e só então grava um novo. Réplica com a última marca
+    está em dia; sem ela, o atraso é a idade da marca que ela tem. Réplica
+    que não responde fica com lag infinito e sai do roteamento até voltar.
+    """
+
+    def __init__(self, primario=engine, roteador: RoteadorReplicas = roteador_replicas,
+                 intervalo: float = REPLICA_VERIFICACAO):
+        self.primario = primario
+        self.roteador = roteador
+        self.intervalo = intervalo
+        self._ultimo_gravado: Optional[datetime] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if not self.roteador.configurado or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="replicas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def verificar(self) -> None:
+        """Um ciclo: mede todas as réplicas e grava o próximo heartbeat"""
+        for replica in self.roteador.replicas:
+            lag = self._medir(replica)
+            if self.roteador.disponivel(replica) != (lag <= self.roteador.lag_maximo):
+                logger.warning(
+                    f"Réplica {replica.url.render_as_string(hide_password=True)} "
+                    f"{'voltou' if lag <= self.roteador.lag_maximo else 'saiu'} do roteamento (lag {lag:.1f}s)"
+                )
+            self.roteador.registrar_lag(replica, lag)
+        self._gravar_heartbeat()
+
+    def _medir(self, replica) -> float:
+        if self._ultimo_gravado is None:
+            return math.inf
+        try:
+            with replica.connect() as conexao:
+                lido = conexao.execute(
+                    select(ReplicacaoHeartbeat.gravado_em).where(ReplicacaoHeartbeat.id == 1)
+                ).scalar()
+        except Exception as e:
+            logger.debug(f"Falha ao medir réplica: {e}")
+            return math.inf
+        if lido is None:
+            return math.inf
+        # Já tem a última marca (ou uma mais nova, de outro processo): em dia.
+        # Senão reflete o primário de "lido": estimativa conservadora do atraso
+        if lido >= self._ultimo_gravado:
+            return 0.0
+        return (datetime.utcnow() - lido).total_seconds()
+
+    def _gravar_heartbeat(self) -> None:
+        agora = datetime.utcnow()
+        insert = insert_pg if self.primario.dialect.name == "postgresql" else insert_sqlite
+        comando = insert(ReplicacaoHeartbeat).values(id=1, gravado_em=agora)
+        with self.primario.begin() as conexao:
+            conexao.execute(comando.on_conflict_do_update(
+                index_elements=[ReplicacaoHeartbeat.id], set_={"gravado_em": agora}
+            ))
+        self._ultimo_gravado = agora
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self.verificar()
+            except Exception as e:
+                logger.error(f"Erro ao verificar réplicas: {e}")
+            self._parar.wait(self.intervalo)
+
+
+monitor_replicas = MonitorReplicas()
@@ -7,6 +7,7 @@ from passlib.context import CryptContext
 from backend.app.domain.models.usuario.usuario import Usuario
 from backend.app.domain.schemas.cria_usuario import UsuarioCreate
 from backend.app.repositories.usuario_repository import UsuarioRepository
+from backend.app.utils.paginacao import filtrar_apos_cursor
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -26,14 +27,15 @@ class UsuarioService:
         usuario_data.senha_hash = pwd_context.hash(usuario_data.senha)
         return self.repo.criar_usuario(usuario_data)
 
-    def listar_usuarios(self, email: Optional[str] = None, nome: Optional[str] = None, limite: int = 50) -> List[
-        Usuario]:
-        """Lista usuários com filtros opcionais"""
+    def listar_usuarios(self, email: Optional[str] = None, nome: Optional[str] = None, limite: int = 50,
+                        apos_id: Optional[int] = None) -> List[Usuario]:
+        """Lista usuários com filtros opcionais, ordenados por id (apos_id = cursor)"""
         query = self.db.query(Usuario)
         if email:
             query = query.filter(Usuario.email.ilike(f"%{email}%"))
         if nome:
             query = query.filter(Usuario.nome.ilike(f"%{nome}%"))
+        query = filtrar_apos_cursor(query, {"id": apos_id} if apos_id else None, Usuario.id)
         return query.limit(limite).all()
 
     def editar_usuario(self, usuario_id: int, usuario_data: UsuarioCreate) -> Usuario:
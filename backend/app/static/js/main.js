@@ -36,6 +36,7 @@ document.addEventListener("DOMContentLoaded", () => {
     // ====== Formulário de pesquisa ======
     const searchForm = document.querySelector("#searchForm");
     if (searchForm) {
+        configurarAutocompletar(searchForm.querySelector("input[name='q']"));
         searchForm.addEventListener("submit", (e) => {
             e.preventDefault();
             const query = searchForm.querySelector("input[name='q']").value.trim();
@@ -48,3 +49,72 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 });
+
+// ====== Autocompletar (títulos e autores) ======
+function configurarAutocompletar(input) {
+    if (!input) return;
+
+    const lista = document.createElement("ul");
+    lista.className = "list-group position-absolute w-100 shadow-sm autocompletar";
+    lista.style.zIndex = "1050";
+    lista.hidden = true;
+    input.parentElement.style.position = "relative";
+    input.parentElement.appendChild(lista);
+    input.setAttribute("autocomplete", "off");
+
+    let temporizador = null;
+    let requisicao = null;
+
+    const fechar = () => {
+        lista.hidden = true;
+        lista.innerHTML = "";
+    };
+
+    const mostrar = (sugestoes) => {
+        lista.innerHTML = "";
+        sugestoes.forEach(sugestao => {
+            const item = document.createElement("li");
+            item.className = "list-group-item list-group-item-action";
+            item.textContent = sugestao.texto;
+            if (sugestao.tipo === "autor") {
+                const rotulo = document.createElement("small");
+                rotulo.className = "text-muted ms-2";
+                rotulo.textContent = "autor";
+                item.appendChild(rotulo);
+            }
+            item.addEventListener("mousedown", (e) => {
+                e.preventDefault();
+                input.value = sugestao.texto;
+                fechar();
+            });
+            lista.appendChild(item);
+        });
+        lista.hidden = sugestoes.length === 0;
+    };
+
+    input.addEventListener("input", () => {
+        clearTimeout(temporizador);
+        const prefixo = input.value.trim();
+        if (!prefixo) {
+            fechar();
+            return;
+        }
+
+        // Espera o usuário parar de digitar e cancela a requisição anterior
+        temporizador = setTimeout(() => {
+            if (requisicao) requisicao.abort();
+            requisicao = new AbortController();
+            fetch(`/api/livros/autocompletar?q=${encodeURIComponent(prefixo)}&limite=8`, { signal: requisicao.signal })
+                .then(resposta => resposta.ok ? resposta.json() : { sugestoes: [] })
+                .then(dados => mostrar(dados.sugestoes))
+                .catch(erro => {
+                    if (erro.name !== "AbortError") console.error("Erro no autocompletar:", erro);
+                });
+        }, 120);
+    });
+
+    input.addEventListener("blur", fechar);
+    input.addEventListener("keydown", (e) => {
+        if (e.key === "Escape") fechar();
+    });
+}
@@ -1,7 +1,14 @@
+import asyncio
+import random
+import re
+import unicodedata
 import requests
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import httpx
+from psycopg2.extras import RealDictCursor, execute_values
 import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 from dotenv import load_dotenv
 
 dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -16,29 +23,245 @@ db_config = {
     'port': os.getenv('POSTGRES_PORT')
 }
 
+# Endpoint da API de livros (aponte para um stub HTTP local nos testes)
+GOOGLE_BOOKS_URL = os.getenv('GOOGLE_BOOKS_URL', 'https://www.googleapis.com/books/v1/volumes')
+
+# Busca concorrente de capas
+CAPAS_CONCORRENCIA = int(os.getenv('CAPAS_CONCORRENCIA', '8'))     # requisições simultâneas
+CAPAS_TIMEOUT = float(os.getenv('CAPAS_TIMEOUT', '5'))             # segundos por requisição
+CAPAS_TENTATIVAS = int(os.getenv('CAPAS_TENTATIVAS', '3'))         # tentativas por livro
+CAPAS_BACKOFF = float(os.getenv('CAPAS_BACKOFF', '0.5'))           # espera base entre tentativas
+CAPAS_LOTE_UPDATE = int(os.getenv('CAPAS_LOTE_UPDATE', '100'))     # capas por UPDATE/commit
+
+# Validade do cache de capas (biblioteca.capas_cache): acertos e "sem capa"
+CAPAS_CACHE_DIAS = float(os.getenv('CAPAS_CACHE_DIAS', '30'))
+CAPAS_CACHE_NEGATIVO_DIAS = float(os.getenv('CAPAS_CACHE_NEGATIVO_DIAS', '7'))
+
+# Respostas que valem nova tentativa (limite de taxa e falhas do servidor)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class FalhaBuscaCapa(Exception):
+    """A API não respondeu (timeout, rede, limite de taxa); diferente de "livro sem capa" """
+
+
+def chave_capa(titulo: str, autor: str, isbn: Optional[str] = None) -> str:
+    """
+    Chave do cache de capas: título, autor e ISBN normalizados
+
+    Examples:
+        >>> chave_capa("  Dom Casmurro ", "Machado de ASSIS", "978-85-254-0625-9")
+        'dom casmurro|machado de assis|9788525406259'
+    """
+    def normalizar(texto):
+        decomposto = unicodedata.normalize("NFKD", (texto or "").lower())
+        sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+        return " ".join(re.findall(r"\w+", sem_acentos))
+
+    return f"{normalizar(titulo)}|{normalizar(autor)}|{re.sub(r'[^0-9Xx]', '', isbn or '').upper()}"
+
+
+def expiracao_cache(encontrada: bool, agora: Optional[datetime] = None) -> datetime:
+    """Validade de uma entrada do cache (resultados negativos expiram antes)"""
+    dias = CAPAS_CACHE_DIAS if encontrada else CAPAS_CACHE_NEGATIVO_DIAS
+    return (agora or datetime.utcnow()) + timedelta(days=dias)
 
-def buscar_url_capa(titulo, autor):
-    """Busca a URL da capa de um livro na API do Google Books."""
-    query = f"{titulo} {autor}"
-    url_api = f"https://www.googleapis.com/books/v1/volumes?q={query}&maxResults=1"
 
+def _extrair_thumbnail(dados: dict) -> Optional[str]:
+    if 'items' in dados and dados['items']:
+        item = dados['items'][0]
+        if 'imageLinks' in item.get('volumeInfo', {}):
+            return item['volumeInfo']['imageLinks'].get('thumbnail', '') or None
+    return None
+
+
+def consultar_capa(titulo: str, autor: str) -> Optional[str]:
+    """
+    Busca a URL da capa na API do Google Books
+
+    Returns:
+        URL da capa ou None se a API não conhece capa para o livro
+
+    Raises:
+        FalhaBuscaCapa: A consulta falhou (o resultado não deve ir para o cache)
+    """
     try:
-        response = requests.get(url_api)
+        response = requests.get(
+            GOOGLE_BOOKS_URL,
+            params={'q': f"{titulo} {autor}", 'maxResults': 1},
+            timeout=CAPAS_TIMEOUT
+        )
         response.raise_for_status()
+        return _extrair_thumbnail(response.json())
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise FalhaBuscaCapa(f"Erro ao buscar capa para '{titulo}' ({autor}): {e}") from e
 
-        dados = response.json()
-
-        if 'items' in dados and dados['items']:
-            item = dados['items'][0]
-            if 'imageLinks' in item['volumeInfo']:
-                url_capa = item['volumeInfo']['imageLinks'].get('thumbnail', '')
-                return url_capa
 
+def buscar_url_capa(titulo, autor):
+    """Busca a URL da capa de um livro na API do Google Books."""
+    try:
+        return consultar_capa(titulo, autor)
+    except FalhaBuscaCapa as e:
+        print(e)
         return None
 
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao buscar capa para '{titulo}' ({autor}): {e}")
-        return None
+
+# ---------------------- BUSCA ASSÍNCRONA ----------------------
+async def buscar_url_capa_async(cliente: httpx.AsyncClient, titulo: str, autor: str,
+                                tentativas: int = CAPAS_TENTATIVAS) -> Optional[str]:
+    """
+    Versão assíncrona de buscar_url_capa, com nova tentativa e backoff exponencial
+
+    Repete em timeouts, erros de conexão, 429 e 5xx (respeitando Retry-After).
+
+    Raises:
+        FalhaBuscaCapa: Nenhuma tentativa obteve resposta válida
+    """
+    params = {'q': f"{titulo} {autor}", 'maxResults': 1}
+
+    for tentativa in range(1, tentativas + 1):
+        espera = CAPAS_BACKOFF * (2 ** (tentativa - 1)) * (1 + random.random())
+        try:
+            response = await cliente.get(GOOGLE_BOOKS_URL, params=params)
+            if response.status_code not in STATUS_REPETIVEIS:
+                response.raise_for_status()
+                return _extrair_thumbnail(response.json())
+
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                espera = max(espera, float(retry_after))
+            motivo = f"HTTP {response.status_code}"
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            motivo = type(e).__name__
+        except (httpx.HTTPStatusError, ValueError) as e:
+            # 4xx ou JSON inválido: não adianta repetir
+            raise FalhaBuscaCapa(f"Erro ao buscar capa para '{titulo}' ({autor}): {e}") from e
+
+        if tentativa < tentativas:
+            await asyncio.sleep(espera)
+    raise FalhaBuscaCapa(f"Capa não obtida para '{titulo}' ({autor}) após {tentativas} tentativas: {motivo}")
+
+
+async def buscar_capas_concorrente(
+        livros: Iterable[Sequence],
+        gravar_lote: Callable[[List[Tuple[Sequence, Optional[str]]]], None],
+        concorrencia: int = CAPAS_CONCORRENCIA,
+        tamanho_lote: int = CAPAS_LOTE_UPDATE,
+        buscar: Optional[Callable[[httpx.AsyncClient, str, str], Awaitable[Optional[str]]]] = None
+) -> dict:
+    """
+    Busca as capas de vários livros com concorrência limitada
+
+    Os resultados são entregues a gravar_lote em lotes de (livro, capa_url),
+    com capa_url None quando não há capa, para que o banco receba poucos
+    UPDATEs e o cache registre também os resultados negativos. Livros cuja
+    busca falhou (FalhaBuscaCapa) ficam de fora e são contados em "falhas".
+
+    Args:
+        livros: Tuplas que começam com (id, titulo, autor)
+        gravar_lote: Função síncrona que persiste um lote
+        buscar: Função de busca (padrão: buscar_url_capa_async)
+
+    Returns:
+        Contagens de livros processados, capas encontradas e lotes gravados
+    """
+    buscar = buscar or buscar_url_capa_async
+    resumo = {'processados': 0, 'encontradas': 0, 'falhas': 0, 'lotes': 0}
+    pendentes: List[Tuple[Sequence, Optional[str]]] = []
+    fila: asyncio.Queue = asyncio.Queue(maxsize=concorrencia * 2)
+
+    def descarregar():
+        if pendentes:
+            gravar_lote(list(pendentes))
+            resumo['lotes'] += 1
+            pendentes.clear()
+
+    async def trabalhador(cliente: httpx.AsyncClient):
+        while True:
+            item = await fila.get()
+            if item is None:
+                return
+            resumo['processados'] += 1
+            try:
+                url = await buscar(cliente, item[1], item[2])
+            except FalhaBuscaCapa as e:
+                print(e)
+                resumo['falhas'] += 1
+                continue
+            if url:
+                resumo['encontradas'] += 1
+            pendentes.append((item, url))
+            if len(pendentes) >= tamanho_lote:
+                descarregar()
+
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(timeout=CAPAS_TIMEOUT, limits=limites) as cliente:
+        trabalhadores = [asyncio.create_task(trabalhador(cliente)) for _ in range(concorrencia)]
+        for livro in livros:
+            await fila.put(livro)
+        for _ in trabalhadores:
+            await fila.put(None)
+        await asyncio.gather(*trabalhadores)
+
+    descarregar()
+    return resumo
+
+
+# ---------------------- SCRIPT (PSYCOPG2) ----------------------
+def _cache_disponivel_pg(conn) -> bool:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('biblioteca.capas_cache') IS NOT NULL")
+        return cursor.fetchone()[0]
+
+
+def _ler_cache_pg(conn, chaves: List[str]) -> Dict[str, Optional[str]]:
+    """Entradas válidas do cache para as chaves informadas: {chave: capa_url ou None}"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT chave, capa_url FROM biblioteca.capas_cache "
+            "WHERE chave = ANY(%s) AND expira_em > (NOW() AT TIME ZONE 'UTC')",
+            (chaves,)
+        )
+        return dict(cursor.fetchall())
+
+
+def _guardar_cache_pg(cursor, resultados: List[Tuple[str, Optional[str]]]) -> None:
+    agora = datetime.utcnow()
+    execute_values(
+        cursor,
+        "INSERT INTO biblioteca.capas_cache (chave, capa_url, encontrada, consultado_em, expira_em) "
+        "VALUES %s ON CONFLICT (chave) DO UPDATE SET capa_url = EXCLUDED.capa_url, "
+        "encontrada = EXCLUDED.encontrada, consultado_em = EXCLUDED.consultado_em, "
+        "expira_em = EXCLUDED.expira_em",
+        # Chaves repetidas no mesmo lote quebrariam o ON CONFLICT
+        list({
+            chave: (chave, url, url is not None, agora, expiracao_cache(url is not None, agora))
+            for chave, url in resultados
+        }.values())
+    )
+
+
+def _gravar_capas_pg(conn, lote: List[Tuple[int, Optional[str]]],
+                     cache: List[Tuple[str, Optional[str]]] = ()) -> None:
+    """Um UPDATE para o lote inteiro, o cache e a versão do catálogo (índices em memória)"""
+    capas = [(livro_id, url) for livro_id, url in lote if url]
+    with conn.cursor() as cursor:
+        if capas:
+            execute_values(
+                cursor,
+                "UPDATE livros AS l SET capa_url = v.capa_url, data_atualizacao = NOW() "
+                "FROM (VALUES %s) AS v(id, capa_url) WHERE l.id = v.id",
+                capas
+            )
+            cursor.execute("SELECT to_regclass('biblioteca.catalogo_versao') IS NOT NULL AS existe")
+            if cursor.fetchone()[0]:
+                cursor.execute(
+                    "UPDATE biblioteca.catalogo_versao SET versao = versao + 1, atualizado_em = NOW() WHERE id = 1"
+                )
+        if cache:
+            _guardar_cache_pg(cursor, list(cache))
+    conn.commit()
+    print(f" -> {len(capas)} capas gravadas")
 
 
 def atualizar_capas_no_banco():
@@ -50,36 +273,42 @@ def atualizar_capas_no_banco():
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         print("Conexão bem-sucedida.")
 
-        cursor.execute("SELECT id, titulo, autor FROM livros WHERE capa_url IS NULL OR capa_url = ''")
+        cursor.execute("SELECT id, titulo, autor, isbn FROM livros WHERE capa_url IS NULL OR capa_url = ''")
         livros_sem_capa = cursor.fetchall()
+        cursor.close()
 
         if not livros_sem_capa:
             print("Todos os livros já têm capa registrada.")
             return
 
-        print(f"Encontrados {len(livros_sem_capa)} livros sem capa. Iniciando a busca...")
+        # Livros já consultados (com ou sem capa) não geram nova requisição
+        livros = [(l['id'], l['titulo'], l['autor'], chave_capa(l['titulo'], l['autor'], l['isbn']))
+                  for l in livros_sem_capa]
+        usar_cache = _cache_disponivel_pg(conn)
+        em_cache = _ler_cache_pg(conn, [l[3] for l in livros]) if usar_cache else {}
+        acertos = [(l[0], em_cache[l[3]]) for l in livros if em_cache.get(l[3])]
+        if acertos:
+            _gravar_capas_pg(conn, acertos)
+        livros = [l for l in livros if l[3] not in em_cache]
 
-        for livro in livros_sem_capa:
-            print(f"Buscando capa para: '{livro['titulo']}' de '{livro['autor']}'...")
-            url_imagem = buscar_url_capa(livro['titulo'], livro['autor'])
+        print(f"Encontrados {len(livros_sem_capa)} livros sem capa ({len(acertos)} no cache, "
+              f"{len(livros_sem_capa) - len(livros) - len(acertos)} sem capa conhecida). "
+              f"Buscando {len(livros)} ({CAPAS_CONCORRENCIA} simultâneas)...")
 
-            if url_imagem:
-                print(f" -> Capa encontrada: {url_imagem}")
-                cursor.execute(
-                    "UPDATE livros SET capa_url = %s WHERE id = %s",
-                    (url_imagem, livro['id'])
-                )
-            else:
-                print(f" -> Capa não encontrada para: '{livro['titulo']}'")
+        def gravar(lote):
+            _gravar_capas_pg(
+                conn,
+                [(livro[0], url) for livro, url in lote],
+                [(livro[3], url) for livro, url in lote] if usar_cache else ()
+            )
 
-        conn.commit()
-        print("Processo de atualização de capas concluído.")
+        resumo = asyncio.run(buscar_capas_concorrente(livros, gravar))
+        print(f"Processo de atualização de capas concluído: {resumo}")
 
     except psycopg2.Error as e:
         print(f"Erro no banco de dados: {e}")
     finally:
         if conn:
-            cursor.close()
             conn.close()
             print("Conexão com o banco de dados fechada.")
 
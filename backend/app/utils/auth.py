@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 from backend.app.dependencies import get_db
 from backend.app.domain.models.usuario.usuario import Usuario  # CORRIGIDO: path correto
 from backend.app.service.auth_service import AuthService
-from backend.app.service.usuario_service import UsuarioService
+from backend.app.utils.principal import principal_da_requisicao
 
 SECRET_KEY = "super_secreto_mude_em_producao"
 ALGORITHM = "HS256"
@@ -48,25 +48,9 @@ def verificar_token(token: str) -> dict:
 
 
 def get_current_user_from_request(request: Request, db: Session) -> Optional[Usuario]:
-    """Obtém o usuário atual baseado no token JWT - CORRIGIDO"""
+    """Obtém o usuário atual baseado no token JWT (decodificado e buscado uma vez por requisição)"""
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            return None
-
-        # Verificar o token
-        payload = verificar_token(token)
-        usuario_id = int(payload.get("sub"))
-
-        # Buscar usuário no banco usando service
-        service = UsuarioService(db)
-        usuario = service.obter_usuario_por_id(usuario_id)
-
-        return usuario
-
-    except HTTPException:
-        # Token inválido ou expirado
-        return None
+        return principal_da_requisicao(request).usuario(db)
     except Exception as e:
         # Qualquer outro erro
         print(f"Erro ao obter usuário: {e}")
@@ -0,0 +1,171 @@
+# app/utils/busca_textual.py
+import logging
+import re
+import unicodedata
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("BuscaTextual")
+
+# None = ainda não verificado; True/False = resultado da verificação
+_busca_disponivel: Optional[bool] = None
+_trigramas_disponivel: Optional[bool] = None
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Minúsculas e sem acentos (equivalente a lower(unaccent(texto)))
+
+    Examples:
+        >>> normalizar_texto("Aluísio Azevedo")
+        'aluisio azevedo'
+    """
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def extrair_termos(termo: str) -> List[str]:
+    """
+    Quebra o termo de busca em palavras simples (letras e números)
+
+    Examples:
+        >>> extrair_termos("Dom  Casmurro!")
+        ['dom', 'casmurro']
+    """
+    if not termo:
+        return []
+    return re.findall(r"\w+", termo.lower())
+
+
+def montar_consulta_postgres(termos: List[str]) -> str:
+    """Monta a expressão para to_tsquery (todas as palavras, com prefixo)"""
+    return " & ".join(f"{t}:*" for t in termos)
+
+
+def montar_consulta_sqlite(termos: List[str]) -> str:
+    """Monta a expressão MATCH do FTS5 (todas as palavras, com prefixo)"""
+    return " ".join(f'"{t}"*' for t in termos)
+
+
+# ---------------------- SQLITE (FTS5) ----------------------
+_DDL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS biblioteca.livros_fts USING fts5(
+        titulo, autor,
+        content='livros', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca.livros_fts_ai AFTER INSERT ON livros BEGIN
+        INSERT INTO livros_fts(rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca.livros_fts_ad AFTER DELETE ON livros BEGIN
+        INSERT INTO livros_fts(livros_fts, rowid, titulo, autor)
+        VALUES ('delete', old.id, old.titulo, old.autor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca.livros_fts_au AFTER UPDATE ON livros BEGIN
+        INSERT INTO livros_fts(livros_fts, rowid, titulo, autor)
+        VALUES ('delete', old.id, old.titulo, old.autor);
+        INSERT INTO livros_fts(rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+    END
+    """,
+]
+
+
+def _preparar_sqlite(conn) -> bool:
+    existe = conn.execute(text(
+        "SELECT 1 FROM biblioteca.sqlite_master WHERE type = 'table' AND name = 'livros_fts'"
+    )).first()
+
+    for ddl in _DDL_SQLITE:
+        conn.execute(text(ddl))
+
+    if not existe:
+        # Primeira criação: indexa os livros já existentes
+        conn.execute(text("INSERT INTO biblioteca.livros_fts(livros_fts) VALUES ('rebuild')"))
+    return True
+
+
+# ---------------------- POSTGRESQL (tsvector) ----------------------
+def _preparar_postgres(conn) -> bool:
+    # A coluna e o índice são criados por migrations/busca_textual_livros.sql
+    coluna = conn.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = 'biblioteca' AND table_name = 'livros' AND column_name = 'busca_vetor'"
+    )).first()
+    if coluna is None:
+        logger.warning("Coluna busca_vetor ausente - execute migrations/busca_textual_livros.sql")
+    return coluna is not None
+
+
+def preparar_busca_textual(bind) -> bool:
+    """
+    Prepara/verifica a estrutura de busca textual no banco
+
+    Args:
+        bind: Engine ou Connection do SQLAlchemy
+
+    Returns:
+        True se a busca textual está disponível
+    """
+    global _busca_disponivel
+
+    try:
+        preparar = _preparar_sqlite if bind.dialect.name == "sqlite" else _preparar_postgres
+        if isinstance(bind, Engine):
+            with bind.begin() as conn:
+                disponivel = preparar(conn)
+        else:
+            disponivel = preparar(bind)
+    except Exception as e:
+        logger.warning(f"Busca textual indisponível, usando ILIKE: {e}")
+        disponivel = False
+
+    _busca_disponivel = disponivel
+    return disponivel
+
+
+def busca_textual_disponivel(bind) -> bool:
+    """Retorna (e memoriza) se a busca textual pode ser usada"""
+    if _busca_disponivel is None:
+        return preparar_busca_textual(bind)
+    return _busca_disponivel
+
+
+# ---------------------- TRIGRAMAS (pg_trgm) ----------------------
+def trigramas_disponivel(bind) -> bool:
+    """Retorna (e memoriza) se a extensão pg_trgm pode ser usada na busca fuzzy"""
+    global _trigramas_disponivel
+
+    if _trigramas_disponivel is None:
+        if bind.dialect.name != "postgresql":
+            _trigramas_disponivel = False
+        else:
+            try:
+                # migrations/busca_fuzzy_livros.sql cria a extensão e os índices
+                with bind.connect() as conn:
+                    extensao = conn.execute(text(
+                        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                    )).first()
+                    funcao = conn.execute(text(
+                        "SELECT 1 FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace "
+                        "WHERE n.nspname = 'biblioteca' AND p.proname = 'f_unaccent'"
+                    )).first()
+                _trigramas_disponivel = extensao is not None and funcao is not None
+            except Exception as e:
+                logger.warning(f"Não foi possível verificar pg_trgm: {e}")
+                _trigramas_disponivel = False
+
+        if not _trigramas_disponivel:
+            logger.info("pg_trgm indisponível - busca fuzzy usará o índice de n-gramas em memória")
+
+    return _trigramas_disponivel
@@ -0,0 +1,78 @@
+# app/utils/cache_capas.py
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as insert_pg
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.Livro.capa_cache import CapaCache
+from backend.app.utils.atualizar_capas_pg import chave_capa, consultar_capa, expiracao_cache
+
+# Chaves por consulta IN (abaixo do limite de parâmetros do SQLite)
+LOTE_CHAVES = 500
+
+
+def consultar(db: Session, chaves: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Entradas válidas do cache: {chave: capa_url}, com None para "sem capa"
+
+    Chaves ausentes ou expiradas não aparecem no resultado.
+    """
+    chaves = list(dict.fromkeys(chaves))
+    agora = datetime.utcnow()
+    encontradas = {}
+    for inicio in range(0, len(chaves), LOTE_CHAVES):
+        linhas = db.execute(
+            select(CapaCache.chave, CapaCache.capa_url).where(
+                CapaCache.chave.in_(chaves[inicio:inicio + LOTE_CHAVES]),
+                CapaCache.expira_em > agora
+            )
+        )
+        encontradas.update((chave, url) for chave, url in linhas)
+    return encontradas
+
+
+def guardar(db: Session, resultados: Iterable[Tuple[str, Optional[str]]]) -> None:
+    """Grava (upsert) resultados de busca, inclusive os negativos; não faz commit"""
+    agora = datetime.utcnow()
+    # Chaves repetidas no mesmo lote quebrariam o ON CONFLICT
+    linhas = list({
+        chave: {
+            "chave": chave,
+            "capa_url": url,
+            "encontrada": url is not None,
+            "consultado_em": agora,
+            "expira_em": expiracao_cache(url is not None, agora),
+        }
+        for chave, url in resultados
+    }.values())
+    if not linhas:
+        return
+
+    insert = insert_pg if db.get_bind().dialect.name == "postgresql" else insert_sqlite
+    comando = insert(CapaCache).values(linhas)
+    db.execute(comando.on_conflict_do_update(
+        index_elements=[CapaCache.chave],
+        set_={campo: comando.excluded[campo] for campo in ("capa_url", "encontrada", "consultado_em", "expira_em")}
+    ))
+
+
+def resolver_capa(db: Session, titulo: str, autor: str, isbn: Optional[str] = None) -> Optional[str]:
+    """
+    URL da capa pelo cache persistente ou, se ausente/expirada, pela API
+
+    O resultado entra na transação corrente do db.
+
+    Raises:
+        FalhaBuscaCapa: A API falhou (nada é guardado no cache)
+    """
+    chave = chave_capa(titulo, autor, isbn)
+    em_cache = consultar(db, [chave])
+    if chave in em_cache:
+        return em_cache[chave]
+
+    url = consultar_capa(titulo, autor)
+    guardar(db, [(chave, url)])
+    return url
@@ -0,0 +1,151 @@
+# app/utils/cache_http.py
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.app.utils import eventos_catalogo
+from backend.app.utils.cache_memoria import CacheMemoria
+
+# Tempo (segundos) que navegador/CDN podem reutilizar uma resposta sem revalidar
+MAX_AGE_CATALOGO = int(os.getenv("CATALOGO_CACHE_MAX_AGE", "30"))
+CACHE_CONTROL_CATALOGO = f"public, max-age={MAX_AGE_CATALOGO}"
+
+# Corpos JSON já serializados das listagens mais acessadas, por ETag (marca do catálogo, URL)
+cache_respostas = CacheMemoria(
+    maximo=int(os.getenv("CATALOGO_CACHE_RESPOSTAS", "256")),
+    ttl=float(os.getenv("CATALOGO_CACHE_RESPOSTAS_TTL", "60"))
+)
+
+
+@eventos_catalogo.registrar_ouvinte
+def _limpar_cache_respostas(evento: str, dado) -> None:
+    # Vendas não limpam o cache: a assinatura do estoque já entra no ETag, que é a chave
+    if evento != eventos_catalogo.ESTOQUE_ALTERADO:
+        cache_respostas.limpar()
+
+
+def gerar_etag(*partes: Any) -> str:
+    """
+    ETag fraco a partir das partes informadas (versão, URL, data...)
+
+    Examples:
+        >>> gerar_etag(1, "/api/livros/listar").startswith('W/"')
+        True
+    """
+    bruto = "|".join(str(p) for p in partes).encode()
+    return f'W/"{hashlib.sha1(bruto).hexdigest()[:20]}"'
+
+
+def assinatura_url(request: Request) -> str:
+    """Caminho + query string normalizada (ordem dos parâmetros não importa)"""
+    parametros = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in parametros)
+
+
+def _para_utc(momento: datetime) -> datetime:
+    # Datas do banco são gravadas em UTC sem fuso (datetime.utcnow)
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return momento.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def nao_modificado(request: Request, etag: str, ultima_modificacao: Optional[datetime] = None) -> bool:
+    """Avalia If-None-Match (prioritário) e If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        # Comparação fraca: W/"x" e "x" equivalem
+        recebidas = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        return etag.removeprefix("W/") in recebidas
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacao:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _para_utc(ultima_modificacao) <= _para_utc(desde)
+
+    return False
+
+
+def cabecalhos_cache(etag: str, ultima_modificacao: Optional[datetime] = None) -> Dict[str, str]:
+    cabecalhos = {"ETag": etag, "Cache-Control": CACHE_CONTROL_CATALOGO}
+    if ultima_modificacao:
+        cabecalhos["Last-Modified"] = format_datetime(_para_utc(ultima_modificacao), usegmt=True)
+    return cabecalhos
+
+
+def responder_com_cache(
+        request: Request,
+        etag: str,
+        gerar: Callable[[], Any],
+        modelo: Any = None,
+        ultima_modificacao: Optional[datetime] = None,
+        cabecalhos_extras: Optional[Callable[[Any], Dict[str, str]]] = None,
+        compartilhado: bool = False
+) -> Response:
+    """
+    Responde 304 quando o cliente já tem a versão atual; senão gera o JSON
+
+    Args:
+        etag: Validador da representação (ver gerar_etag)
+        gerar: Produz o conteúdo; só é chamada quando o corpo é necessário
+        modelo: Tipo do response_model (ex.: List[LivroOut]) usado na serialização
+        cabecalhos_extras: Cabeçalhos derivados do conteúdo (ex.: cursor da próxima página)
+        compartilhado: Guarda o corpo em cache_respostas, compartilhado entre clientes
+    """
+    cabecalhos = cabecalhos_cache(etag, ultima_modificacao)
+    if nao_modificado(request, etag, ultima_modificacao):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+    item = cache_respostas.obter(etag) if compartilhado else None
+    if item is None:
+        item = _serializar(gerar(), modelo, cabecalhos_extras)
+        if compartilhado:
+            cache_respostas.guardar(etag, item)
+
+    corpo, extras = item
+    return Response(content=corpo, media_type="application/json", headers={**cabecalhos, **extras})
+
+
+async def responder_com_cache_async(
+        request: Request,
+        etag: str,
+        gerar: Callable[[], Awaitable[Any]],
+        modelo: Any = None,
+        ultima_modificacao: Optional[datetime] = None,
+        cabecalhos_extras: Optional[Callable[[Any], Dict[str, str]]] = None,
+        compartilhado: bool = False
+) -> Response:
+    """responder_com_cache para rotas assíncronas: gerar é uma corrotina"""
+    cabecalhos = cabecalhos_cache(etag, ultima_modificacao)
+    if nao_modificado(request, etag, ultima_modificacao):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+    item = cache_respostas.obter(etag) if compartilhado else None
+    if item is None:
+        item = _serializar(await gerar(), modelo, cabecalhos_extras)
+        if compartilhado:
+            cache_respostas.guardar(etag, item)
+
+    corpo, extras = item
+    return Response(content=corpo, media_type="application/json", headers={**cabecalhos, **extras})
+
+
+def _serializar(conteudo: Any, modelo: Any, cabecalhos_extras) -> tuple:
+    """(corpo JSON, cabeçalhos extras) do conteúdo gerado"""
+    if modelo is not None:
+        adaptador = TypeAdapter(modelo)
+        corpo = adaptador.dump_json(adaptador.validate_python(conteudo, from_attributes=True))
+    else:
+        corpo = JSONResponse(jsonable_encoder(conteudo)).body
+    return corpo, cabecalhos_extras(conteudo) if cabecalhos_extras else {}
@@ -0,0 +1,49 @@
+# app/utils/cache_memoria.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheMemoria:
+    """
+    Cache LRU em memória com expiração por tempo (thread-safe)
+
+    Usado para resultados caros e derivados do catálogo; quem cria o cache é
+    responsável por limpá-lo nas escritas (ver eventos_catalogo).
+    """
+
+    __slots__ = ("maximo", "ttl", "_itens", "_lock")
+
+    def __init__(self, maximo: int = 256, ttl: float = 60.0):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor guardado ou None se ausente/expirado"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
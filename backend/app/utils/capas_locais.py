@@ -0,0 +1,168 @@
+# app/utils/capas_locais.py
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import requests
+
+from backend.app.utils.cache_memoria import CacheMemoria
+
+try:
+    from PIL import Image
+except ImportError:  # sem Pillow as miniaturas são servidas no tamanho original
+    Image = None
+
+logger = logging.getLogger("CapasLocais")
+
+# Diretório das capas baixadas (originais por hash do conteúdo + miniaturas)
+CAPAS_DIR = Path(os.getenv("CAPAS_DIR", Path(__file__).resolve().parent.parent / "media" / "capas"))
+CAPAS_DOWNLOAD_TIMEOUT = float(os.getenv("CAPAS_DOWNLOAD_TIMEOUT", "10"))
+CAPAS_TAMANHO_MAXIMO = int(os.getenv("CAPAS_TAMANHO_MAXIMO", str(5 * 1024 * 1024)))  # bytes
+
+# Variantes servidas pelo proxy: nome -> caixa (largura, altura)
+TAMANHOS = {
+    "p": (128, 192),   # cartões da listagem (w-32 h-48)
+    "m": (256, 384),   # telas de alta densidade / detalhes
+}
+ORIGINAL = "original"
+
+EXTENSOES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+# URLs que falharam há pouco (evita repetir o download a cada requisição)
+_falhas = CacheMemoria(maximo=1024, ttl=float(os.getenv("CAPAS_FALHA_TTL", "300")))
+
+# Um download por URL de cada vez (locks distribuídos por hash)
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def versao_capa(capa_url: Optional[str]) -> str:
+    """
+    Identificador curto da URL da capa, usado como ?v= no proxy
+
+    Mudou a capa, muda o endereço, então a resposta pode ser imutável.
+
+    Examples:
+        >>> versao_capa("http://books.google.com/x")
+        '287e61771f'
+    """
+    return hashlib.sha1((capa_url or "").encode()).hexdigest()[:10]
+
+
+def url_capa(livro, tamanho: str = "p") -> str:
+    """Endereço da capa no proxy local (GET /api/livros/{id}/capa)"""
+    return f"/api/livros/{livro.id}/capa?tamanho={tamanho}&v={versao_capa(livro.capa_url)}"
+
+
+def _caminho_indice(capa_url: str) -> Path:
+    return CAPAS_DIR / "urls" / hashlib.sha1(capa_url.encode()).hexdigest()
+
+
+def _gravar_atomico(destino: Path, conteudo: bytes) -> None:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, destino)
+    except BaseException:
+        Path(temporario).unlink(missing_ok=True)
+        raise
+
+
+def _original_em_disco(capa_url: str) -> Optional[Path]:
+    indice = _caminho_indice(capa_url)
+    if indice.exists():
+        original = CAPAS_DIR / "originais" / indice.read_text().strip()
+        if original.exists():
+            return original
+    return None
+
+
+def _baixar(capa_url: str) -> Path:
+    """Baixa a imagem e grava em originais/<sha256>.<ext> (endereçada pelo conteúdo)"""
+    resposta = requests.get(capa_url, timeout=CAPAS_DOWNLOAD_TIMEOUT, stream=True)
+    with resposta:
+        resposta.raise_for_status()
+        tipo = resposta.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if tipo not in EXTENSOES:
+            raise ValueError(f"Conteúdo não é imagem: {tipo or 'sem Content-Type'}")
+
+        conteudo = bytearray()
+        for pedaco in resposta.iter_content(64 * 1024):
+            conteudo.extend(pedaco)
+            if len(conteudo) > CAPAS_TAMANHO_MAXIMO:
+                raise ValueError("Imagem maior que CAPAS_TAMANHO_MAXIMO")
+
+    nome = hashlib.sha256(conteudo).hexdigest() + EXTENSOES[tipo]
+    original = CAPAS_DIR / "originais" / nome
+    if not original.exists():
+        _gravar_atomico(original, bytes(conteudo))
+    _gravar_atomico(_caminho_indice(capa_url), nome.encode())
+    return original
+
+
+def _miniatura(original: Path, tamanho: str) -> Path:
+    """Gera (uma vez) a variante JPEG que cabe na caixa do tamanho pedido"""
+    largura, altura = TAMANHOS[tamanho]
+    destino = CAPAS_DIR / "miniaturas" / f"{original.stem}_{largura}x{altura}.jpg"
+    if destino.exists():
+        return destino
+
+    with Image.open(original) as imagem:
+        imagem.thumbnail((largura, altura))
+        if imagem.mode not in ("RGB", "L"):
+            imagem = imagem.convert("RGB")
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+        os.close(descritor)
+        try:
+            imagem.save(temporario, "JPEG", quality=85, optimize=True, progressive=True)
+            os.replace(temporario, destino)
+        except BaseException:
+            Path(temporario).unlink(missing_ok=True)
+            raise
+    return destino
+
+
+def obter_capa_local(capa_url: str, tamanho: str = "p") -> Optional[Tuple[Path, str]]:
+    """
+    Arquivo local da capa no tamanho pedido, baixando-a na primeira vez
+
+    Args:
+        capa_url: URL externa gravada no livro
+        tamanho: Chave de TAMANHOS ou "original"
+
+    Returns:
+        (caminho, media_type), ou None se a imagem não pôde ser obtida
+    """
+    original = _original_em_disco(capa_url)
+    if original is None:
+        if _falhas.obter(capa_url):
+            return None
+        with _locks[hash(capa_url) % len(_locks)]:
+            original = _original_em_disco(capa_url)
+            if original is None:
+                try:
+                    original = _baixar(capa_url)
+                except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                    logger.warning(f"Falha ao baixar capa {capa_url}: {e}")
+                    _falhas.guardar(capa_url, True)
+                    return None
+
+    if tamanho in TAMANHOS and Image is not None:
+        try:
+            return _miniatura(original, tamanho), "image/jpeg"
+        except OSError as e:
+            logger.warning(f"Falha ao gerar miniatura de {original.name}: {e}")
+
+    tipo = next((t for t, ext in EXTENSOES.items() if ext == original.suffix), "application/octet-stream")
+    return original, tipo
@@ -13,8 +13,8 @@ done
 
 echo "✅ Banco de dados pronto!"
 
-# Atualiza capas dos livros
-python ./app/utils/atualizar_capas_pg.py
+# Atualiza capas dos livros em segundo plano (não atrasa a subida da API)
+python ./app/utils/atualizar_capas_pg.py &
 
 # Executa o comando principal do container (uvicorn)
 exec "$@"
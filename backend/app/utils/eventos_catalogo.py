@@ -0,0 +1,60 @@
+# app/utils/eventos_catalogo.py
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger("EventosCatalogo")
+
+# Tipos de evento
+LIVRO_ALTERADO = "alterado"   # criado ou atualizado (recebe o objeto Livro)
+LIVRO_REMOVIDO = "removido"   # deletado (recebe o id)
+CATALOGO_RECARREGADO = "recarregado"  # alteração em massa (recebe None)
+CAPA_ALTERADA = "capa"        # capa gravada pelo enriquecimento (recebe o Livro), sem mudar a versão global
+ESTOQUE_ALTERADO = "estoque"  # venda, cancelamento ou expiração (recebe o LivroCompacto), sem mudar a versão global
+
+_ouvintes: List[Callable] = []
+
+
+def registrar_ouvinte(ouvinte: Callable) -> Callable:
+    """
+    Registra uma função chamada a cada escrita no catálogo
+
+    A função recebe (evento, dado), onde dado é o Livro, o id removido ou None.
+    Pode ser usada como decorator.
+    """
+    if ouvinte not in _ouvintes:
+        _ouvintes.append(ouvinte)
+    return ouvinte
+
+
+def _notificar(evento: str, dado) -> None:
+    for ouvinte in list(_ouvintes):
+        try:
+            ouvinte(evento, dado)
+        except Exception as e:
+            # Um índice desatualizado não deve derrubar a escrita já confirmada
+            logger.error(f"Erro no ouvinte {getattr(ouvinte, '__name__', ouvinte)} ({evento}): {e}")
+
+
+def notificar_alteracao(livro) -> None:
+    """Avisa que um livro foi criado ou atualizado"""
+    _notificar(LIVRO_ALTERADO, livro)
+
+
+def notificar_remocao(livro_id: int) -> None:
+    """Avisa que um livro foi deletado"""
+    _notificar(LIVRO_REMOVIDO, livro_id)
+
+
+def notificar_recarga() -> None:
+    """Avisa que o catálogo mudou em massa (índices devem ser reconstruídos)"""
+    _notificar(CATALOGO_RECARREGADO, None)
+
+
+def notificar_capa(livro) -> None:
+    """Avisa que só a capa do livro mudou (outros workers a pegam por data_atualizacao)"""
+    _notificar(CAPA_ALTERADA, livro)
+
+
+def notificar_estoque(livro) -> None:
+    """Avisa que só o estoque do livro mudou (outros workers o pegam por data_atualizacao)"""
+    _notificar(ESTOQUE_ALTERADO, livro)
@@ -0,0 +1,61 @@
+# app/utils/exportacao.py
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+
+# Linhas acumuladas por pedaço enviado ao cliente
+LINHAS_POR_PEDACO = 500
+
+TIPOS_CONTEUDO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def gerar_csv(campos: Sequence[str], linhas: Iterable[Sequence]) -> Iterator[str]:
+    """Serializa tuplas em CSV (com cabeçalho), em pedaços de LINHAS_POR_PEDACO"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(campos)
+
+    for numero, linha in enumerate(linhas, start=1):
+        escritor.writerow(
+            valor.isoformat() if isinstance(valor, (datetime, date)) else valor
+            for valor in linha
+        )
+        if numero % LINHAS_POR_PEDACO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def gerar_ndjson(campos: Sequence[str], linhas: Iterable[Sequence]) -> Iterator[str]:
+    """Serializa tuplas em NDJSON (um objeto por linha), em pedaços"""
+    pedaco = []
+    for linha in linhas:
+        pedaco.append(json.dumps(dict(zip(campos, linha)), default=_valor_json, ensure_ascii=False))
+        if len(pedaco) == LINHAS_POR_PEDACO:
+            yield "\n".join(pedaco) + "\n"
+            pedaco = []
+
+    if pedaco:
+        yield "\n".join(pedaco) + "\n"
+
+
+SERIALIZADORES = {
+    "csv": gerar_csv,
+    "ndjson": gerar_ndjson,
+}
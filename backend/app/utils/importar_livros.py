@@ -0,0 +1,48 @@
+"""
+Importação em massa do catálogo a partir de CSV ou JSONL
+
+Uso (na raiz do repositório):
+    python -m backend.app.utils.importar_livros livros.csv --lote 2000
+    python -m backend.app.utils.importar_livros livros.jsonl --capas
+
+Colunas/campos aceitos: os de LivroCreate (titulo, autor, ano, preco,
+estoque, capa_url, isbn).
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from backend.app.database import SessionLocal
+from backend.app.service.importacao_service import (
+    FORMATOS, TAMANHO_LOTE_PADRAO, ImportacaoLivrosService, detectar_formato
+)
+from backend.app.service.livro_service import LivroService
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa livros de um arquivo CSV ou JSONL")
+    parser.add_argument("arquivo", help="Caminho do arquivo .csv ou .jsonl")
+    parser.add_argument("--formato", choices=FORMATOS, help="Formato (padrão: pela extensão)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Livros por INSERT/commit")
+    parser.add_argument("--capas", action="store_true", help="Buscar capas dos livros sem capa ao final")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    formato = args.formato or detectar_formato(args.arquivo)
+
+    inicio = time.monotonic()
+    with SessionLocal() as db, open(args.arquivo, "rb") as arquivo:
+        resumo = ImportacaoLivrosService(db).importar(arquivo, formato, tamanho_lote=args.lote)
+        resumo["segundos"] = round(time.monotonic() - inicio, 1)
+        print(json.dumps(resumo, ensure_ascii=False, indent=2))
+
+        if args.capas and resumo["inseridos"]:
+            LivroService(db).atualizar_capas_existentes()
+
+    return 0 if not resumo["rejeitados"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+# app/utils/indice_catalogo.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.models.Livro.catalogo_versao import CatalogoVersao
+from backend.app.utils import eventos_catalogo
+
+logger = logging.getLogger("IndiceCatalogo")
+
+# CATALOGO_EM_MEMORIA=false desliga o índice (todas as leituras vão ao banco)
+HABILITADO = os.getenv("CATALOGO_EM_MEMORIA", "true").lower() in ("1", "true", "sim")
+
+# Intervalo (segundos) entre consultas à versão global do catálogo
+INTERVALO_VERSAO = float(os.getenv("CATALOGO_INTERVALO_VERSAO", "2"))
+
+# Folga (segundos) da sincronização por data_atualizacao: cobre transações que
+# gravaram a data antes de confirmar e diferença de relógio entre processos
+MARGEM_SINCRONIA = float(os.getenv("CATALOGO_MARGEM_SINCRONIA", "30"))
+
+# Livros lidos por consulta na sincronização incremental (IN)
+LOTE_SINCRONIA = 500
+
+CAMPOS_LIVRO = (
+    "id", "titulo", "autor", "ano", "preco", "estoque", "capa_url",
+    "isbn", "slug", "data_criacao", "data_atualizacao",
+)
+_COLUNAS = [getattr(Livro, campo) for campo in CAMPOS_LIVRO]
+
+# Campos lidos pelos índices derivados (autocompletar): mudança neles incrementa a geração
+CAMPOS_DERIVADOS = ("titulo", "autor", "slug")
+
+# Assinatura do conteúdo: soma (módulo 2^64) das impressões dos livros
+_MASCARA_ASSINATURA = (1 << 64) - 1
+
+
+def _impressao(livro: "LivroCompacto") -> int:
+    """Hash estável de todos os campos de um livro (igual em qualquer processo)"""
+    dados = "|".join(str(getattr(livro, campo)) for campo in CAMPOS_LIVRO)
+    return int.from_bytes(hashlib.blake2b(dados.encode(), digest_size=8).digest(), "big")
+
+
+class LivroCompacto:
+    """Cópia somente leitura de um Livro, compatível com LivroOut e os templates"""
+
+    __slots__ = CAMPOS_LIVRO
+
+    def __init__(self, id, titulo, autor, ano, preco, estoque, capa_url,
+                 isbn, slug, data_criacao, data_atualizacao):
+        self.id = id
+        self.titulo = titulo
+        self.autor = autor
+        self.ano = ano
+        self.preco = float(preco) if preco is not None else None
+        self.estoque = estoque
+        self.capa_url = capa_url
+        self.isbn = isbn
+        self.slug = slug
+        self.data_criacao = data_criacao
+        self.data_atualizacao = data_atualizacao
+
+    @classmethod
+    def de_livro(cls, livro) -> "LivroCompacto":
+        return cls(*(getattr(livro, campo) for campo in CAMPOS_LIVRO))
+
+    @property
+    def preco_formatado(self):
+        """Retorna o preço formatado como moeda brasileira"""
+        if self.preco is None:
+            return "R$ 0,00"
+        return f"R$ {self.preco:.2f}".replace(".", ",")
+
+    def __repr__(self):
+        return f"<LivroCompacto(titulo='{self.titulo}', autor='{self.autor}')>"
+
+
+class IndiceOrdenado:
+    """
+    Índice secundário ordenado por (chave, id) em dois arrays paralelos
+
+    Valores None não são indexados (como num filtro SQL >= / <=).
+    """
+
+    __slots__ = ("_chaves", "_ids")
+
+    def __init__(self, tipo_chave: str):
+        self._chaves = array(tipo_chave)
+        self._ids = array("q")
+
+    def _posicao(self, chave, livro_id: int) -> int:
+        inicio = bisect_left(self._chaves, chave)
+        fim = bisect_right(self._chaves, chave, inicio)
+        return bisect_left(self._ids, livro_id, inicio, fim)
+
+    def inserir(self, chave, livro_id: int) -> None:
+        if chave is None:
+            return
+        posicao = self._posicao(chave, livro_id)
+        self._chaves.insert(posicao, chave)
+        self._ids.insert(posicao, livro_id)
+
+    def remover(self, chave, livro_id: int) -> None:
+        if chave is None:
+            return
+        posicao = self._posicao(chave, livro_id)
+        if posicao < len(self._ids) and self._ids[posicao] == livro_id and self._chaves[posicao] == chave:
+            del self._chaves[posicao]
+            del self._ids[posicao]
+
+    def faixa(self, minimo=None, maximo=None) -> array:
+        """Ids cujo valor está em [minimo, maximo] (limites opcionais)"""
+        inicio = 0 if minimo is None else bisect_left(self._chaves, minimo)
+        fim = len(self._chaves) if maximo is None else bisect_right(self._chaves, maximo)
+        return self._ids[inicio:fim]
+
+
+class IndiceCatalogo:
+    """
+    Catálogo de livros em memória para as leituras mais frequentes
+
+    Indexado por id, slug e ISBN, com índices ordenados de preço, ano e estoque para
+    filtros por faixa. Mantido pelas escritas do LivroRepository (eventos do
+    catálogo); quando outro worker altera a versão global, só os livros
+    criados, removidos ou com data_atualizacao recente são relidos. Escritas
+    pontuais que não mudam a versão (capa do enriquecimento, estoque das
+    vendas) chegam pela mesma releitura, feita a cada consulta da versão;
+    como elas não mudam a versão, os validadores HTTP usam marca_atual(),
+    que soma a versão a uma assinatura do conteúdo.
+    """
+
+    __slots__ = (
+        "_livros", "_por_slug", "_por_isbn", "_ids", "_secundarios", "_assinatura", "_lock",
+        "carregado", "versao_banco", "_escritas_locais", "_verificado_em", "_sincronizado_em", "geracao",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._limpar()
+        self.carregado = False
+        self.versao_banco: Optional[int] = None
+        self._escritas_locais = 0
+        self._verificado_em = 0.0
+        # Momento (UTC) da última leitura do banco: base da sincronização incremental
+        self._sincronizado_em: Optional[datetime] = None
+        # Incrementada a cada carga ou sincronização que mudou CAMPOS_DERIVADOS (índices derivados se reconstroem)
+        self.geracao = 0
+
+    def _limpar(self) -> None:
+        self._livros: Dict[int, LivroCompacto] = {}
+        self._por_slug: Dict[str, int] = {}
+        self._por_isbn: Dict[str, int] = {}
+        self._ids = array("q")
+        self._secundarios = {
+            "preco": IndiceOrdenado("d"),
+            "ano": IndiceOrdenado("q"),
+            "estoque": IndiceOrdenado("q"),
+        }
+        self._assinatura = 0
+
+    # ---------------------- CARGA ----------------------
+    def carregar(self, livros: Iterable[LivroCompacto], versao: Optional[int] = None,
+                 lido_em: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._limpar()
+            for livro in livros:
+                self._inserir(livro)
+            self.versao_banco = versao
+            self._escritas_locais = 0
+            self._verificado_em = time.monotonic()
+            self._sincronizado_em = lido_em
+            self.carregado = True
+            self.geracao += 1
+        logger.info(f"Catálogo em memória carregado: {len(self._livros)} livros (versão {versao})")
+
+    def carregar_do_banco(self, db: Session) -> None:
+        """Lê o catálogo inteiro (tuplas, sem objetos ORM) e a versão global"""
+        lido_em = datetime.utcnow()
+        versao = obter_versao_catalogo(db)
+        linhas = db.execute(select(*_COLUNAS).order_by(Livro.id)).yield_per(1000)
+        self.carregar((LivroCompacto(*linha) for linha in linhas), versao, lido_em)
+
+    def sincronizar(self, db: Session, versao: int, comparar_ids: bool = True) -> int:
+        """
+        Aplica ao índice só o que mudou no banco desde a última leitura
+
+        Ids removidos ou novos saem da comparação com a lista de ids (só
+        quando a versão mudou: criar e remover livros sempre a incrementam);
+        livros alterados, de data_atualizacao a partir da última leitura
+        (menos MARGEM_SINCRONIA). Retorna quantos livros mudaram no índice.
+        """
+        lido_em = datetime.utcnow()
+        desde = (self._sincronizado_em or lido_em) - timedelta(seconds=MARGEM_SINCRONIA)
+        alterados = [
+            LivroCompacto(*linha)
+            for linha in db.execute(select(*_COLUNAS).where(Livro.data_atualizacao >= desde))
+        ]
+        ids_banco = None
+        if comparar_ids:
+            ids_banco = set(db.scalars(select(Livro.id)))
+            with self._lock:
+                ids_locais = set(self._livros)
+            novos = sorted(ids_banco - ids_locais - {livro.id for livro in alterados})
+            for inicio in range(0, len(novos), LOTE_SINCRONIA):
+                alterados.extend(
+                    LivroCompacto(*linha)
+                    for linha in db.execute(select(*_COLUNAS).where(Livro.id.in_(novos[inicio:inicio + LOTE_SINCRONIA])))
+                )
+
+        with self._lock:
+            removidos = set(self._livros) - ids_banco if ids_banco is not None else set()
+            for livro_id in removidos:
+                self._remover(livro_id)
+            mudancas = len(removidos)
+            estrutural = bool(removidos)
+            for livro in alterados:
+                atual = self._livros.get(livro.id)
+                if atual is None or any(getattr(atual, campo) != getattr(livro, campo) for campo in CAMPOS_LIVRO):
+                    estrutural = estrutural or atual is None or any(
+                        getattr(atual, campo) != getattr(livro, campo) for campo in CAMPOS_DERIVADOS
+                    )
+                    self._remover(livro.id)
+                    self._inserir(livro)
+                    mudancas += 1
+            self.versao_banco = versao
+            self._escritas_locais = 0
+            self._verificado_em = time.monotonic()
+            self._sincronizado_em = lido_em
+            if estrutural:
+                self.geracao += 1
+        return mudancas
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self.carregado = False
+
+    def pronto(self, db: Session) -> bool:
+        """
+        Garante que o índice pode responder leituras
+
+        Consulta a versão global no máximo a cada INTERVALO_VERSAO segundos e
+        relê os livros de data_atualizacao recente; se outro processo criou ou
+        removeu livros (versão diferente), compara também os ids.
+        """
+        if not HABILITADO:
+            return False
+        if self.carregado and time.monotonic() - self._verificado_em < INTERVALO_VERSAO:
+            return True
+
+        try:
+            if not self.carregado:
+                self.carregar_do_banco(db)
+                return True
+
+            versao = obter_versao_catalogo(db)
+            with self._lock:
+                alterada = versao != (self.versao_banco or 0) + self._escritas_locais
+
+            mudancas = self.sincronizar(db, versao, comparar_ids=alterada)
+            if alterada:
+                logger.info(f"Catálogo alterado por outro processo (versão {versao}): {mudancas} livros sincronizados")
+            return True
+        except Exception as e:
+            logger.error(f"Índice do catálogo indisponível, usando o banco: {e}")
+            db.rollback()
+            self.invalidar()
+            return False
+
+    # ---------------------- MANUTENÇÃO ----------------------
+    def _inserir(self, livro: LivroCompacto) -> None:
+        self._livros[livro.id] = livro
+        if livro.slug:
+            self._por_slug[livro.slug] = livro.id
+        if livro.isbn:
+            self._por_isbn[livro.isbn] = livro.id
+        posicao = bisect_left(self._ids, livro.id)
+        if posicao == len(self._ids) or self._ids[posicao] != livro.id:
+            self._ids.insert(posicao, livro.id)
+        for campo, indice in self._secundarios.items():
+            indice.inserir(getattr(livro, campo), livro.id)
+        self._assinatura = (self._assinatura + _impressao(livro)) & _MASCARA_ASSINATURA
+
+    def _remover(self, livro_id: int) -> None:
+        livro = self._livros.pop(livro_id, None)
+        if livro is None:
+            return
+        if livro.slug and self._por_slug.get(livro.slug) == livro_id:
+            del self._por_slug[livro.slug]
+        if livro.isbn and self._por_isbn.get(livro.isbn) == livro_id:
+            del self._por_isbn[livro.isbn]
+        posicao = bisect_left(self._ids, livro_id)
+        if posicao < len(self._ids) and self._ids[posicao] == livro_id:
+            del self._ids[posicao]
+        for campo, indice in self._secundarios.items():
+            indice.remover(getattr(livro, campo), livro_id)
+        self._assinatura = (self._assinatura - _impressao(livro)) & _MASCARA_ASSINATURA
+
+    def atualizar(self, livro, versionada: bool = True) -> None:
+        """Aplica uma escrita local; versionada=False se ela não incrementou a versão global"""
+        with self._lock:
+            self._remover(livro.id)
+            self._inserir(LivroCompacto.de_livro(livro))
+            if versionada:
+                self._escritas_locais += 1
+
+    def remover(self, livro_id: int) -> None:
+        with self._lock:
+            self._remover(livro_id)
+            self._escritas_locais += 1
+
+    # ---------------------- LEITURA ----------------------
+    def obter(self, livro_id: int) -> Optional[LivroCompacto]:
+        return self._livros.get(livro_id)
+
+    def obter_por_slug(self, slug: str) -> Optional[LivroCompacto]:
+        livro_id = self._por_slug.get(slug)
+        return self._livros.get(livro_id) if livro_id is not None else None
+
+    def obter_por_isbn(self, isbn: str) -> Optional[LivroCompacto]:
+        livro_id = self._por_isbn.get(isbn)
+        return self._livros.get(livro_id) if livro_id is not None else None
+
+    def total(self) -> int:
+        return len(self._livros)
+
+    def versao_atual(self) -> int:
+        """Versão global conhecida, incluindo as escritas deste processo"""
+        with self._lock:
+            return (self.versao_banco or 0) + self._escritas_locais
+
+    def marca_atual(self) -> str:
+        """Versão e assinatura do conteúdo: muda também com capa e estoque (sem versão)"""
+        with self._lock:
+            return f"{(self.versao_banco or 0) + self._escritas_locais}-{self._assinatura:016x}"
+
+    def todos(self) -> List[LivroCompacto]:
+        with self._lock:
+            return list(self._livros.values())
+
+    def listar(self,
+               ano: int = None,
+               preco_min: float = None,
+               preco_max: float = None,
+               estoque_min: int = None,
+               estoque_max: int = None,
+               skip: int = 0,
+               limite: int = 100,
+               apos_id: Optional[int] = None) -> List[LivroCompacto]:
+        """Lista em ordem de id aplicando os filtros por faixa (apos_id ignora skip)"""
+        faixas = []
+        if ano:
+            faixas.append(("ano", ano, ano))
+        if preco_min is not None or preco_max is not None:
+            faixas.append(("preco", preco_min, preco_max))
+        if estoque_min is not None or estoque_max is not None:
+            faixas.append(("estoque", estoque_min, estoque_max))
+
+        with self._lock:
+            if not faixas:
+                inicio = bisect_right(self._ids, apos_id) if apos_id else skip
+                ids = self._ids[inicio:inicio + limite]
+            else:
+                candidatos = None
+                for campo, minimo, maximo in faixas:
+                    encontrados = self._secundarios[campo].faixa(minimo, maximo)
+                    candidatos = set(encontrados) if candidatos is None else candidatos.intersection(encontrados)
+                ordenados = sorted(candidatos)
+                inicio = bisect_right(ordenados, apos_id) if apos_id else skip
+                ids = ordenados[inicio:inicio + limite]
+            return [self._livros[i] for i in ids]
+
+
+def obter_versao_catalogo(db: Session) -> int:
+    """Lê a versão global do catálogo, criando a linha única se necessário"""
+    versao = db.execute(select(CatalogoVersao.versao).where(CatalogoVersao.id == 1)).scalar()
+    if versao is None:
+        db.add(CatalogoVersao(id=1, versao=0, atualizado_em=datetime.utcnow()))
+        db.commit()
+        versao = 0
+    return versao
+
+
+def incrementar_versao_catalogo(db: Session, quantidade: int = 1) -> None:
+    """
+    Incrementa a versão global na transação corrente (antes do commit da escrita)
+
+    quantidade deve ser o número de livros notificados depois do commit: uma
+    notificação local por incremento mantém o índice em dia sem recarga.
+    """
+    db.execute(
+        update(CatalogoVersao)
+        .where(CatalogoVersao.id == 1)
+        .values(versao=CatalogoVersao.versao + quantidade, atualizado_em=datetime.utcnow())
+    )
+
+
+def obter_marca_catalogo(db: Session) -> str:
+    """Versão global e última data_atualizacao (capa e estoque não mudam a versão)"""
+    atualizado = db.execute(select(func.max(Livro.data_atualizacao))).scalar()
+    return f"{obter_versao_catalogo(db)}-{atualizado.isoformat() if atualizado else 0}"
+
+
+def marca_catalogo_atual(db: Session) -> str:
+    """Marca do conteúdo do catálogo pela memória quando possível (validadores HTTP, caches)"""
+    if indice_catalogo.pronto(db):
+        return indice_catalogo.marca_atual()
+    return obter_marca_catalogo(db)
+
+
+indice_catalogo = IndiceCatalogo()
+
+
+@eventos_catalogo.registrar_ouvinte
+def _sincronizar_indice_catalogo(evento: str, dado) -> None:
+    if not indice_catalogo.carregado:
+        return
+    if evento == eventos_catalogo.LIVRO_ALTERADO:
+        indice_catalogo.atualizar(dado)
+    elif evento == eventos_catalogo.LIVRO_REMOVIDO:
+        indice_catalogo.remover(dado)
+    elif evento in (eventos_catalogo.CAPA_ALTERADA, eventos_catalogo.ESTOQUE_ALTERADO):
+        indice_catalogo.atualizar(dado, versionada=False)
+    else:
+        indice_catalogo.invalidar()
@@ -0,0 +1,151 @@
+# app/utils/indice_prefixos.py
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.app.utils import eventos_catalogo
+from backend.app.utils.busca_textual import normalizar_texto
+
+# Entradas avaliadas por consulta no máximo (mantém a latência constante)
+MAXIMO_VARREDURA = 500
+
+TITULO = "titulo"
+AUTOR = "autor"
+
+
+def gerar_chaves(texto: str) -> List[str]:
+    """
+    Chaves de prefixo de um texto: o texto normalizado a partir de cada palavra
+
+    Examples:
+        >>> gerar_chaves("Dom Casmurro")
+        ['dom casmurro', 'casmurro']
+    """
+    normalizado = " ".join(re.findall(r"\w+", normalizar_texto(texto)))
+    return [normalizado[palavra.start():] for palavra in re.finditer(r"\w+", normalizado)]
+
+
+class IndicePrefixos:
+    """
+    Índice de prefixos (títulos e autores) para o autocompletar
+
+    Lista ordenada de (chave, tipo, livro_id) consultada com bisect; cada
+    título/autor gera uma chave por palavra, então "casm" encontra
+    "Dom Casmurro". Atualizado pelos eventos do catálogo.
+    """
+
+    __slots__ = ("_entradas", "_livros", "_lock", "carregado", "geracao")
+
+    def __init__(self):
+        self._entradas: List[Tuple[str, str, int]] = []
+        self._livros: Dict[int, Tuple[str, str, Optional[str]]] = {}
+        self._lock = threading.RLock()
+        self.carregado = False
+        self.geracao: Optional[int] = None
+
+    # ---------------------- MANUTENÇÃO ----------------------
+    def carregar(self, linhas: Iterable[Tuple[int, str, str, Optional[str]]],
+                 geracao: Optional[int] = None) -> None:
+        """Reconstrói o índice a partir de tuplas (id, titulo, autor, slug)"""
+        livros = {}
+        entradas = []
+        for livro_id, titulo, autor, slug in linhas:
+            livros[livro_id] = (titulo, autor, slug)
+            entradas.extend(self._entradas_do_livro(livro_id, titulo, autor))
+        entradas.sort()
+
+        with self._lock:
+            self._livros = livros
+            self._entradas = entradas
+            self.geracao = geracao
+            self.carregado = True
+
+    def atualizar(self, livro_id: int, titulo: str, autor: str, slug: Optional[str]) -> None:
+        with self._lock:
+            self._remover(livro_id)
+            self._livros[livro_id] = (titulo, autor, slug)
+            for entrada in self._entradas_do_livro(livro_id, titulo, autor):
+                insort(self._entradas, entrada)
+
+    def remover(self, livro_id: int) -> None:
+        with self._lock:
+            self._remover(livro_id)
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self.carregado = False
+
+    @staticmethod
+    def _entradas_do_livro(livro_id: int, titulo: str, autor: str) -> List[Tuple[str, str, int]]:
+        entradas = [(chave, TITULO, livro_id) for chave in gerar_chaves(titulo)]
+        entradas.extend((chave, AUTOR, livro_id) for chave in gerar_chaves(autor))
+        return entradas
+
+    def _remover(self, livro_id: int) -> None:
+        dados = self._livros.pop(livro_id, None)
+        if dados is None:
+            return
+        titulo, autor, _ = dados
+        for entrada in self._entradas_do_livro(livro_id, titulo, autor):
+            posicao = bisect_left(self._entradas, entrada)
+            if posicao < len(self._entradas) and self._entradas[posicao] == entrada:
+                del self._entradas[posicao]
+
+    # ---------------------- CONSULTA ----------------------
+    def sugerir(self, prefixo: str, limite: int = 10, tipo: Optional[str] = None) -> List[dict]:
+        """
+        Sugestões de títulos e autores que começam com o prefixo
+
+        Autores repetidos em vários livros aparecem uma única vez.
+
+        Args:
+            prefixo: Texto digitado (acentos e maiúsculas são ignorados)
+            limite: Máximo de sugestões
+            tipo: "titulo", "autor" ou None para ambos
+        """
+        chave = " ".join(re.findall(r"\w+", normalizar_texto(prefixo)))
+        if not chave:
+            return []
+
+        sugestoes = []
+        vistos = set()
+        with self._lock:
+            entradas = self._entradas
+            posicao = bisect_left(entradas, (chave,))
+            fim = min(len(entradas), posicao + MAXIMO_VARREDURA)
+            while posicao < fim and len(sugestoes) < limite:
+                texto_chave, tipo_entrada, livro_id = entradas[posicao]
+                posicao += 1
+                if not texto_chave.startswith(chave):
+                    break
+                if tipo and tipo_entrada != tipo:
+                    continue
+
+                titulo, autor, slug = self._livros[livro_id]
+                if tipo_entrada == AUTOR:
+                    if ("autor", autor) in vistos:
+                        continue
+                    vistos.add(("autor", autor))
+                    sugestoes.append({"tipo": AUTOR, "texto": autor})
+                else:
+                    if livro_id in vistos:
+                        continue
+                    vistos.add(livro_id)
+                    sugestoes.append({"tipo": TITULO, "texto": titulo, "livro_id": livro_id, "slug": slug})
+        return sugestoes
+
+
+indice_autocompletar = IndicePrefixos()
+
+
+@eventos_catalogo.registrar_ouvinte
+def _sincronizar_indice_autocompletar(evento: str, dado) -> None:
+    if not indice_autocompletar.carregado:
+        return
+    if evento == eventos_catalogo.LIVRO_ALTERADO:
+        indice_autocompletar.atualizar(dado.id, dado.titulo, dado.autor, dado.slug)
+    elif evento == eventos_catalogo.LIVRO_REMOVIDO:
+        indice_autocompletar.remover(dado)
+    elif evento == eventos_catalogo.CATALOGO_RECARREGADO:
+        indice_autocompletar.invalidar()
@@ -0,0 +1,147 @@
+# app/utils/indice_trigramas.py
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from backend.app.utils import eventos_catalogo
+from backend.app.utils.busca_textual import normalizar_texto
+
+LIMIAR_PADRAO = 0.5
+
+
+def gerar_trigramas(texto: str) -> FrozenSet[str]:
+    """
+    Gera os trigramas de um texto no mesmo formato do pg_trgm
+
+    Cada palavra recebe dois espaços antes e um depois ("  dom ").
+
+    Examples:
+        >>> sorted(gerar_trigramas("Dom"))
+        ['  d', ' do', 'dom', 'om ']
+    """
+    trigramas = set()
+    for palavra in re.findall(r"\w+", normalizar_texto(texto)):
+        palavra = f"  {palavra} "
+        for i in range(len(palavra) - 2):
+            trigramas.add(palavra[i:i + 3])
+    return frozenset(trigramas)
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas (título e autor) em memória
+
+    Fallback da busca fuzzy quando o pg_trgm não está disponível: apenas os
+    livros que compartilham algum trigrama com a consulta são avaliados.
+    geracao é a do catálogo em memória de onde foi carregado (None se do banco).
+    """
+
+    __slots__ = ("_postings", "_trigramas", "_lock", "carregado", "geracao")
+
+    CAMPOS = ("titulo", "autor")
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Set[int]]] = {c: defaultdict(set) for c in self.CAMPOS}
+        self._trigramas: Dict[int, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self._lock = threading.RLock()
+        self.carregado = False
+        self.geracao: Optional[int] = None
+
+    # ---------------------- MANUTENÇÃO ----------------------
+    def carregar(self, linhas: Iterable[Tuple[int, str, str]], geracao: Optional[int] = None) -> None:
+        """Reconstrói o índice a partir de tuplas (id, titulo, autor)"""
+        with self._lock:
+            self._postings = {c: defaultdict(set) for c in self.CAMPOS}
+            self._trigramas = {}
+            for livro_id, titulo, autor in linhas:
+                self._inserir(livro_id, titulo, autor)
+            self.geracao = geracao
+            self.carregado = True
+
+    def atualizar(self, livro_id: int, titulo: str, autor: str) -> None:
+        with self._lock:
+            self._remover(livro_id)
+            self._inserir(livro_id, titulo, autor)
+
+    def remover(self, livro_id: int) -> None:
+        with self._lock:
+            self._remover(livro_id)
+
+    def invalidar(self) -> None:
+        """Força a recarga completa no próximo uso"""
+        with self._lock:
+            self.carregado = False
+
+    def _inserir(self, livro_id: int, titulo: str, autor: str) -> None:
+        trigramas = (gerar_trigramas(titulo), gerar_trigramas(autor))
+        self._trigramas[livro_id] = trigramas
+        for campo, conjunto in zip(self.CAMPOS, trigramas):
+            postings = self._postings[campo]
+            for trigrama in conjunto:
+                postings[trigrama].add(livro_id)
+
+    def _remover(self, livro_id: int) -> None:
+        trigramas = self._trigramas.pop(livro_id, None)
+        if not trigramas:
+            return
+        for campo, conjunto in zip(self.CAMPOS, trigramas):
+            postings = self._postings[campo]
+            for trigrama in conjunto:
+                ids = postings.get(trigrama)
+                if ids is not None:
+                    ids.discard(livro_id)
+                    if not ids:
+                        del postings[trigrama]
+
+    # ---------------------- CONSULTA ----------------------
+    def buscar(self, consulta: str, campo: Optional[str] = None,
+               limiar: float = LIMIAR_PADRAO) -> List[Tuple[int, float]]:
+        """
+        Retorna [(livro_id, similaridade)] ordenado da maior para a menor
+
+        A similaridade é a fração dos trigramas da consulta presentes no campo
+        (equivalente ao word_similarity do pg_trgm).
+
+        Args:
+            consulta: Texto digitado pelo usuário
+            campo: "titulo", "autor" ou None para ambos
+            limiar: Similaridade mínima (0 a 1)
+        """
+        trigramas_consulta = gerar_trigramas(consulta)
+        if not trigramas_consulta:
+            return []
+
+        campos = (campo,) if campo else self.CAMPOS
+        total = len(trigramas_consulta)
+        melhores: Dict[int, float] = {}
+
+        with self._lock:
+            for nome in campos:
+                postings = self._postings[nome]
+                comuns: Dict[int, int] = defaultdict(int)
+                for trigrama in trigramas_consulta:
+                    for livro_id in postings.get(trigrama, ()):
+                        comuns[livro_id] += 1
+
+                for livro_id, quantidade in comuns.items():
+                    similaridade = quantidade / total
+                    if similaridade >= limiar and similaridade > melhores.get(livro_id, 0.0):
+                        melhores[livro_id] = similaridade
+
+        return sorted(melhores.items(), key=lambda par: (-par[1], par[0]))
+
+
+indice_fuzzy = IndiceTrigramas()
+
+
+@eventos_catalogo.registrar_ouvinte
+def _sincronizar_indice_fuzzy(evento: str, dado) -> None:
+    if not indice_fuzzy.carregado:
+        return
+    if evento == eventos_catalogo.LIVRO_ALTERADO:
+        indice_fuzzy.atualizar(dado.id, dado.titulo, dado.autor)
+    elif evento == eventos_catalogo.LIVRO_REMOVIDO:
+        indice_fuzzy.remover(dado)
+    elif evento == eventos_catalogo.CATALOGO_RECARREGADO:
+        indice_fuzzy.invalidar()
@@ -0,0 +1,79 @@
+# app/utils/isbn.py
+import re
+from typing import Optional
+
+
+def limpar_isbn(valor: str) -> str:
+    """
+    Remove hífens, espaços e prefixos ("ISBN", "ISBN-13:") do texto
+
+    Examples:
+        >>> limpar_isbn("ISBN 978-85-254-0625-9")
+        '9788525406259'
+    """
+    valor = re.sub(r"^\s*isbn(?:-1[03])?:?", "", valor or "", flags=re.IGNORECASE)
+    return re.sub(r"[\s-]", "", valor).upper()
+
+
+def _digito_isbn13(doze_digitos: str) -> str:
+    soma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(doze_digitos))
+    return str((10 - soma % 10) % 10)
+
+
+def _digito_isbn10(nove_digitos: str) -> str:
+    soma = sum(int(d) * (10 - i) for i, d in enumerate(nove_digitos))
+    digito = (11 - soma % 11) % 11
+    return "X" if digito == 10 else str(digito)
+
+
+def isbn10_para_13(isbn10: str) -> str:
+    """
+    ISBN-10 -> ISBN-13 (prefixo 978, dígito verificador recalculado)
+
+    Examples:
+        >>> isbn10_para_13("8525406252")
+        '9788525406255'
+    """
+    base = "978" + isbn10[:9]
+    return base + _digito_isbn13(base)
+
+
+def isbn13_para_10(isbn13: str) -> Optional[str]:
+    """
+    ISBN-13 -> ISBN-10; None para prefixo 979 (sem equivalente de 10 dígitos)
+
+    Examples:
+        >>> isbn13_para_10("9788525406255")
+        '8525406252'
+    """
+    if not isbn13.startswith("978"):
+        return None
+    return isbn13[3:12] + _digito_isbn10(isbn13[3:12])
+
+
+def canonizar_isbn(valor: Optional[str]) -> Optional[str]:
+    """
+    Forma canônica gravada no banco: ISBN-13 só com dígitos
+
+    ISBN-10 é convertido para ISBN-13, então as duas formas do mesmo livro
+    caem na mesma linha do índice único. O dígito verificador do valor
+    informado não é conferido (há cadastros antigos com dígito errado).
+
+    Raises:
+        ValueError: Valor que não tem formato de ISBN-10 nem de ISBN-13
+
+    Examples:
+        >>> canonizar_isbn("85-254-0625-2")
+        '9788525406255'
+        >>> canonizar_isbn("978-85-254-0625-9")
+        '9788525406259'
+    """
+    if not valor or not valor.strip():
+        return None
+
+    isbn = limpar_isbn(valor)
+    if re.fullmatch(r"\d{13}", isbn):
+        return isbn
+    if re.fullmatch(r"\d{9}[\dX]", isbn):
+        return isbn10_para_13(isbn)
+    raise ValueError("ISBN deve ter 10 ou 13 dígitos (ISBN-10 pode terminar em X)")
@@ -0,0 +1,65 @@
+# app/utils/metadados_isbn.py
+import os
+import re
+from typing import Dict, List, Optional
+
+import requests
+
+from backend.app.utils.atualizar_capas_pg import CAPAS_TIMEOUT, FalhaBuscaCapa
+
+# API de livros do Open Library: aceita vários ISBNs em uma única requisição
+OPEN_LIBRARY_URL = os.getenv("OPEN_LIBRARY_URL", "https://openlibrary.org/api/books")
+ISBNS_POR_CONSULTA = int(os.getenv("ISBNS_POR_CONSULTA", "50"))
+
+
+def _extrair_metadados(dados: dict) -> dict:
+    capas = dados.get("cover") or {}
+    ano = re.search(r"\b(\d{4})\b", dados.get("publish_date") or "")
+    autores = [autor.get("name") for autor in dados.get("authors") or [] if autor.get("name")]
+    return {
+        "titulo": dados.get("title"),
+        "autor": ", ".join(autores) or None,
+        "ano": int(ano.group(1)) if ano else None,
+        "capa_url": capas.get("medium") or capas.get("large") or capas.get("small"),
+    }
+
+
+def buscar_metadados_isbns(isbns: List[str]) -> Dict[str, dict]:
+    """
+    Metadados de vários ISBNs com uma requisição por ISBNS_POR_CONSULTA
+
+    ISBNs que o Open Library não conhece ficam fora do resultado.
+
+    Returns:
+        {isbn: {"titulo", "autor", "ano", "capa_url"}}
+
+    Raises:
+        FalhaBuscaCapa: A API não respondeu
+    """
+    resultado = {}
+    isbns = list(dict.fromkeys(isbns))
+    for inicio in range(0, len(isbns), ISBNS_POR_CONSULTA):
+        lote = isbns[inicio:inicio + ISBNS_POR_CONSULTA]
+        try:
+            response = requests.get(
+                OPEN_LIBRARY_URL,
+                params={
+                    "bibkeys": ",".join(f"ISBN:{isbn}" for isbn in lote),
+                    "format": "json",
+                    "jscmd": "data",
+                },
+                timeout=CAPAS_TIMEOUT
+            )
+            response.raise_for_status()
+            dados = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise FalhaBuscaCapa(f"Erro ao consultar {len(lote)} ISBNs no Open Library: {e}") from e
+
+        for chave, registro in dados.items():
+            resultado[chave.removeprefix("ISBN:")] = _extrair_metadados(registro)
+    return resultado
+
+
+def ano_valido(ano: Optional[int]) -> bool:
+    """Mesmos limites de LivroCreate.ano"""
+    return ano is not None and 1000 <= ano <= 2030
@@ -0,0 +1,247 @@
+# app/utils/metricas_pool.py
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("MetricasPool")
+
+# Limites superiores (ms) dos baldes dos histogramas; o último balde é +inf
+BALDES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histograma:
+    """Histograma cumulativo de durações em baldes fixos (thread-safe)"""
+
+    def __init__(self, baldes: Sequence[float] = BALDES_MS):
+        self.baldes = tuple(baldes)
+        self._contagens = [0] * (len(self.baldes) + 1)
+        self._soma = 0.0
+        self._maximo = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, ms: float) -> None:
+        with self._lock:
+            self._contagens[bisect_left(self.baldes, ms)] += 1
+            self._soma += ms
+            self._maximo = max(self._maximo, ms)
+
+    @property
+    def total(self) -> int:
+        return sum(self._contagens)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Limite superior do balde que contém o percentil p (0-100)"""
+        with self._lock:
+            total = sum(self._contagens)
+            if not total:
+                return None
+            alvo = math.ceil(total * p / 100)
+            acumulado = 0
+            for indice, contagem in enumerate(self._contagens):
+                acumulado += contagem
+                if acumulado >= alvo:
+                    return self.baldes[indice] if indice < len(self.baldes) else self._maximo
+        return self._maximo
+
+    def resumo(self) -> dict:
+        with self._lock:
+            total = sum(self._contagens)
+            acumulado, baldes = 0, {}
+            for limite, contagem in zip([*self.baldes, "+inf"], self._contagens):
+                acumulado += contagem
+                baldes[f"le_{limite}"] = acumulado
+            soma, maximo = self._soma, self._maximo
+        return {
+            "total": total,
+            "media_ms": round(soma / total, 3) if total else None,
+            "p50_ms": self.percentil(50),
+            "p95_ms": self.percentil(95),
+            "p99_ms": self.percentil(99),
+            "maximo_ms": round(maximo, 3),
+            "baldes": baldes,
+        }
+
+
+class MetricasPool:
+    """
+    Observação do pool de conexões de um engine
+
+    Mede quanto cada checkout esperou pelo pool, quanto custou a validação
+    (ping) das conexões, a idade das conexões abertas e o pico de conexões
+    em uso, para separar fila no pool de lentidão no banco.
+    """
+
+    def __init__(self):
+        self.espera_checkout = Histograma()
+        self.custo_ping = Histograma()
+        self.checkouts = 0
+        self.esgotamentos = 0        # TimeoutError: pool_size + max_overflow em uso por pool_timeout
+        self.pings_falhos = 0
+        self.conexoes_criadas = 0
+        self.pico_em_uso = 0
+        self._abertas: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._engine = None
+        self.iniciado_em = time.time()
+
+    def instrumentar(self, engine, validacao: float = 0) -> None:
+        """
+        Registra os eventos no pool do engine
+
+        Args:
+            validacao: Segundos ociosos a partir dos quais a conexão é testada
+                no checkout (0 = a cada checkout, como pool_pre_ping; <0 = nunca)
+        """
+        pool = engine.pool
+        self._engine = engine
+        if isinstance(pool, QueuePoolInstrumentado):
+            pool.metricas = self
+
+        @event.listens_for(pool, "connect")
+        def _conectou(dbapi_conn, registro):
+            agora = time.time()
+            registro.info["criada_em"] = agora
+            registro.info["usada_em"] = agora
+            registro.info["recem_criada"] = True
+            with self._lock:
+                self.conexoes_criadas += 1
+                self._abertas[id(dbapi_conn)] = agora
+
+        @event.listens_for(pool, "close")
+        def _fechou(dbapi_conn, registro):
+            with self._lock:
+                self._abertas.pop(id(dbapi_conn), None)
+
+        @event.listens_for(pool, "checkout")
+        def _checkout(dbapi_conn, registro, proxy):
+            # Conexão recém-aberta não precisa de ping
+            recem_criada = registro.info.pop("recem_criada", False)
+            ociosa = time.time() - registro.info.get("usada_em", 0)
+            if not recem_criada and validacao >= 0 and ociosa >= validacao:
+                self._validar(dbapi_conn)
+            with self._lock:
+                self.checkouts += 1
+                self.pico_em_uso = max(self.pico_em_uso, self._engine.pool.checkedout())
+
+        @event.listens_for(pool, "checkin")
+        def _checkin(dbapi_conn, registro):
+            if registro is not None:
+                registro.info["usada_em"] = time.time()
+
+    def _validar(self, dbapi_conn) -> None:
+        """Ping na conexão; falha descarta a conexão e o pool abre outra"""
+        inicio = time.perf_counter()
+        try:
+            cursor = dbapi_conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception as e:
+            with self._lock:
+                self.pings_falhos += 1
+            raise exc.DisconnectionError(f"Conexão inválida no checkout: {e}") from e
+        finally:
+            self.custo_ping.registrar((time.perf_counter() - inicio) * 1000)
+
+    def registrar_espera(self, ms: float, esgotou: bool = False) -> None:
+        self.espera_checkout.registrar(ms)
+        if esgotou:
+            with self._lock:
+                self.esgotamentos += 1
+
+    def idades(self) -> List[float]:
+        agora = time.time()
+        with self._lock:
+            return sorted(agora - criada for criada in self._abertas.values())
+
+    def relatorio(self) -> dict:
+        """Instantâneo das métricas, com a recomendação de dimensionamento"""
+        pool = self._engine.pool if self._engine is not None else None
+        idades = self.idades()
+        return {
+            "pool": {
+                "pool_size": pool.size() if pool else None,
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "timeout_s": pool.timeout() if pool else None,
+                "em_uso": pool.checkedout() if pool else None,
+                "ociosas": pool.checkedin() if pool else None,
+                "overflow": pool.overflow() if pool else None,
+                "pico_em_uso": self.pico_em_uso,
+            },
+            "checkouts": self.checkouts,
+            "esgotamentos": self.esgotamentos,
+            "conexoes_criadas": self.conexoes_criadas,
+            "espera_checkout": self.espera_checkout.resumo(),
+            "validacao": {"pings_falhos": self.pings_falhos, **self.custo_ping.resumo()},
+            "idade_conexoes_s": {
+                "abertas": len(idades),
+                "media": round(sum(idades) / len(idades), 1) if idades else None,
+                "maxima": round(idades[-1], 1) if idades else None,
+            },
+            "desde": self.iniciado_em,
+            "recomendacao": self.recomendar(),
+        }
+
+    def recomendar(self, espera_aceitavel_ms: float = 10.0) -> dict:
+        """
+        Sugestão de pool_size/max_overflow a partir da carga observada
+
+        Espera no checkout (p95 acima de espera_aceitavel_ms) ou esgotamentos
+        indicam pool pequeno; pico de uso bem abaixo de pool_size indica
+        conexões ociosas que só ocupam o limite de conexões do banco.
+        """
+        pool = self._engine.pool if self._engine is not None else None
+        if pool is None or not self.checkouts:
+            return {"motivo": "Sem carga observada ainda"}
+
+        tamanho = pool.size()
+        overflow = getattr(pool, "_max_overflow", 0)
+        p95 = self.espera_checkout.percentil(95) or 0
+        pico = self.pico_em_uso
+
+        if self.esgotamentos or p95 > espera_aceitavel_ms:
+            sugerido = max(tamanho, math.ceil(pico * 1.25))
+            motivo = (f"Requisições esperaram pelo pool (p95 {p95} ms, {self.esgotamentos} esgotamentos): "
+                      f"aumentar o pool ou reduzir o tempo de cada transação")
+            return {"pool_size": sugerido, "max_overflow": max(overflow, sugerido),
+                    "conexoes_por_processo": sugerido + max(overflow, sugerido), "motivo": motivo}
+
+        if pico < tamanho / 2:
+            sugerido = max(2, math.ceil(pico * 1.5))
+            return {"pool_size": sugerido, "max_overflow": overflow,
+                    "conexoes_por_processo": sugerido + overflow,
+                    "motivo": f"Pico de {pico} conexões em uso com pool_size={tamanho}: conexões ociosas"}
+
+        return {"pool_size": tamanho, "max_overflow": overflow,
+                "conexoes_por_processo": tamanho + overflow, "motivo": "Dimensionamento adequado à carga"}
+
+
+class QueuePoolInstrumentado(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout (inclui abrir conexão nova)"""
+
+    metricas: Optional[MetricasPool] = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            if self.metricas is not None:
+                self.metricas.registrar_espera((time.perf_counter() - inicio) * 1000, esgotou=True)
+            raise
+        if self.metricas is not None:
+            self.metricas.registrar_espera((time.perf_counter() - inicio) * 1000)
+        return conexao
+
+    def recreate(self):
+        # dispose()/recreate mantêm a instrumentação no pool novo
+        novo = super().recreate()
+        novo.metricas = self.metricas
+        return novo
@@ -0,0 +1,100 @@
+# app/utils/paginacao.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, tuple_
+
+# Header com o cursor da próxima página (listagens que retornam lista pura)
+HEADER_PROXIMO_CURSOR = "X-Proximo-Cursor"
+
+
+def codificar_cursor(ultimo_id: int, chave: Any = None) -> str:
+    """
+    Gera um cursor opaco com a última chave de ordenação e o id
+
+    Examples:
+        >>> decodificar_cursor(codificar_cursor(42))
+        {'id': 42}
+    """
+    dados: Dict[str, Any] = {"id": ultimo_id}
+    if chave is not None:
+        dados["k"] = chave.isoformat() if isinstance(chave, datetime) else chave
+    bruto = json.dumps(dados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, com_chave: bool = False) -> Dict[str, Any]:
+    """
+    Lê um cursor gerado por codificar_cursor (HTTP 400 se inválido)
+
+    Além do base64/JSON, valida as chaves: "id" inteiro e "k" (opcional)
+    número ou data ISO, já convertida para datetime. Cursor adulterado nunca
+    chega à query.
+
+    Args:
+        com_chave: A listagem ordena por outra coluna além do id, então "k"
+            é obrigatória
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        if not isinstance(dados, dict) or set(dados) - {"id", "k"}:
+            raise ValueError("cursor com chaves inesperadas")
+        if not _inteiro(dados.get("id")):
+            raise ValueError("cursor sem id")
+        if com_chave and dados.get("k") is None:
+            raise ValueError("cursor sem chave de ordenação")
+        if "k" in dados:
+            chave = dados["k"]
+            if isinstance(chave, str):
+                dados["k"] = datetime.fromisoformat(chave)
+            elif not _inteiro(chave) and not isinstance(chave, float):
+                raise ValueError("chave de ordenação inválida")
+        return dados
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def _inteiro(valor: Any) -> bool:
+    # bool é subclasse de int, mas true/false não é um id válido
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def filtrar_apos_cursor(query, dados: Optional[Dict[str, Any]], coluna_id,
+                        coluna_ordem=None, descendente: bool = False):
+    """
+    Aplica ORDER BY e o filtro de keyset (registros depois do cursor)
+
+    Com coluna_ordem a comparação é feita por (coluna_ordem, id), que usa o
+    índice composto correspondente; sem ela, apenas pelo id.
+    """
+    if coluna_ordem is None:
+        ordem = [coluna_id.desc() if descendente else coluna_id.asc()]
+    else:
+        ordem = [
+            coluna_ordem.desc() if descendente else coluna_ordem.asc(),
+            coluna_id.desc() if descendente else coluna_id.asc(),
+        ]
+    query = query.order_by(*ordem)
+
+    if not dados:
+        return query
+
+    if coluna_ordem is None:
+        condicao = coluna_id < dados["id"] if descendente else coluna_id > dados["id"]
+    else:
+        chave = dados.get("k")
+        if isinstance(chave, str) and isinstance(coluna_ordem.type, DateTime):
+            chave = datetime.fromisoformat(chave)
+        atual = tuple_(coluna_ordem, coluna_id)
+        ultimo = tuple_(chave, dados["id"])
+        condicao = atual < ultimo if descendente else atual > ultimo
+
+    return query.filter(condicao)
@@ -0,0 +1,86 @@
+# app/utils/principal.py
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import Session
+
+from backend.app.domain.models.usuario.usuario import Usuario
+from backend.app.repositories.usuario_repository import UsuarioRepository
+from backend.app.service.auth_service import AuthService
+
+
+def token_da_requisicao(request: Request) -> Optional[str]:
+    """Token JWT do header Authorization (Bearer) ou, na falta dele, do cookie access_token"""
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ", 1)[1]
+    return request.cookies.get("access_token")
+
+
+class PrincipalRequisicao:
+    """
+    Identidade autenticada de uma requisição (guardada em request.state.principal)
+
+    O JWT é decodificado na primeira consulta e o usuário é buscado no máximo
+    uma vez por sessão de banco; dependências, templates e rotas da mesma
+    requisição reaproveitam o resultado, inclusive o "não autenticado".
+    """
+
+    __slots__ = ("token", "_payload", "_decodificado", "_usuario", "_sessao")
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self._payload: Optional[dict] = None
+        self._decodificado = False
+        self._usuario: Optional[Usuario] = None
+        self._sessao: Optional[Session] = None
+
+    @property
+    def payload(self) -> Optional[dict]:
+        """Claims do token, ou None se ausente, inválido ou expirado"""
+        if not self._decodificado:
+            self._decodificado = True
+            if self.token:
+                try:
+                    self._payload = AuthService.verificar_token(self.token)
+                except HTTPException:
+                    self._payload = None
+        return self._payload
+
+    @property
+    def usuario_id(self) -> Optional[int]:
+        try:
+            return int(self.payload["sub"]) if self.payload else None
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def usuario(self, db: Session) -> Optional[Usuario]:
+        """Linha do usuário do token (sem checar ativo/confirmado: cada chamador aplica sua regra)"""
+        if self.usuario_id is None:
+            return None
+        if self._sessao is not db:
+            # Outra sessão na mesma requisição: o objeto precisa pertencer a ela
+            self._usuario = UsuarioRepository(db).buscar_por_id(self.usuario_id)
+            self._sessao = db
+        return self._usuario
+
+
+def principal_da_requisicao(request: Request) -> PrincipalRequisicao:
+    """Principal da requisição, criado na primeira chamada se o middleware não o fez"""
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = PrincipalRequisicao(token_da_requisicao(request))
+        request.state.principal = principal
+    return principal
+
+
+class PrincipalMiddleware:
+    """Prepara request.state.principal para cada requisição HTTP (ASGI puro, sem custo de corpo)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            principal_da_requisicao(Request(scope))
+        await self.app(scope, receive, send)
@@ -0,0 +1,191 @@
+# app/utils/roteamento_replicas.py
+import contextvars
+import functools
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import CompoundSelect, Select
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+# Chaves em Session.info
+LEITURA_REPLICA = "leitura_replica"      # bloco de leitura que aceita réplica
+ESCREVEU = "escreveu"                    # sessão já escreveu: lê do primário (read-your-writes)
+REPLICA_ESCOLHIDA = "replica_escolhida"  # mesma réplica durante toda a sessão
+
+# Cookie de read-your-writes entre requisições (ver PrimarioAposEscritaMiddleware)
+COOKIE_PRIMARIO = "ler_primario"
+
+# Métodos que não escrevem: não renovam o cookie
+METODOS_LEITURA = ("GET", "HEAD", "OPTIONS")
+
+_primario_forcado: contextvars.ContextVar[bool] = contextvars.ContextVar("primario_forcado", default=False)
+
+
+class RoteadorReplicas:
+    """
+    Réplicas de leitura e o atraso (lag) medido de cada uma
+
+    O lag é informado pelo monitor (service/replicacao_service.py); réplica
+    sem medição recente ou atrasada além do limite não recebe leituras, que
+    então voltam para o primário.
+    """
+
+    def __init__(self):
+        self.replicas: List = []
+        self.lag_maximo = 5.0
+        self.validade = 10.0
+        self._lags: Dict[int, tuple] = {}
+        self._proxima = itertools.count()
+        self._lock = threading.Lock()
+
+    def configurar(self, replicas: List, lag_maximo: float, validade: float) -> None:
+        """
+        Args:
+            replicas: Engines das réplicas
+            lag_maximo: Atraso (s) acima do qual a réplica é ignorada
+            validade: Idade (s) a partir da qual uma medição não vale mais
+        """
+        self.replicas = list(replicas)
+        self.lag_maximo = lag_maximo
+        self.validade = validade
+
+    @property
+    def configurado(self) -> bool:
+        return bool(self.replicas)
+
+    def registrar_lag(self, replica, lag: float) -> None:
+        """lag em segundos (math.inf quando a réplica não respondeu)"""
+        with self._lock:
+            self._lags[id(replica)] = (lag, time.monotonic())
+
+    def lag(self, replica) -> float:
+        with self._lock:
+            lag, medido_em = self._lags.get(id(replica), (math.inf, 0.0))
+        return lag if time.monotonic() - medido_em <= self.validade else math.inf
+
+    def disponivel(self, replica) -> bool:
+        return self.lag(replica) <= self.lag_maximo
+
+    def escolher(self, preferida=None):
+        """Réplica para a leitura (a preferida, se saudável) ou None para usar o primário"""
+        if preferida is not None and self.disponivel(preferida):
+            return preferida
+        saudaveis = [replica for replica in self.replicas if self.disponivel(replica)]
+        if not saudaveis:
+            return None
+        return saudaveis[next(self._proxima) % len(saudaveis)]
+
+    def situacao(self) -> List[dict]:
+        return [
+            {
+                "replica": replica.url.render_as_string(hide_password=True),
+                "lag_s": None if math.isinf(self.lag(replica)) else round(self.lag(replica), 3),
+                "disponivel": self.disponivel(replica),
+            }
+            for replica in self.replicas
+        ]
+
+
+roteador_replicas = RoteadorReplicas()
+
+
+def _escrita(clause) -> bool:
+    return isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None
+
+
+class SessaoRoteada(Session):
+    """
+    Session que envia leituras marcadas (leitura_replica) para uma réplica
+
+    Escritas, SELECT ... FOR UPDATE, SQL textual e qualquer leitura depois de
+    uma escrita na mesma sessão ficam no primário. Sem réplicas configuradas
+    o comportamento é o de uma Session comum.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or _escrita(clause):
+            self.info[ESCREVEU] = True
+        elif (self.info.get(LEITURA_REPLICA)
+              and isinstance(clause, (Select, CompoundSelect))
+              and not self.info.get(ESCREVEU)
+              and not _primario_forcado.get()):
+            replica = roteador_replicas.escolher(self.info.get(REPLICA_ESCOLHIDA))
+            if replica is not None:
+                self.info[REPLICA_ESCOLHIDA] = replica
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@contextmanager
+def leitura_replica(db: Session, ativa: bool = True):
+    """Bloco cujas consultas podem ir para uma réplica (ativa=False força o primário)"""
+    anterior = db.info.get(LEITURA_REPLICA)
+    db.info[LEITURA_REPLICA] = ativa
+    try:
+        yield db
+    finally:
+        db.info[LEITURA_REPLICA] = anterior
+
+
+def ler_da_replica(metodo):
+    """Decorator para métodos de repositório (self.db) que toleram dados com lag"""
+
+    @functools.wraps(metodo)
+    def executar(self, *args, **kwargs):
+        with leitura_replica(self.db):
+            return metodo(self, *args, **kwargs)
+
+    return executar
+
+
+def forcar_primario(ativo: bool = True) -> contextvars.Token:
+    """Leituras da requisição corrente vão para o primário (read-your-writes)"""
+    return _primario_forcado.set(ativo)
+
+
+def liberar_primario(token: contextvars.Token) -> None:
+    _primario_forcado.reset(token)
+
+
+class PrimarioAposEscritaMiddleware:
+    """
+    Read-your-writes entre requisições
+
+    Uma escrita bem-sucedida (método diferente de GET/HEAD/OPTIONS, status
+    < 400) grava o cookie COOKIE_PRIMARIO por janela segundos; enquanto ele
+    existir, as leituras do cliente vão para o primário. Sem réplicas
+    configuradas não faz nada.
+    """
+
+    def __init__(self, app, janela: int, roteador: RoteadorReplicas = roteador_replicas):
+        self.app = app
+        self.janela = janela
+        self.roteador = roteador
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.roteador.configurado:
+            await self.app(scope, receive, send)
+            return
+
+        escrita = scope["method"] not in METODOS_LEITURA
+
+        async def enviar(message):
+            if escrita and message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{COOKIE_PRIMARIO}=1; HttpOnly; Max-Age={self.janela}; Path=/; SameSite=lax"
+                )
+            await send(message)
+
+        token = forcar_primario(COOKIE_PRIMARIO in Request(scope).cookies)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            liberar_primario(token)
@@ -4,44 +4,22 @@ from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 
 from backend.app.dependencies import get_db
-from backend.app.service.usuario_service import UsuarioService
-from backend.app.utils.auth import verificar_token
+from backend.app.utils.principal import principal_da_requisicao
 
 
 def get_current_user_from_request(request: Request, db: Session) -> Optional[Any]:
     """
     Obtém o usuário atual baseado no token JWT.
-    Lê do header Authorization (Bearer token) ou do cookie access_token.
+    Lê do header Authorization (Bearer token) ou do cookie access_token;
+    o resultado fica em request.state.principal para o resto da requisição.
     """
     try:
-        # 1️⃣ Pega token do header Authorization
-        auth_header = request.headers.get("Authorization")
-        token = None
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-        else:
-            # 2️⃣ Se não tiver header, tenta pegar do cookie
-            token = request.cookies.get("access_token")
-
-        if not token:
-            return None
-
-        # Verifica token
-        payload = verificar_token(token)
-        usuario_id = int(payload.get("sub"))
-
-        # Buscar usuário no banco
-        usuario_service = UsuarioService(db)
-        usuario = usuario_service.repo.buscar_por_id(usuario_id)
-
-        return usuario
-
+        return principal_da_requisicao(request).usuario(db)
     except Exception as e:
         print(f"Erro inesperado ao obter usuário atual: {e}")
         return None
 
 
-
 def get_current_user_dependency(
     request: Request,
     db: Session = Depends(get_db)
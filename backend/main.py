@@ -12,9 +12,17 @@ from fastapi.openapi.utils import get_openapi
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.database import engine, Base
-from app.routers import auth_router, livro_router, carrinho_router, pedido_router, usuario_router
-from app.utils.formatters import formatar_preco, formatar_preco_sem_simbolo, formatar_data
+from backend.app.database import engine, async_engine, Base, SessionLocal, DATABASE_ASYNC, REPLICA_JANELA_PRIMARIO
+from backend.app.routers import auth_router, livro_router, livro_router_async, carrinho_router, pedido_router, usuario_router, admin_router
+from backend.app.utils.formatters import formatar_preco, formatar_preco_sem_simbolo, formatar_data
+from backend.app.utils.busca_textual import preparar_busca_textual
+from backend.app.utils.indice_catalogo import indice_catalogo
+from backend.app.service.enriquecimento_service import ENRIQUECIMENTO_ATIVO, trabalhador_enriquecimento
+from backend.app.service.estatisticas_service import acumulador_estatisticas, reconciliador_estatisticas
+from backend.app.service.estoque_service import expirador_reservas
+from backend.app.service.replicacao_service import monitor_replicas
+from backend.app.utils.principal import PrincipalMiddleware
+from backend.app.utils.roteamento_replicas import PrimarioAposEscritaMiddleware, roteador_replicas
 
 # ================= LOGGING =================
 logging.basicConfig(
@@ -43,7 +51,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Erro ao criar tabelas: {e}")
         raise
+    if preparar_busca_textual(engine):
+        logger.info("✅ Busca textual disponível")
+    with SessionLocal() as db:
+        if indice_catalogo.pronto(db):
+            logger.info(f"✅ Catálogo em memória: {indice_catalogo.total()} livros")
+    if ENRIQUECIMENTO_ATIVO:
+        trabalhador_enriquecimento.iniciar()
+        logger.info("✅ Enriquecimento de livros em segundo plano")
+    acumulador_estatisticas.iniciar()
+    reconciliador_estatisticas.iniciar()
+    expirador_reservas.iniciar()
+    if roteador_replicas.configurado:
+        monitor_replicas.iniciar()
+        logger.info(f"✅ Leituras roteadas para {len(roteador_replicas.replicas)} réplica(s)")
     yield
+    monitor_replicas.parar()
+    expirador_reservas.parar()
+    reconciliador_estatisticas.parar()
+    acumulador_estatisticas.parar()
+    trabalhador_enriquecimento.parar()
+    if async_engine is not None:
+        await async_engine.dispose()
     logger.info("=== APLICAÇÃO ENCERRADA ===")
 
 security = HTTPBearer()
@@ -81,6 +110,9 @@ app.add_middleware(
     session_cookie="biblioteca_session"
 )
 
+# Usuário autenticado resolvido uma vez por requisição (request.state.principal)
+app.add_middleware(PrincipalMiddleware)
+
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
     CORSMiddleware,
@@ -90,6 +122,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes: depois de uma escrita o cliente lê do primário por REPLICA_JANELA_PRIMARIO segundos
+app.add_middleware(PrimarioAposEscritaMiddleware, janela=REPLICA_JANELA_PRIMARIO)
+
 # ================= STATIC FILES =================
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -98,9 +133,13 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 app.include_router(home_router.router, tags=["Home"])   # rota principal /
 app.include_router(auth_router.router, prefix="/api/auth", tags=["Autenticação"])
 app.include_router(usuario_router.router, prefix="/api/usuarios", tags=["Usuários"])
+if DATABASE_ASYNC:
+    # Leituras de livros no engine assíncrono; precisam vir antes do router síncrono
+    app.include_router(livro_router_async.router, prefix="/api/livros", tags=["Livros"])
 app.include_router(livro_router.router, prefix="/api/livros", tags=["Livros"])
 app.include_router(carrinho_router.router, prefix="/api/carrinho", tags=["Carrinho"])
 app.include_router(pedido_router.router, prefix="/api/pedidos", tags=["Pedidos"])
+app.include_router(admin_router.router, prefix="/api/admin", tags=["Admin"])
 
 
 # ================= HANDLERS DE ERRO =================
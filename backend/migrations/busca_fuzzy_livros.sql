@@ -0,0 +1,21 @@
+-- Busca fuzzy (tolerante a erros de digitação) por título e autor
+-- Requer busca_textual_livros.sql (função biblioteca.f_unaccent)
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. EXTENSÃO PG_TRGM
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. ÍNDICES GIN DE TRIGRAMAS
+-- As expressões devem ser idênticas às usadas em LivroRepository._buscar_fuzzy
+CREATE INDEX IF NOT EXISTS idx_livros_titulo_trgm
+    ON biblioteca.livros USING gin (biblioteca.f_unaccent(lower(titulo)) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_livros_autor_trgm
+    ON biblioteca.livros USING gin (biblioteca.f_unaccent(lower(autor)) gin_trgm_ops);
+
+-- 3. VERIFICAÇÃO
+SELECT 'Busca fuzzy configurada com sucesso!' as status;
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.idx_livros_titulo_trgm;
+-- DROP INDEX IF EXISTS biblioteca.idx_livros_autor_trgm;
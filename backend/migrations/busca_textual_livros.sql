@@ -0,0 +1,34 @@
+-- Busca textual (full-text search) no catálogo de livros
+-- Substitui as buscas ILIKE '%termo%' (que sempre fazem seq scan) por um
+-- tsvector mantido pelo próprio PostgreSQL com índice GIN.
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. EXTENSÃO UNACCENT
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- 2. WRAPPER IMUTÁVEL DO UNACCENT
+-- unaccent() é STABLE; colunas geradas e índices exigem funções IMMUTABLE
+CREATE OR REPLACE FUNCTION biblioteca.f_unaccent(texto TEXT)
+RETURNS TEXT AS $$
+    SELECT public.unaccent('public.unaccent', texto)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+-- 3. COLUNA TSVECTOR (título com peso A, autor com peso B)
+ALTER TABLE biblioteca.livros
+ADD COLUMN IF NOT EXISTS busca_vetor tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese', biblioteca.f_unaccent(coalesce(titulo, ''))), 'A') ||
+    setweight(to_tsvector('portuguese', biblioteca.f_unaccent(coalesce(autor, ''))), 'B')
+) STORED;
+
+-- 4. ÍNDICE GIN
+CREATE INDEX IF NOT EXISTS idx_livros_busca_vetor
+    ON biblioteca.livros USING gin (busca_vetor);
+
+-- 5. VERIFICAÇÃO
+SELECT 'Busca textual configurada com sucesso!' as status;
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.idx_livros_busca_vetor;
+-- ALTER TABLE biblioteca.livros DROP COLUMN IF EXISTS busca_vetor;
+-- DROP FUNCTION IF EXISTS biblioteca.f_unaccent(TEXT);
@@ -0,0 +1,25 @@
+-- Cache persistente das buscas de capa (Google Books), incluindo "não encontrada"
+-- Compartilhado por LivroRepository, LivroService e utils/atualizar_capas_pg.py
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. TABELA DE CACHE
+-- chave = título|autor|isbn normalizados (ver atualizar_capas_pg.chave_capa)
+CREATE TABLE IF NOT EXISTS biblioteca.capas_cache (
+    chave VARCHAR PRIMARY KEY,
+    capa_url VARCHAR,
+    encontrada BOOLEAN NOT NULL DEFAULT FALSE,
+    consultado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira_em TIMESTAMP NOT NULL
+);
+
+-- 2. ÍNDICE PARA LIMPEZA DE ENTRADAS EXPIRADAS
+CREATE INDEX IF NOT EXISTS ix_biblioteca_capas_cache_expira_em
+    ON biblioteca.capas_cache (expira_em);
+
+-- 3. VERIFICAÇÃO
+SELECT encontrada, COUNT(*) AS quantidade
+FROM biblioteca.capas_cache
+GROUP BY encontrada;
+
+-- ROLLBACK (se necessário)
+-- DROP TABLE IF EXISTS biblioteca.capas_cache;
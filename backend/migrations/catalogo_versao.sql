@@ -0,0 +1,22 @@
+-- Versão do catálogo para invalidação do índice em memória entre workers
+-- Cada escrita em biblioteca.livros incrementa o contador na mesma transação
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. TABELA DE VERSÃO (LINHA ÚNICA)
+CREATE TABLE IF NOT EXISTS biblioteca.catalogo_versao (
+    id INTEGER PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_catalogo_versao_unica CHECK (id = 1)
+);
+
+INSERT INTO biblioteca.catalogo_versao (id, versao)
+VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
+
+-- 2. VERIFICAÇÃO
+SELECT versao FROM biblioteca.catalogo_versao;
+
+-- ROLLBACK (se necessário)
+-- DROP TABLE IF EXISTS biblioteca.catalogo_versao;
@@ -0,0 +1,33 @@
+-- Fila persistente de enriquecimento de livros (busca de capa fora da requisição)
+-- Processada pelo trabalhador iniciado com a aplicação (service/enriquecimento_service.py)
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. TABELA DA FILA
+CREATE TABLE IF NOT EXISTS biblioteca.enriquecimento_jobs (
+    id SERIAL PRIMARY KEY,
+    livro_id INTEGER NOT NULL REFERENCES biblioteca.livros(id) ON DELETE CASCADE,
+    tipo VARCHAR(20) NOT NULL DEFAULT 'capa',
+    status VARCHAR(20) NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    erro VARCHAR,
+    criado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_enriquecimento_jobs_status CHECK (status IN ('pendente', 'processando', 'falhou'))
+);
+
+-- 2. ÍNDICES (retirada de tarefas e limpeza por livro)
+CREATE INDEX IF NOT EXISTS ix_enriquecimento_jobs_fila
+    ON biblioteca.enriquecimento_jobs (status, proxima_tentativa);
+
+CREATE INDEX IF NOT EXISTS ix_biblioteca_enriquecimento_jobs_livro_id
+    ON biblioteca.enriquecimento_jobs (livro_id);
+
+-- 3. VERIFICAÇÃO
+SELECT tipo, status, COUNT(*) AS quantidade
+FROM biblioteca.enriquecimento_jobs
+GROUP BY tipo, status;
+
+-- ROLLBACK (se necessário)
+-- DROP TABLE IF EXISTS biblioteca.enriquecimento_jobs;
@@ -0,0 +1,57 @@
+-- Estatísticas do catálogo pré-agregadas (/api/livros/estatisticas/*)
+-- Mantidas por incremento a cada escrita em livros e reconciliadas periodicamente
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. TOTAIS (LINHA ÚNICA)
+CREATE TABLE IF NOT EXISTS biblioteca.estatisticas_catalogo (
+    id INTEGER PRIMARY KEY,
+    total_livros BIGINT NOT NULL DEFAULT 0,
+    livros_sem_estoque BIGINT NOT NULL DEFAULT 0,
+    estoque_total BIGINT NOT NULL DEFAULT 0,
+    valor_inventario NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP,
+    reconciliado_em TIMESTAMP,
+
+    CONSTRAINT chk_estatisticas_catalogo_unica CHECK (id = 1)
+);
+
+-- 2. LIVROS POR AUTOR
+CREATE TABLE IF NOT EXISTS biblioteca.estatisticas_autores (
+    autor VARCHAR PRIMARY KEY,
+    quantidade BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_biblioteca_estatisticas_autores_quantidade
+    ON biblioteca.estatisticas_autores (quantidade);
+
+-- 3. CARGA INICIAL (a mesma conta de EstatisticasRepository.reconciliar)
+INSERT INTO biblioteca.estatisticas_catalogo
+    (id, total_livros, livros_sem_estoque, estoque_total, valor_inventario, reconciliado_em)
+SELECT 1,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE estoque = 0),
+       COALESCE(SUM(estoque), 0),
+       COALESCE(SUM(preco * estoque), 0),
+       CURRENT_TIMESTAMP
+FROM biblioteca.livros
+ON CONFLICT (id) DO UPDATE SET
+    total_livros = EXCLUDED.total_livros,
+    livros_sem_estoque = EXCLUDED.livros_sem_estoque,
+    estoque_total = EXCLUDED.estoque_total,
+    valor_inventario = EXCLUDED.valor_inventario,
+    reconciliado_em = EXCLUDED.reconciliado_em;
+
+INSERT INTO biblioteca.estatisticas_autores (autor, quantidade)
+SELECT autor, COUNT(*)
+FROM biblioteca.livros
+GROUP BY autor
+ON CONFLICT (autor) DO UPDATE SET quantidade = EXCLUDED.quantidade;
+
+-- 4. VERIFICAÇÃO
+SELECT e.total_livros, (SELECT COUNT(*) FROM biblioteca.livros) AS total_real,
+       e.livros_sem_estoque, e.estoque_total, e.valor_inventario
+FROM biblioteca.estatisticas_catalogo e;
+
+-- ROLLBACK (se necessário)
+-- DROP TABLE IF EXISTS biblioteca.estatisticas_autores;
+-- DROP TABLE IF EXISTS biblioteca.estatisticas_catalogo;
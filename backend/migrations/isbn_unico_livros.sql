@@ -0,0 +1,64 @@
+-- ISBN canônico (ISBN-13 só com dígitos) e índice único para busca por ISBN
+-- Mesma regra de utils/isbn.py: ISBN-10 vira 978 + 9 dígitos + novo verificador
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. NORMALIZAR (remover hífens/espaços, maiúsculas para o X do ISBN-10)
+UPDATE biblioteca.livros
+SET isbn = NULLIF(UPPER(REGEXP_REPLACE(isbn, '[\s-]', '', 'g')), '')
+WHERE isbn IS NOT NULL
+  AND isbn IS DISTINCT FROM NULLIF(UPPER(REGEXP_REPLACE(isbn, '[\s-]', '', 'g')), '');
+
+-- 2. CONVERTER ISBN-10 PARA ISBN-13
+UPDATE biblioteca.livros l
+SET isbn = c.base || ((10 - (
+        SELECT SUM(SUBSTRING(c.base, i, 1)::int * CASE WHEN i % 2 = 0 THEN 3 ELSE 1 END)
+        FROM generate_series(1, 12) AS i
+    ) % 10) % 10)::text
+FROM (
+    SELECT id, '978' || LEFT(isbn, 9) AS base
+    FROM biblioteca.livros
+    WHERE isbn ~ '^[0-9]{9}[0-9X]$'
+) c
+WHERE l.id = c.id;
+
+-- 3. DUPLICADOS
+-- O livro mais antigo mantém o ISBN; os demais são guardados aqui e ficam sem ISBN
+CREATE TABLE IF NOT EXISTS biblioteca.isbn_duplicados_backup (
+    livro_id INTEGER PRIMARY KEY,
+    isbn VARCHAR NOT NULL,
+    mantido_no_livro INTEGER NOT NULL,
+    registrado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+WITH duplicados AS (
+    SELECT id, isbn,
+           ROW_NUMBER() OVER (PARTITION BY isbn ORDER BY id) AS ordem,
+           MIN(id) OVER (PARTITION BY isbn) AS primeiro
+    FROM biblioteca.livros
+    WHERE isbn IS NOT NULL
+), salvos AS (
+    INSERT INTO biblioteca.isbn_duplicados_backup (livro_id, isbn, mantido_no_livro)
+    SELECT id, isbn, primeiro FROM duplicados WHERE ordem > 1
+    ON CONFLICT (livro_id) DO NOTHING
+    RETURNING livro_id
+)
+UPDATE biblioteca.livros
+SET isbn = NULL
+WHERE id IN (SELECT id FROM duplicados WHERE ordem > 1);
+
+-- 4. ÍNDICE ÚNICO PARCIAL (GET /api/livros/isbn/{isbn})
+CREATE UNIQUE INDEX IF NOT EXISTS ux_livros_isbn
+    ON biblioteca.livros (isbn)
+    WHERE isbn IS NOT NULL;
+
+-- 5. VERIFICAÇÃO
+SELECT
+    COUNT(*) FILTER (WHERE isbn ~ '^[0-9]{13}$') AS isbn13,
+    COUNT(*) FILTER (WHERE isbn IS NOT NULL AND isbn !~ '^[0-9]{13}$') AS fora_do_padrao,
+    (SELECT COUNT(*) FROM biblioteca.isbn_duplicados_backup) AS duplicados_removidos
+FROM biblioteca.livros;
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.ux_livros_isbn;
+-- UPDATE biblioteca.livros l SET isbn = b.isbn FROM biblioteca.isbn_duplicados_backup b WHERE l.id = b.livro_id;
+-- DROP TABLE IF EXISTS biblioteca.isbn_duplicados_backup;
@@ -0,0 +1,17 @@
+-- Índice de data_atualizacao dos livros (sincronização incremental do catálogo em memória)
+-- Quando outro processo altera o catálogo, cada worker relê só os livros com
+-- data_atualizacao recente em vez do catálogo inteiro (utils/indice_catalogo.py)
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. ÍNDICE
+CREATE INDEX IF NOT EXISTS ix_livros_data_atualizacao
+    ON biblioteca.livros (data_atualizacao);
+
+-- 2. VERIFICAÇÃO (deve usar ix_livros_data_atualizacao)
+EXPLAIN
+SELECT id
+FROM biblioteca.livros
+WHERE data_atualizacao >= (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - INTERVAL '30 seconds';
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.ix_livros_data_atualizacao;
@@ -0,0 +1,28 @@
+-- Data de criação obrigatória nos pedidos (chave do cursor do histórico de pedidos)
+-- GET /api/pedidos/listar ordena por (created_at, id) e o cursor leva as duas chaves;
+-- um pedido sem created_at geraria um cursor que a própria API rejeita
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. BACKFILL (pedidos antigos sem data: última atualização ou agora, em UTC)
+UPDATE biblioteca.pedidos
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+WHERE created_at IS NULL;
+
+-- 2. PADRÃO PARA INSERÇÕES FORA DA APLICAÇÃO
+ALTER TABLE biblioteca.pedidos
+    ALTER COLUMN created_at SET DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC');
+
+-- 3. NOT NULL
+ALTER TABLE biblioteca.pedidos
+    ALTER COLUMN created_at SET NOT NULL;
+
+-- 4. VERIFICAÇÃO (deve retornar is_nullable = NO)
+SELECT column_name, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_schema = 'biblioteca'
+  AND table_name = 'pedidos'
+  AND column_name = 'created_at';
+
+-- ROLLBACK (se necessário)
+-- ALTER TABLE biblioteca.pedidos ALTER COLUMN created_at DROP NOT NULL;
+-- ALTER TABLE biblioteca.pedidos ALTER COLUMN created_at DROP DEFAULT;
@@ -0,0 +1,22 @@
+-- Índice do histórico de pedidos por usuário (usado por PedidoRepository.listar_pedidos_usuario)
+-- Filtro por usuário, intervalo de datas, ORDER BY created_at DESC, id DESC, LIMIT e cursor
+-- são resolvidos pelo índice, sem ordenar todos os pedidos do usuário
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. ÍNDICE COMPOSTO
+CREATE INDEX IF NOT EXISTS ix_pedidos_usuario_criacao
+    ON biblioteca.pedidos (usuario_id, created_at, id);
+
+-- 2. ESTATÍSTICAS DO PLANEJADOR
+ANALYZE biblioteca.pedidos;
+
+-- 3. VERIFICAÇÃO (deve usar ix_pedidos_usuario_criacao, sem Sort)
+EXPLAIN
+SELECT id, status, total, created_at
+FROM biblioteca.pedidos
+WHERE usuario_id = 1
+ORDER BY created_at DESC, id DESC
+LIMIT 50;
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.ix_pedidos_usuario_criacao;
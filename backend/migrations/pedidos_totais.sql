@@ -0,0 +1,39 @@
+-- Total e quantidade de itens gravados no pedido (antes calculados dos itens a cada leitura)
+-- Preenchidos no checkout (PedidoRepository.criar_pedido_do_carrinho); conferência em
+-- GET /api/admin/pedidos/totais e correção em POST /api/admin/pedidos/totais/corrigir
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. COLUNAS
+ALTER TABLE biblioteca.pedidos ADD COLUMN IF NOT EXISTS total NUMERIC(10, 2) NOT NULL DEFAULT 0;
+ALTER TABLE biblioteca.pedidos ADD COLUMN IF NOT EXISTS total_itens INTEGER NOT NULL DEFAULT 0;
+
+-- 2. BACKFILL (só pedidos que divergem da soma dos itens)
+UPDATE biblioteca.pedidos p
+SET total = i.total,
+    total_itens = i.total_itens
+FROM (
+    SELECT pedido_id,
+           ROUND(SUM(quantidade * preco_unitario), 2) AS total,
+           SUM(quantidade) AS total_itens
+    FROM biblioteca.itens_pedido
+    GROUP BY pedido_id
+) i
+WHERE i.pedido_id = p.id
+  AND (p.total <> i.total OR p.total_itens <> i.total_itens);
+
+-- 3. VERIFICAÇÃO (deve retornar 0)
+SELECT COUNT(*) AS pedidos_divergentes
+FROM biblioteca.pedidos p
+LEFT JOIN (
+    SELECT pedido_id,
+           ROUND(SUM(quantidade * preco_unitario), 2) AS total,
+           SUM(quantidade) AS total_itens
+    FROM biblioteca.itens_pedido
+    GROUP BY pedido_id
+) i ON i.pedido_id = p.id
+WHERE p.total <> COALESCE(i.total, 0)
+   OR p.total_itens <> COALESCE(i.total_itens, 0);
+
+-- ROLLBACK (se necessário)
+-- ALTER TABLE biblioteca.pedidos DROP COLUMN IF EXISTS total_itens;
+-- ALTER TABLE biblioteca.pedidos DROP COLUMN IF EXISTS total;
@@ -0,0 +1,24 @@
+-- Heartbeat de replicação (lag das réplicas de leitura, DATABASE_REPLICA_URLS)
+-- O primário grava a hora a cada REPLICA_VERIFICACAO segundos; a diferença
+-- para o valor lido em cada réplica é o atraso usado no roteamento
+-- Execute este script no PostgreSQL primário (idempotente); a tabela chega às réplicas pela replicação
+
+-- 1. TABELA (LINHA ÚNICA)
+CREATE TABLE IF NOT EXISTS biblioteca.replicacao_heartbeat (
+    id INTEGER PRIMARY KEY,
+    gravado_em TIMESTAMP NOT NULL,
+
+    CONSTRAINT chk_replicacao_heartbeat_unica CHECK (id = 1)
+);
+
+-- 2. PRIMEIRA MARCA
+INSERT INTO biblioteca.replicacao_heartbeat (id, gravado_em)
+VALUES (1, (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'))
+ON CONFLICT (id) DO NOTHING;
+
+-- 3. VERIFICAÇÃO (na réplica: diferença para a hora do primário = lag)
+SELECT gravado_em, (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - gravado_em AS idade
+FROM biblioteca.replicacao_heartbeat;
+
+-- ROLLBACK (se necessário)
+-- DROP TABLE IF EXISTS biblioteca.replicacao_heartbeat;
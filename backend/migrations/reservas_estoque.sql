@@ -0,0 +1,45 @@
+-- Reservas de estoque dos pedidos (baixa atômica no checkout, devolução no cancelamento/expiração)
+-- Usada por repositories/estoque_repository.py; reservas de pedidos não pagos expiram
+-- após RESERVA_ESTOQUE_MINUTOS (service/estoque_service.py)
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. TABELA DE RESERVAS
+CREATE TABLE IF NOT EXISTS biblioteca.reservas_estoque (
+    id SERIAL PRIMARY KEY,
+    pedido_id INTEGER NOT NULL REFERENCES biblioteca.pedidos(id) ON DELETE CASCADE,
+    livro_id INTEGER NOT NULL REFERENCES biblioteca.livros(id),
+    quantidade INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'ativa',
+    expira_em TIMESTAMP NOT NULL,
+    criado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_reservas_estoque_quantidade CHECK (quantidade > 0),
+    CONSTRAINT chk_reservas_estoque_status CHECK (status IN ('ativa', 'confirmada', 'liberada'))
+);
+
+-- 2. ÍNDICES (varredura de expiradas e reservas de um pedido)
+CREATE INDEX IF NOT EXISTS ix_reservas_estoque_expiracao
+    ON biblioteca.reservas_estoque (status, expira_em);
+
+CREATE INDEX IF NOT EXISTS ix_biblioteca_reservas_estoque_pedido_id
+    ON biblioteca.reservas_estoque (pedido_id);
+
+-- 3. ESTOQUE NUNCA NEGATIVO (última barreira contra venda acima do estoque)
+-- NOT VALID: vale para toda escrita nova sem bloquear a tabela validando linhas antigas
+ALTER TABLE biblioteca.livros DROP CONSTRAINT IF EXISTS chk_livros_estoque_nao_negativo;
+ALTER TABLE biblioteca.livros
+    ADD CONSTRAINT chk_livros_estoque_nao_negativo CHECK (estoque >= 0) NOT VALID;
+
+-- 4. VERIFICAÇÃO
+SELECT status, COUNT(*) AS reservas, SUM(quantidade) AS unidades
+FROM biblioteca.reservas_estoque
+GROUP BY status;
+
+SELECT COUNT(*) AS livros_com_estoque_negativo
+FROM biblioteca.livros
+WHERE estoque < 0;
+
+-- ROLLBACK (se necessário)
+-- ALTER TABLE biblioteca.livros DROP CONSTRAINT IF EXISTS chk_livros_estoque_nao_negativo;
+-- DROP TABLE IF EXISTS biblioteca.reservas_estoque;
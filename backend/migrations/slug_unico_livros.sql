@@ -0,0 +1,28 @@
+-- Slug único em biblioteca.livros (alocação de slugs sem corrida entre workers)
+-- Execute este script no PostgreSQL (idempotente)
+
+-- 1. CORRIGIR SLUGS DUPLICADOS EXISTENTES
+-- Mantém o slug no livro mais antigo e acrescenta o id nos demais
+UPDATE biblioteca.livros l
+SET slug = l.slug || '-' || l.id
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY slug ORDER BY id) AS ordem
+    FROM biblioteca.livros
+    WHERE slug IS NOT NULL
+) d
+WHERE l.id = d.id AND d.ordem > 1;
+
+-- 2. ÍNDICE ÚNICO
+-- text_pattern_ops atende também o LIKE 'base-%' de LivroRepository.alocar_slugs
+CREATE UNIQUE INDEX IF NOT EXISTS idx_livros_slug_unico
+    ON biblioteca.livros (slug text_pattern_ops);
+
+-- 3. VERIFICAÇÃO
+SELECT slug, COUNT(*) AS quantidade
+FROM biblioteca.livros
+WHERE slug IS NOT NULL
+GROUP BY slug
+HAVING COUNT(*) > 1;
+
+-- ROLLBACK (se necessário)
+-- DROP INDEX IF EXISTS biblioteca.idx_livros_slug_unico;
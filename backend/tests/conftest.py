@@ -0,0 +1,93 @@
+"""
+Configuração dos testes: SQLite em arquivos temporários no lugar do PostgreSQL
+
+O schema "biblioteca" é um segundo arquivo anexado (ATTACH) a cada conexão,
+então os modelos rodam sem alteração. Execute a partir da raiz do repositório:
+
+    python -m pytest backend/tests
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[2]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+PASTA_BANCOS = tempfile.mkdtemp(prefix="biblioteca-testes-")
+# O "@" mantém o log de database.py (que corta a URL no "@") funcionando com SQLite
+os.environ["DATABASE_URL"] = f"sqlite:///{PASTA_BANCOS}/principal@testes.db"
+os.environ.setdefault("DATABASE_REPLICA_URLS", "")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+
+from backend.app import database  # noqa: E402
+
+
+def anexar_schema(engine, arquivo: str) -> None:
+    """Anexa o arquivo do schema biblioteca em cada conexão nova do engine"""
+    @event.listens_for(engine, "connect")
+    def _anexar(dbapi_conn, registro):
+        dbapi_conn.execute(f"ATTACH DATABASE '{arquivo}' AS biblioteca")
+
+
+anexar_schema(database.engine, f"{PASTA_BANCOS}/biblioteca.db")
+
+# Todos os modelos registrados no metadata antes do create_all
+import backend.app.domain.models.usuario  # noqa: E402,F401
+from backend.app.domain.models.Livro import (  # noqa: E402,F401
+    capa_cache, catalogo_versao, enriquecimento_job, estatisticas, livro
+)
+from backend.app.domain.models import replicacao  # noqa: E402,F401
+from backend.app.domain.models.vendas import (  # noqa: E402,F401
+    item_carrinho, item_pedido, pagamento, pedido_pagamento_link, pedidos, reserva_estoque
+)
+from backend.app.domain.models.Livro.catalogo_versao import CatalogoVersao  # noqa: E402
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository  # noqa: E402
+from backend.app.service.estatisticas_service import acumulador_estatisticas  # noqa: E402
+from backend.app.utils.indice_catalogo import indice_catalogo  # noqa: E402
+from backend.app.utils.roteamento_replicas import roteador_replicas  # noqa: E402
+
+
+def criar_engine_sqlite(nome: str):
+    """Engine de outro banco SQLite (ex.: réplica), com o próprio schema biblioteca"""
+    engine = create_engine(f"sqlite:///{PASTA_BANCOS}/{nome}.db")
+    anexar_schema(engine, f"{PASTA_BANCOS}/{nome}_biblioteca.db")
+    return engine
+
+
+def recriar_tabelas(engine) -> None:
+    database.Base.metadata.drop_all(bind=engine)
+    database.Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def banco():
+    """Tabelas vazias, versão do catálogo e estatísticas iniciais; retorna a fábrica de sessões"""
+    recriar_tabelas(database.engine)
+    with database.SessionLocal() as db:
+        db.add(CatalogoVersao(id=1, versao=1, atualizado_em=datetime.utcnow()))
+        db.commit()
+        EstatisticasRepository(db).reconciliar()
+    indice_catalogo.invalidar()
+    yield database.SessionLocal
+    # Variações de estoque pendentes não vazam para o próximo teste
+    acumulador_estatisticas.aplicar()
+    indice_catalogo.invalidar()
+    database.engine.dispose()
+
+
+@pytest.fixture
+def replica(banco):
+    """Segundo banco SQLite registrado como réplica de leitura do primário"""
+    engine = criar_engine_sqlite("replica")
+    recriar_tabelas(engine)
+    roteador_replicas.configurar([engine], lag_maximo=5, validade=60)
+    yield engine
+    roteador_replicas.configurar([], lag_maximo=5, validade=60)
+    roteador_replicas._lags.clear()
+    engine.dispose()
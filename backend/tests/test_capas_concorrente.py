@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from backend.app.utils import atualizar_capas_pg as capas
+
+# Roteiro do stub por título: respostas em ordem (a última se repete)
+#   int -> status sem corpo; "capa"/"vazio" -> 200; "lento" -> demora além do timeout
+ROTEIRO = {
+    "Com capa": ["capa"],
+    "Sem capa": ["vazio"],
+    "Instavel": [503, 502, "capa"],
+    "Limitado": [429, "capa"],
+    "Fora do ar": [500],
+    "Lento": ["lento"],
+    "Inexistente": [404],
+}
+ATRASO_LENTO = 0.5
+
+
+class StubGoogleBooks(BaseHTTPRequestHandler):
+    """Imita /books/v1/volumes seguindo ROTEIRO e registra cada requisição"""
+    chamadas = defaultdict(list)
+    trava = threading.Lock()
+
+    def do_GET(self):
+        consulta = parse_qs(urlparse(self.path).query)["q"][0]
+        titulo = consulta.rsplit(" ", 1)[0]
+        with self.trava:
+            self.chamadas[titulo].append(time.monotonic())
+            roteiro = ROTEIRO[titulo]
+            resposta = roteiro[min(len(self.chamadas[titulo]), len(roteiro)) - 1]
+
+        if resposta == "lento":
+            time.sleep(ATRASO_LENTO)
+            resposta = "capa"
+        if isinstance(resposta, int):
+            self.send_response(resposta)
+            if resposta == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        itens = [{"volumeInfo": {"imageLinks": {"thumbnail": f"http://capas/{titulo}.jpg"}}}]
+        corpo = json.dumps({"items": itens if resposta == "capa" else []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        try:
+            self.wfile.write(corpo)
+        except ConnectionError:
+            pass  # cliente desistiu (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_capas(monkeypatch):
+    StubGoogleBooks.chamadas.clear()
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), StubGoogleBooks)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(capas, "GOOGLE_BOOKS_URL", f"http://127.0.0.1:{servidor.server_port}/books/v1/volumes")
+    monkeypatch.setattr(capas, "CAPAS_TIMEOUT", 0.2)
+    monkeypatch.setattr(capas, "CAPAS_BACKOFF", 0.05)
+    yield StubGoogleBooks.chamadas
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_busca_concorrente_com_repeticao_backoff_e_timeout(stub_capas):
+    livros = [(i, titulo, "Autor") for i, titulo in enumerate(ROTEIRO, start=1)]
+    lotes = []
+
+    resumo = asyncio.run(capas.buscar_capas_concorrente(livros, lotes.append, concorrencia=4, tamanho_lote=2))
+
+    gravados = {livro[1]: url for lote in lotes for livro, url in lote}
+    assert gravados == {
+        "Com capa": "http://capas/Com capa.jpg",
+        "Sem capa": None,                       # negativo também vai para o cache
+        "Instavel": "http://capas/Instavel.jpg",
+        "Limitado": "http://capas/Limitado.jpg",
+    }
+    assert resumo == {"processados": 7, "encontradas": 3, "falhas": 3, "lotes": 2}
+
+    # 5xx repetido com backoff exponencial; 404 não é repetido
+    tentativas = capas.CAPAS_TENTATIVAS
+    assert len(stub_capas["Instavel"]) == 3
+    assert len(stub_capas["Fora do ar"]) == tentativas
+    assert len(stub_capas["Lento"]) == tentativas
+    assert len(stub_capas["Inexistente"]) == 1
+    primeira, segunda, terceira = stub_capas["Instavel"]
+    assert segunda - primeira >= 0.05
+    assert terceira - segunda >= 0.1
+
+    # Retry-After do 429 é respeitado
+    antes, depois = stub_capas["Limitado"]
+    assert depois - antes >= 1
+
+
+def test_timeout_vira_falha_sem_resultado(stub_capas):
+    lotes = []
+    resumo = asyncio.run(capas.buscar_capas_concorrente([(1, "Lento", "Autor")], lotes.append))
+    assert resumo["falhas"] == 1 and lotes == []
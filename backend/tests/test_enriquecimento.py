@@ -0,0 +1,57 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.routers import livro_router
+from backend.app.service import enriquecimento_service
+from backend.app.service.enriquecimento_service import TrabalhadorEnriquecimento, enfileirar
+from backend.app.utils import indice_catalogo as modulo_indice
+from backend.app.utils.indice_catalogo import IndiceCatalogo, indice_catalogo
+from backend.app.utils.indice_prefixos import indice_autocompletar
+from backend.app.utils.indice_trigramas import indice_fuzzy
+
+CAPA = "http://capas.exemplo/dom-casmurro.jpg"
+
+
+def test_capa_do_enriquecimento_atualiza_indices_por_livro(banco, monkeypatch):
+    monkeypatch.setattr(modulo_indice, "INTERVALO_VERSAO", 0)
+    monkeypatch.setattr(enriquecimento_service.cache_capas, "resolver_capa", lambda db, titulo, autor, isbn: CAPA)
+    outro_worker = IndiceCatalogo()
+
+    with banco() as db:
+        livro = Livro(titulo="Dom Casmurro", autor="Machado de Assis", slug="dom-casmurro", preco=30, estoque=5)
+        db.add(livro)
+        db.flush()
+        enfileirar(db, livro.id)
+        db.commit()
+        livro_id = livro.id
+
+        assert indice_catalogo.pronto(db) and outro_worker.pronto(db)
+        indice_fuzzy.carregar([(livro_id, "Dom Casmurro", "Machado de Assis")])
+        indice_autocompletar.carregar([(livro_id, "Dom Casmurro", "Machado de Assis", "dom-casmurro")])
+        geracao = indice_catalogo.geracao
+
+    app = FastAPI()
+    app.include_router(livro_router.router, prefix="/api/livros")
+    with TestClient(app) as cliente:
+        etag = cliente.get("/api/livros/listar").headers["etag"]
+        assert cliente.get("/api/livros/listar", headers={"If-None-Match": etag}).status_code == 304
+
+        assert TrabalhadorEnriquecimento(fabrica_sessao=banco).processar_pendentes() == 1
+
+        # A listagem revalidada traz a capa nova (não um 304 com a anterior)
+        resposta = cliente.get("/api/livros/listar", headers={"If-None-Match": etag})
+        assert resposta.status_code == 200
+        assert resposta.json()[0]["capa_url"] == CAPA
+
+    with banco() as db:
+        assert indice_catalogo.pronto(db)
+        assert indice_catalogo.obter(livro_id).capa_url == CAPA
+        assert indice_catalogo.geracao == geracao
+        # Título e autor não mudaram: índices de busca seguem carregados
+        assert indice_fuzzy.carregado and indice_autocompletar.carregado
+
+        # Outro worker recebe a capa pela releitura por data_atualizacao e chega à mesma marca
+        assert outro_worker.pronto(db)
+        assert outro_worker.obter(livro_id).capa_url == CAPA
+        assert outro_worker.marca_atual() == indice_catalogo.marca_atual()
@@ -0,0 +1,175 @@
+import threading
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select, update
+
+from backend.app.domain.models.Livro.estatisticas import EstatisticasCatalogo
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.models.usuario.usuario import Usuario
+from backend.app.domain.models.vendas.item_carrinho import ItemCarrinho
+from backend.app.domain.models.vendas.reserva_estoque import ReservaEstoque
+from backend.app.repositories.estatisticas_repository import EstatisticasRepository
+from backend.app.repositories.estoque_repository import EstoqueInsuficiente
+from backend.app.routers import livro_router
+from backend.app.service.estatisticas_service import ReconciliadorEstatisticas, acumulador_estatisticas
+from backend.app.service.estoque_service import cancelar_pedido
+from backend.app.service.pedido_service import PedidoService
+from backend.app.utils import indice_catalogo as modulo_indice
+from backend.app.utils.indice_catalogo import indice_catalogo, obter_versao_catalogo
+
+COMPRADORES = 30
+ESTOQUE_DISPUTADO = 10
+
+
+def _preparar(db) -> None:
+    db.add_all([
+        Livro(id=1, titulo="Disputado", autor="Autor A", preco=50, estoque=ESTOQUE_DISPUTADO),
+        Livro(id=2, titulo="Folgado", autor="Autor B", preco=20, estoque=100),
+    ])
+    db.execute(insert(Usuario), [
+        {"id": i, "nome": f"Cliente {i}", "email": f"cliente{i}@teste.com", "senha_hash": "x"}
+        for i in range(1, COMPRADORES + 1)
+    ])
+    # Metade dos carrinhos lista os livros na ordem inversa (locks em ordem de id evitam deadlock)
+    db.execute(insert(ItemCarrinho), [
+        {"usuario_id": i, "livro_id": livro_id, "quantidade": 1}
+        for i in range(1, COMPRADORES + 1)
+        for livro_id in ((1, 2) if i % 2 else (2, 1))
+    ])
+    db.commit()
+    EstatisticasRepository(db).reconciliar()
+
+
+def test_checkouts_simultaneos_nao_vendem_alem_do_estoque(banco):
+    with banco() as db:
+        _preparar(db)
+        assert indice_catalogo.pronto(db)
+        versao = obter_versao_catalogo(db)
+
+    largada = threading.Barrier(COMPRADORES)
+    resultados = Counter()
+
+    def comprar(usuario_id: int) -> None:
+        with banco() as db:
+            largada.wait()
+            try:
+                PedidoService(db).finalizar_pedido(usuario_id)
+                resultados["vendidos"] += 1
+            except EstoqueInsuficiente:
+                resultados["sem_estoque"] += 1
+            except Exception as e:  # pragma: no cover - aparece na asserção
+                resultados[repr(e)] += 1
+
+    threads = [threading.Thread(target=comprar, args=(i,)) for i in range(1, COMPRADORES + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resultados == {"vendidos": ESTOQUE_DISPUTADO, "sem_estoque": COMPRADORES - ESTOQUE_DISPUTADO}
+
+    with banco() as db:
+        assert db.get(Livro, 1).estoque == 0
+        assert db.get(Livro, 2).estoque == 100 - ESTOQUE_DISPUTADO
+        reservados = dict(db.execute(
+            select(ReservaEstoque.livro_id, func.sum(ReservaEstoque.quantidade)).group_by(ReservaEstoque.livro_id)
+        ).all())
+        assert reservados == {1: ESTOQUE_DISPUTADO, 2: ESTOQUE_DISPUTADO}
+
+        # Vendas não mexem na versão global; o índice local já tem o estoque novo
+        assert obter_versao_catalogo(db) == versao
+        assert indice_catalogo.obter(1).estoque == 0
+        assert indice_catalogo.obter(2).estoque == 100 - ESTOQUE_DISPUTADO
+
+        # Estatísticas só mudam quando o acumulador grava, e batem com a reconciliação
+        assert db.get(EstatisticasCatalogo, 1).estoque_total == 100 + ESTOQUE_DISPUTADO
+        assert acumulador_estatisticas.aplicar() == 2 * ESTOQUE_DISPUTADO
+        db.expire_all()
+        incremental = db.get(EstatisticasCatalogo, 1)
+        antes = (incremental.estoque_total, incremental.livros_sem_estoque, incremental.valor_inventario)
+        EstatisticasRepository(db).reconciliar()
+        db.expire_all()
+        reconciliado = db.get(EstatisticasCatalogo, 1)
+        assert antes == (reconciliado.estoque_total, reconciliado.livros_sem_estoque, reconciliado.valor_inventario)
+        assert antes[:2] == (100 - ESTOQUE_DISPUTADO, 1)
+
+
+def test_cancelamento_devolve_o_estoque_uma_vez(banco):
+    with banco() as db:
+        _preparar(db)
+        pedido = PedidoService(db).finalizar_pedido(1)
+        assert cancelar_pedido(db, pedido.id)
+        assert not cancelar_pedido(db, pedido.id)
+        db.expire_all()
+        assert db.get(Livro, 1).estoque == ESTOQUE_DISPUTADO
+        assert db.get(Livro, 2).estoque == 100
+
+
+def test_venda_renova_o_etag_da_listagem(banco, monkeypatch):
+    with banco() as db:
+        _preparar(db)
+
+    app = FastAPI()
+    app.include_router(livro_router.router, prefix="/api/livros")
+    with TestClient(app) as cliente:
+        def revalidar(etag):
+            return cliente.get("/api/livros/listar", headers={"If-None-Match": etag})
+
+        etag = cliente.get("/api/livros/listar").headers["etag"]
+        assert revalidar(etag).status_code == 304
+
+        # Venda neste processo: a versão global não muda, o ETag sim
+        with banco() as db:
+            PedidoService(db).finalizar_pedido(1)
+        resposta = revalidar(etag)
+        assert resposta.status_code == 200
+        assert {livro["id"]: livro["estoque"] for livro in resposta.json()} == {
+            1: ESTOQUE_DISPUTADO - 1, 2: 99
+        }
+
+        # Venda de outro worker (sem evento local): chega pela sincronização do índice
+        monkeypatch.setattr(modulo_indice, "INTERVALO_VERSAO", 0)
+        etag = resposta.headers["etag"]
+        with banco() as db:
+            db.execute(update(Livro).where(Livro.id == 2).values(
+                estoque=Livro.estoque - 1, data_atualizacao=func.current_timestamp()
+            ))
+            db.commit()
+        resposta = revalidar(etag)
+        assert resposta.status_code == 200
+        assert {livro["id"]: livro["estoque"] for livro in resposta.json()}[2] == 98
+
+
+def test_variacoes_anteriores_a_recontagem_nao_sao_somadas_de_novo(banco):
+    with banco() as db:
+        _preparar(db)
+        PedidoService(db).finalizar_pedido(1)
+
+        # Recontagem feita por outro processo enquanto a venda ainda estava acumulada
+        EstatisticasRepository(db).reconciliar()
+        db.expire_all()
+        recontado = db.get(EstatisticasCatalogo, 1).estoque_total
+        assert recontado == 100 + ESTOQUE_DISPUTADO - 2
+
+        assert acumulador_estatisticas.aplicar() == 0
+        db.expire_all()
+        assert db.get(EstatisticasCatalogo, 1).estoque_total == recontado
+
+        # Venda posterior à recontagem continua sendo somada
+        PedidoService(db).finalizar_pedido(2)
+        assert acumulador_estatisticas.aplicar() == 2
+        db.expire_all()
+        assert db.get(EstatisticasCatalogo, 1).estoque_total == recontado - 2
+
+
+def test_so_um_processo_reconta_por_periodo(banco):
+    primeiro = ReconciliadorEstatisticas(fabrica_sessao=banco, intervalo=3600)
+    segundo = ReconciliadorEstatisticas(fabrica_sessao=banco, intervalo=3600)
+    with banco() as db:
+        _preparar(db)
+    # _preparar acabou de reconciliar: nenhum dos dois reconta dentro do período
+    assert primeiro.reconciliar()["ignorada"]
+    assert segundo.reconciliar()["ignorada"]
+    assert not ReconciliadorEstatisticas(fabrica_sessao=banco, intervalo=0).reconciliar()["ignorada"]
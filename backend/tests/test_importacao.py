@@ -0,0 +1,35 @@
+import io
+
+from sqlalchemy import func, select
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.service.importacao_service import ImportacaoLivrosService
+
+CSV = """titulo,autor,preco,estoque,isbn
+Dom Casmurro,Machado de Assis,29.90,5,978-85-254-0625-5
+Memórias Póstumas,Machado de Assis,35.00,3,
+Dom Casmurro (outra edição),Machado de Assis,31.00,2,9788525406255
+Algoritmos,Cormen,199.00,1,9780306406157
+C,Kernighan,120.00,4,9780131103627
+Quincas Borba,Machado de Assis,25.00,7,0131103628
+Sem ISBN,Autor,10.00,1,
+"""
+
+
+def test_isbn_repetido_rejeita_so_a_linha(banco):
+    with banco() as db:
+        # Cadastro antigo, ainda com ISBN-10
+        db.add(Livro(titulo="Algoritmos", autor="Cormen", isbn="0306406152", slug="algoritmos"))
+        db.commit()
+
+        resumo = ImportacaoLivrosService(db).importar(io.StringIO(CSV), "csv", tamanho_lote=2)
+
+        assert resumo["inseridos"] == 4
+        assert resumo["rejeitados"] == 3
+        assert {erro["linha"]: erro["erro"] for erro in resumo["erros"]} == {
+            4: "isbn: já existe um livro com o ISBN 9788525406255",   # gravado pelo lote anterior
+            5: "isbn: já existe um livro com o ISBN 9780306406157",   # cadastro antigo (ISBN-10)
+            7: "isbn: ISBN 9780131103627 repetido no arquivo (linha 6)",  # mesmo lote
+        }
+        assert db.scalar(select(func.count()).select_from(Livro)) == 5
+        assert db.scalar(select(func.count()).where(Livro.isbn == "9788525406255")) == 1
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from backend.app import database
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.repositories.livro_repository import LivroRepository
+from backend.app.utils import indice_catalogo as modulo_indice
+from backend.app.utils.indice_catalogo import IndiceCatalogo, incrementar_versao_catalogo
+from backend.app.utils.indice_trigramas import indice_fuzzy
+
+
+def _cadastrar(db, quantidade):
+    antigo = datetime(2020, 1, 1)
+    db.add_all(
+        Livro(titulo=f"Livro {i}", autor="Autor", preco=10, estoque=5, data_criacao=antigo, data_atualizacao=antigo)
+        for i in range(quantidade)
+    )
+    db.commit()
+
+
+def test_escrita_de_outro_processo_sincroniza_so_os_livros_alterados(banco, monkeypatch):
+    monkeypatch.setattr(modulo_indice, "INTERVALO_VERSAO", 0)
+    outro_worker = IndiceCatalogo()
+    with banco() as db:
+        _cadastrar(db, 300)
+        assert outro_worker.pronto(db)
+        geracao = outro_worker.geracao
+
+        # Escrita de "outro processo": altera, remove e cria livros e incrementa a versão
+        alterado = db.get(Livro, 5)
+        alterado.titulo = "Título novo"
+        alterado.data_atualizacao = datetime.utcnow()
+        db.delete(db.get(Livro, 7))
+        db.add(Livro(titulo="Lançamento", autor="Outro", data_criacao=datetime.utcnow()))
+        incrementar_versao_catalogo(db, 3)
+        db.commit()
+
+        comandos = []
+        contar = lambda conn, cursor, sql, *args: comandos.append(sql)  # noqa: E731
+        event.listen(database.engine, "before_cursor_execute", contar)
+        try:
+            assert outro_worker.pronto(db)
+        finally:
+            event.remove(database.engine, "before_cursor_execute", contar)
+
+    # Versão, ids, livros alterados e livros novos: nenhuma releitura do catálogo inteiro
+    assert len(comandos) == 4
+    assert outro_worker.total() == 300
+    assert outro_worker.obter(5).titulo == "Título novo"
+    assert outro_worker.obter(7) is None
+    assert outro_worker.obter(301).titulo == "Lançamento"
+    assert outro_worker.geracao == geracao + 1
+    assert outro_worker.versao_atual() == 4
+
+
+def test_sem_escrita_externa_nao_le_livros(banco, monkeypatch):
+    monkeypatch.setattr(modulo_indice, "INTERVALO_VERSAO", 0)
+    indice = IndiceCatalogo()
+    with banco() as db:
+        _cadastrar(db, 10)
+        assert indice.pronto(db)
+        geracao = indice.geracao
+        assert indice.pronto(db)
+    assert indice.geracao == geracao
+
+
+def test_busca_fuzzy_enxerga_titulos_alterados_por_outro_processo(banco, monkeypatch):
+    monkeypatch.setattr(modulo_indice, "INTERVALO_VERSAO", 0)
+    indice_fuzzy.invalidar()
+    with banco() as db:
+        _cadastrar(db, 10)
+        repositorio = LivroRepository(db)
+        assert [l.id for l in repositorio.buscar_por_similaridade("Livro 3")][:1] == [4]
+
+        # Escrita de outro processo: nenhum evento local chega ao índice de trigramas
+        alterado = db.get(Livro, 5)
+        alterado.titulo = "Memórias Póstumas"
+        alterado.data_atualizacao = datetime.utcnow()
+        incrementar_versao_catalogo(db)
+        db.commit()
+
+        assert [l.id for l in repositorio.buscar_por_similaridade("memorias postumas")] == [5]
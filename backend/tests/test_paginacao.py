@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.utils.paginacao import codificar_cursor, decodificar_cursor
+
+
+def _cursor(dados) -> str:
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+
+
+def test_cursor_ida_e_volta():
+    criado = datetime(2026, 3, 1, 12, 30)
+    assert decodificar_cursor(codificar_cursor(42)) == {"id": 42}
+    assert decodificar_cursor(codificar_cursor(42, criado), com_chave=True) == {"id": 42, "k": criado}
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",                                   # base64 inválido
+    _cursor([1, 2]),                         # não é objeto
+    _cursor({"k": "2026-03-01T12:30:00"}),   # sem id
+    _cursor({"id": "42"}),                   # id como texto
+    _cursor({"id": True}),                   # id booleano
+    _cursor({"id": 42, "k": "ontem"}),       # data inválida
+    _cursor({"id": 42, "k": [1]}),           # chave de tipo inesperado
+    _cursor({"id": 42, "k": False}),
+    _cursor({"id": 42, "x": 1}),             # chave desconhecida
+])
+def test_cursor_invalido_retorna_400(cursor):
+    with pytest.raises(HTTPException) as erro:
+        decodificar_cursor(cursor)
+    assert erro.value.status_code == 400
+
+
+def test_cursor_sem_chave_em_listagem_ordenada_retorna_400():
+    with pytest.raises(HTTPException) as erro:
+        decodificar_cursor(codificar_cursor(42), com_chave=True)
+    assert erro.value.status_code == 400
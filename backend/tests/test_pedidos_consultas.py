@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from backend.app import database
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.models.usuario.usuario import Usuario
+from backend.app.domain.models.vendas.item_pedido import ItemPedido
+from backend.app.domain.models.vendas.pedidos import Pedido
+from backend.app.routers import pedido_router
+from backend.app.service.pedido_service import PedidoService
+from backend.app.utils.template_utils import get_current_user_dependency
+
+# MUITOS passa do limite padrão (50) da listagem JSON
+POUCOS, MUITOS = 3, 60
+
+
+def _cadastrar_pedidos(db, usuario_id: int, quantidade: int) -> None:
+    db.execute(insert(Usuario).values(id=usuario_id, nome=f"Cliente {usuario_id}",
+                                      email=f"cliente{usuario_id}@teste.com", senha_hash="x"))
+    for _ in range(quantidade):
+        pedido = Pedido(usuario_id=usuario_id, total=80, total_itens=3)
+        db.add(pedido)
+        db.flush()
+        db.execute(insert(ItemPedido), [
+            {"pedido_id": pedido.id, "livro_id": 1, "quantidade": 1, "preco_unitario": 50},
+            {"pedido_id": pedido.id, "livro_id": 2, "quantidade": 2, "preco_unitario": 15},
+        ])
+
+
+@pytest.fixture
+def cliente(banco, monkeypatch):
+    # Templates são resolvidos a partir de backend/ (como no main.py)
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    with banco() as db:
+        db.add_all([Livro(id=1, titulo="Dom Casmurro", autor="Machado"),
+                    Livro(id=2, titulo="Iracema", autor="Alencar")])
+        _cadastrar_pedidos(db, 1, POUCOS)
+        _cadastrar_pedidos(db, 2, MUITOS)
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(pedido_router.router, prefix="/api/pedidos")
+    usuario = {"id": None}
+    app.dependency_overrides[get_current_user_dependency] = lambda: dict(usuario)
+    with TestClient(app) as cliente:
+        yield cliente, usuario
+
+
+def _contar_consultas(executar):
+    """Resultado de executar() e quantos comandos SQL ele emitiu"""
+    comandos = []
+    contar = lambda conn, cursor, sql, *args: comandos.append(sql)  # noqa: E731
+    event.listen(database.engine, "before_cursor_execute", contar)
+    try:
+        resultado = executar()
+    finally:
+        event.remove(database.engine, "before_cursor_execute", contar)
+    return resultado, len(comandos)
+
+
+def _consultas(cliente, usuario, usuario_id: int, url: str):
+    usuario["id"] = usuario_id
+    resposta, quantidade = _contar_consultas(lambda: cliente.get(url))
+    assert resposta.status_code == 200
+    return resposta, quantidade
+
+
+def _pagina_pedidos(usuario_id: int) -> str:
+    """O que a página /pedidos faz: lista pelo serviço e renderiza pedido.html"""
+    with database.SessionLocal() as db:
+        pedidos = PedidoService(db).listar_pedidos_por_usuario(usuario_id)
+        return Jinja2Templates(directory="app/templates").get_template("pedido.html").render(
+            request=None, usuario=db.get(Usuario, usuario_id), usuario_logado=True, pedidos=pedidos
+        )
+
+
+def test_listagem_json_tem_numero_fixo_de_consultas(cliente):
+    cliente, usuario = cliente
+    poucos, consultas_poucos = _consultas(cliente, usuario, 1, "/api/pedidos/listar?limite=200")
+    muitos, consultas_muitos = _consultas(cliente, usuario, 2, "/api/pedidos/listar?limite=200")
+
+    assert len(poucos.json()) == POUCOS and len(muitos.json()) == MUITOS
+    assert all(len(pedido["itens"]) == 2 for pedido in muitos.json())
+    assert consultas_poucos == consultas_muitos
+
+
+def test_pagina_html_tem_numero_fixo_de_consultas(cliente):
+    poucos, consultas_poucos = _contar_consultas(lambda: _pagina_pedidos(1))
+    muitos, consultas_muitos = _contar_consultas(lambda: _pagina_pedidos(2))
+
+    # Os títulos vêm de item.livro: sem carga antecipada seria uma consulta por pedido e por item;
+    # todos os pedidos aparecem, inclusive além do limite padrão da listagem JSON
+    assert poucos.count("Dom Casmurro - Quantidade") == POUCOS
+    assert muitos.count("Iracema - Quantidade") == MUITOS
+    assert consultas_poucos == consultas_muitos
+
+
+def test_cursor_emitido_pela_listagem_e_aceito_ate_o_fim(cliente):
+    cliente, usuario = cliente
+    usuario["id"] = 2
+    vistos, url = [], "/api/pedidos/listar?limite=15"
+    while url:
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200
+        vistos.extend(pedido["id"] for pedido in resposta.json())
+        cursor = resposta.headers.get("X-Proximo-Cursor")
+        url = f"/api/pedidos/listar?limite=15&cursor={cursor}" if cursor else None
+
+    assert len(vistos) == len(set(vistos)) == MUITOS
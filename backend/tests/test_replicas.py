@@ -0,0 +1,117 @@
+import ast
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from backend.app import database
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.domain.models.replicacao import ReplicacaoHeartbeat
+from backend.app.repositories.livro_repository import LivroRepository
+from backend.app.service.replicacao_service import MonitorReplicas
+from backend.app.utils.roteamento_replicas import (
+    PrimarioAposEscritaMiddleware, forcar_primario, liberar_primario, roteador_replicas
+)
+
+MAIN = Path(__file__).resolve().parents[1] / "main.py"
+
+
+def _cadastrar(engine, titulo: str) -> None:
+    with engine.begin() as conexao:
+        conexao.execute(insert(Livro).values(id=1, titulo=titulo, autor="Autor"))
+
+
+def _copiar_heartbeat(replica, gravado_em=None) -> None:
+    """Simula a replicação da marca gravada no primário"""
+    if gravado_em is None:
+        with database.engine.connect() as conexao:
+            gravado_em = conexao.execute(select(ReplicacaoHeartbeat.gravado_em)).scalar_one()
+    with replica.begin() as conexao:
+        conexao.execute(ReplicacaoHeartbeat.__table__.delete())
+        conexao.execute(insert(ReplicacaoHeartbeat).values(id=1, gravado_em=gravado_em))
+
+
+def test_monitor_mede_o_lag_pelo_heartbeat(replica):
+    monitor = MonitorReplicas(primario=database.engine, roteador=roteador_replicas, intervalo=0)
+
+    monitor.verificar()  # primeira marca: ainda sem medida
+    assert not roteador_replicas.disponivel(replica)
+
+    _copiar_heartbeat(replica)
+    monitor.verificar()
+    assert roteador_replicas.lag(replica) == 0.0
+    assert roteador_replicas.disponivel(replica)
+
+    # Réplica parada há um minuto sai do roteamento
+    _copiar_heartbeat(replica, datetime.utcnow() - timedelta(seconds=60))
+    monitor.verificar()
+    assert roteador_replicas.lag(replica) >= 60
+    assert not roteador_replicas.disponivel(replica)
+
+
+def test_leituras_vao_para_a_replica_ate_a_sessao_escrever(replica):
+    _cadastrar(database.engine, "No primário")
+    _cadastrar(replica, "Na réplica")
+    roteador_replicas.registrar_lag(replica, 0.0)
+
+    with database.SessionLocal() as db:
+        repo = LivroRepository(db)
+        assert [l.titulo for l in repo.buscar_com_filtros()] == ["Na réplica"]
+
+        token = forcar_primario()
+        try:
+            assert [l.titulo for l in repo.buscar_com_filtros()] == ["No primário"]
+        finally:
+            liberar_primario(token)
+
+        db.add(Livro(titulo="Novo", autor="Autor"))
+        db.flush()
+        assert [l.titulo for l in repo.buscar_com_filtros()] == ["No primário", "Novo"]
+        db.rollback()
+
+    # Réplica atrasada: leitura volta ao primário
+    roteador_replicas.registrar_lag(replica, 30.0)
+    with database.SessionLocal() as db:
+        assert [l.titulo for l in LivroRepository(db).buscar_com_filtros()] == ["No primário"]
+
+
+def test_cookie_de_escrita_garante_read_your_writes(replica):
+    _cadastrar(database.engine, "No primário")
+    _cadastrar(replica, "Na réplica")
+    roteador_replicas.registrar_lag(replica, 0.0)
+
+    app = FastAPI()
+    app.add_middleware(PrimarioAposEscritaMiddleware, janela=10)
+
+    @app.get("/livros")
+    def listar():
+        with database.SessionLocal() as db:
+            return [l.titulo for l in LivroRepository(db).buscar_com_filtros()]
+
+    @app.post("/livros")
+    def criar():
+        return {"ok": True}
+
+    @app.post("/falha", status_code=400)
+    def falhar():
+        return {"ok": False}
+
+    with TestClient(app) as cliente:
+        assert cliente.get("/livros").json() == ["Na réplica"]
+        assert "ler_primario" not in cliente.post("/falha").cookies
+
+        resposta = cliente.post("/livros")
+        assert "Max-Age=10" in resposta.headers["set-cookie"]
+        assert cliente.get("/livros").json() == ["No primário"]
+
+    with TestClient(app) as outro_cliente:
+        assert outro_cliente.get("/livros").json() == ["Na réplica"]
+
+
+def test_main_usa_os_modulos_do_pacote_backend():
+    # Importar app.* criaria cópias do engine, do roteador e dos trabalhadores em segundo plano
+    arvore = ast.parse(MAIN.read_text(encoding="utf-8"))
+    modulos = [no.module for no in ast.walk(arvore) if isinstance(no, ast.ImportFrom) and no.module]
+    assert modulos and not [m for m in modulos if m == "app" or m.startswith("app.")]
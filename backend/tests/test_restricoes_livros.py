@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from backend.app.domain.models.Livro.livro import Livro
+from backend.app.repositories.livro_repository import restricao_violada
+
+
+def _erro_postgres(restricao: str, mensagem: str) -> IntegrityError:
+    orig = Exception(mensagem)
+    orig.diag = SimpleNamespace(constraint_name=restricao)
+    return IntegrityError("INSERT", {}, orig)
+
+
+def test_postgres_decide_pelo_nome_da_restricao():
+    # O valor do slug cita "isbn", mas a restrição violada é a do slug
+    erro = _erro_postgres(
+        "idx_livros_slug_unico",
+        'duplicate key value violates unique constraint "idx_livros_slug_unico"\n'
+        "DETAIL:  Key (slug)=(guia-do-isbn) already exists.",
+    )
+    assert restricao_violada(erro) == "slug"
+    assert restricao_violada(_erro_postgres("ux_livros_isbn", "slug")) == "isbn"
+    assert restricao_violada(_erro_postgres("pedidos_pkey", "isbn slug")) is None
+
+
+@pytest.mark.parametrize("coluna", ["isbn", "slug"])
+def test_sqlite_decide_pela_coluna(banco, coluna):
+    with banco() as db:
+        db.add(Livro(titulo="Guia do ISBN", autor="A", isbn="9788535914849", slug="guia-do-isbn"))
+        db.commit()
+        outro = {"isbn": "9788535914849", "slug": "outro"} if coluna == "isbn" else {"isbn": None, "slug": "guia-do-isbn"}
+        db.add(Livro(titulo="Guia do ISBN", autor="A", **outro))
+        with pytest.raises(IntegrityError) as erro:
+            db.commit()
+        db.rollback()
+    assert restricao_violada(erro.value) == coluna